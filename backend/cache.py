@@ -9,6 +9,12 @@ operations are wrapped in try/except for **graceful degradation** — if
 Redis is down the app treats every call as a cache miss and continues
 to function normally.
 
+A second level, :class:`SemanticCache`, keeps the embedding of every
+cached query in a small in-memory vector index. When the exact key
+misses, a previous query whose embedding lies within a cosine threshold
+(e.g. "sad robot movies" vs "movies about sad robots") can serve its
+cached payload instead.
+
 Usage:
     from backend.cache import get_cached_search, set_cached_search
 
@@ -22,7 +28,10 @@ Usage:
 
 import hashlib
 import logging
+import os
+from collections import deque
 
+import numpy as np
 import orjson
 import redis.asyncio as aioredis
 
@@ -34,6 +43,10 @@ logger = logging.getLogger(__name__)
 DEFAULT_TTL: int = 3600  # 1 hour
 CACHE_KEY_PREFIX: str = "nebula:search_cache:"
 
+# Semantic (nearest-query) cache
+SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_CAPACITY: int = int(os.getenv("SEMANTIC_CACHE_CAPACITY", "4096"))
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -97,3 +110,116 @@ async def set_cached_search(
         )
     except Exception as exc:
         logger.warning("Redis SET failed (skipping cache write): %s", exc)
+
+
+# ---------------------------------------------------------------------------
+# Semantic (nearest-query) cache
+# ---------------------------------------------------------------------------
+
+class SemanticCache:
+    """
+    In-memory index of cached query embeddings (per worker process).
+
+    Embeddings are stored L2-normalised in a fixed-capacity ring buffer,
+    so a lookup is one matrix-vector product. The payloads themselves stay
+    in Redis under the exact-query key; an index entry whose payload has
+    expired is dropped on its next hit.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        capacity: int = SEMANTIC_CACHE_CAPACITY,
+    ):
+        self.threshold = threshold
+        self.capacity = max(1, capacity)
+        self._vectors: np.ndarray | None = None
+        self._queries: list[str | None] = [None] * self.capacity
+        self._slots: dict[str, int] = {}
+        self._next = 0
+        self._size = 0
+
+        self.lookups = 0
+        self.hits = 0
+        self.recent_hit_similarities: deque[float] = deque(maxlen=1000)
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def add(self, query: str, vector) -> None:
+        """Index *query* (whose payload was just cached) by its embedding."""
+        key = query.lower().strip()
+        vec = self._unit(vector)
+        if self._vectors is None:
+            self._vectors = np.zeros((self.capacity, vec.size), dtype=np.float32)
+
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._next
+            evicted = self._queries[slot]
+            if evicted is not None:
+                self._slots.pop(evicted, None)
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self._queries[slot] = key
+            self._slots[key] = slot
+        self._vectors[slot] = vec
+
+    def nearest(self, vector) -> tuple[str, float] | None:
+        """Closest indexed query within the threshold, as ``(query, cosine)``."""
+        self.lookups += 1
+        if self._vectors is None or self._size == 0:
+            return None
+        scores = self._vectors[: self._size] @ self._unit(vector)
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        if similarity < self.threshold or self._queries[best] is None:
+            return None
+        return self._queries[best], similarity
+
+    def discard(self, query: str) -> None:
+        slot = self._slots.pop(query.lower().strip(), None)
+        if slot is not None:
+            self._queries[slot] = None
+            self._vectors[slot] = 0.0
+
+    async def set(self, query: str, vector, data: dict, ttl: int = DEFAULT_TTL) -> None:
+        """Cache *data* under the exact *query* key, then index its embedding."""
+        await set_cached_search(query, data, ttl=ttl)
+        self.add(query, vector)
+
+    async def get(self, query: str, vector) -> tuple[dict, str, float] | None:
+        """
+        Return ``(payload, matched_query, cosine)`` for the nearest cached
+        paraphrase of *query*, or ``None``.
+        """
+        match = self.nearest(vector)
+        if match is None:
+            return None
+        matched_query, similarity = match
+        payload = await get_cached_search(matched_query)
+        if payload is None:
+            self.discard(matched_query)
+            return None
+
+        self.hits += 1
+        self.recent_hit_similarities.append(similarity)
+        logger.info(
+            "Semantic cache hit: %r served by %r (cosine %.4f)", query, matched_query, similarity
+        )
+        return payload, matched_query, similarity
+
+    def stats(self) -> dict:
+        recent = self.recent_hit_similarities
+        return {
+            "entries": len(self._slots),
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "mean_hit_similarity": float(np.mean(recent)) if recent else None,
+            "min_hit_similarity": float(np.min(recent)) if recent else None,
+        }
@@ -0,0 +1,330 @@
+"""
+backend/catalog.py
+------------------
+On-disk snapshot of the movie catalog (vectors + metadata).
+
+The snapshot is a plain directory written by ``scripts/bulk_ingest.py``
+(or ``scripts/export_catalog.py`` for an existing Pinecone index):
+
+    vectors.npy    row-major matrix, one L2-normalised row per movie,
+                   float32 or float16 (``CATALOG_DTYPE``)
+    ids.json       row → movie id (the id → row table is built from it)
+    metadata.json  row → metadata dict (same fields as Pinecone metadata)
+    artifact.json  version (digest of ids, vectors and metadata),
+                   rows_version (ids and vectors only), dtype, rows,
+                   dimension; written last, after the files it describes
+
+Rows are normalised at write time so cosine similarity is a plain dot
+product for every consumer of the snapshot.
+
+The API maps ``vectors.npy`` read-only (``load_catalog(mmap=True)``), so
+every uvicorn worker on a host shares one page-cache copy, and reads the
+version from ``artifact.json`` instead of hashing every page at startup.
+A metadata-only refresh (``update_catalog``) changes ``version`` — so
+the API reloads it — but not ``rows_version``, which is all the kNN
+graph depends on.
+float16 halves the file and the page cache; readers gather rows into
+float32 (``VectorMirror``) or, for full scans (``LocalVectorStore``, the
+kNN build), upcast a private float32 copy.
+
+:func:`write_catalog` takes the whole catalog at once; the streaming
+ingest pipeline appends batches through :class:`CatalogWriter` instead,
+which stages rows on disk and only holds one batch in memory.
+
+Usage:
+    from backend.catalog import load_catalog
+
+    catalog = load_catalog("data/catalog")
+    row = catalog.row_of("603")
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+CATALOG_DIR: str = os.getenv(
+    "NEBULA_CATALOG_DIR",
+    str(Path(__file__).resolve().parent.parent / "data" / "catalog"),
+)
+
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.json"
+METADATA_FILE = "metadata.json"
+ARTIFACT_FILE = "artifact.json"
+
+CATALOG_DTYPE: str = os.getenv("CATALOG_DTYPE", "float32")
+CATALOG_DTYPES = ("float32", "float16")
+
+
+@dataclass
+class Catalog:
+    """In-memory view of a catalog snapshot."""
+
+    ids: list[str]
+    vectors: np.ndarray
+    metadata: list[dict]
+    id_to_row: dict[str, int] = field(default_factory=dict)
+    version: Optional[str] = None      # from artifact.json, when present
+    rows_version: Optional[str] = None  # ids + vectors part of ``version``
+
+    def __post_init__(self):
+        if not self.id_to_row:
+            self.id_to_row = {mid: row for row, mid in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0
+
+    def row_of(self, movie_id: str) -> int | None:
+        return self.id_to_row.get(movie_id)
+
+
+def normalise_rows(vectors) -> np.ndarray:
+    """Return a float32 copy of *vectors* with every row scaled to unit length."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _check_dtype(dtype: str) -> np.dtype:
+    if dtype not in CATALOG_DTYPES:
+        raise ValueError(f"CATALOG_DTYPE must be one of {', '.join(CATALOG_DTYPES)}")
+    return np.dtype(dtype)
+
+
+def _hash_file(digest, path: Path) -> None:
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+
+def _write_artifact(target: Path, rows_digest, dtype: np.dtype, rows: int, dimension: int) -> None:
+    """Record the snapshot; *rows_digest* has hashed ids + vectors, metadata.json is added here."""
+    digest = rows_digest.copy()
+    _hash_file(digest, target / METADATA_FILE)
+    body = {
+        "version": digest.hexdigest()[:16],
+        "rows_version": rows_digest.hexdigest()[:16],
+        "dtype": dtype.name,
+        "rows": rows,
+        "dimension": dimension,
+        # Ties the record to this vectors.npy: a re-ingest replaces the file (new inode)
+        "vectors_inode": (target / VECTORS_FILE).stat().st_ino,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    replace_file(target / ARTIFACT_FILE, lambda f: f.write(json.dumps(body).encode("utf-8")))
+
+
+def write_catalog(path, ids, vectors, metadata, dtype: str = CATALOG_DTYPE) -> Path:
+    """
+    Persist a catalog snapshot to *path*.
+
+    ``vectors`` may be any (n, d) array-like; rows are normalised before
+    writing and stored as *dtype*. ``ids`` and ``metadata`` must be
+    aligned with the rows.
+    """
+    ids = [str(mid) for mid in ids]
+    matrix = normalise_rows(vectors).astype(_check_dtype(dtype), copy=False)
+    if not (len(ids) == len(metadata) == matrix.shape[0]):
+        raise ValueError("ids, vectors and metadata must have the same length")
+
+    target = Path(path)
+    target.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so readers holding a memory map of the previous
+    # vectors.npy keep a valid (old) file instead of a truncated one.
+    replace_file(target / IDS_FILE, lambda f: f.write(json.dumps(ids).encode("utf-8")))
+    replace_file(target / METADATA_FILE, lambda f: f.write(json.dumps(metadata).encode("utf-8")))
+    replace_file(target / VECTORS_FILE, lambda f: np.save(f, matrix))
+    digest = hashlib.sha256("\n".join(ids).encode("utf-8"))
+    digest.update(np.ascontiguousarray(matrix).tobytes())
+    _write_artifact(target, digest, matrix.dtype, matrix.shape[0], matrix.shape[1])
+    return target
+
+
+class CatalogWriter:
+    """
+    Append-only snapshot writer: rows are staged (as float32) under
+    ``<path>/.staging`` as they arrive and published as *dtype* with the
+    same write-then-rename as :func:`write_catalog` by :meth:`commit`.
+    """
+
+    STAGING_DIR = ".staging"
+    COPY_ROWS = 4096  # rows per chunk when assembling vectors.npy
+
+    def __init__(self, path=CATALOG_DIR, dtype: str = CATALOG_DTYPE):
+        self.path = Path(path)
+        self.dtype = _check_dtype(dtype)
+        self.staging = self.path / self.STAGING_DIR
+        self.staging.mkdir(parents=True, exist_ok=True)
+        self.rows = 0
+        self.dimension = 0
+        self._vectors = open(self.staging / "vectors.f32", "wb")
+        self._ids = open(self.staging / "ids.jsonl", "w", encoding="utf-8")
+        self._metadata = open(self.staging / "metadata.jsonl", "w", encoding="utf-8")
+
+    def append(self, ids, vectors, metadata, normalise: bool = True) -> None:
+        """Stage rows; ``normalise=False`` keeps rows that are already unit length bit-for-bit."""
+        matrix = normalise_rows(vectors) if normalise else np.asarray(vectors, dtype=np.float32)
+        if not (len(ids) == len(metadata) == matrix.shape[0]):
+            raise ValueError("ids, vectors and metadata must have the same length")
+        if self.dimension and matrix.shape[1] != self.dimension:
+            raise ValueError(f"expected {self.dimension}-dim vectors, got {matrix.shape[1]}")
+        self.dimension = matrix.shape[1]
+        self._vectors.write(matrix.tobytes())
+        for mid, meta in zip(ids, metadata):
+            self._ids.write(json.dumps(str(mid)) + "\n")
+            self._metadata.write(json.dumps(meta) + "\n")
+        self.rows += len(ids)
+
+    def _close_staging(self) -> None:
+        for f in (self._vectors, self._ids, self._metadata):
+            f.close()
+
+    def commit(self) -> Path:
+        """Publish the staged rows as the snapshot at ``path``."""
+        self._close_staging()
+        staged = np.memmap(self.staging / "vectors.f32", dtype=np.float32, mode="r",
+                           shape=(self.rows, self.dimension)) if self.rows else None
+        # Same digest as write_catalog: ids joined by newlines, the stored vector bytes, metadata.json
+        digest = hashlib.sha256()
+        with open(self.staging / "ids.jsonl", encoding="utf-8") as lines:
+            digest.update("\n".join(json.loads(line) for line in lines).encode("utf-8"))
+
+        def write_vectors(f, staged):
+            header = {"descr": self.dtype.str, "fortran_order": False, "shape": (self.rows, self.dimension)}
+            np.lib.format.write_array_header_1_0(f, header)
+            for start in range(0, self.rows, self.COPY_ROWS):
+                block = np.ascontiguousarray(staged[start:start + self.COPY_ROWS], dtype=self.dtype).tobytes()
+                digest.update(block)
+                f.write(block)
+
+        replace_file(self.path / IDS_FILE, lambda f: _write_json_list(f, self.staging / "ids.jsonl"))
+        replace_file(self.path / METADATA_FILE, lambda f: _write_json_list(f, self.staging / "metadata.jsonl"))
+        replace_file(self.path / VECTORS_FILE, partial(write_vectors, staged=staged))
+        _write_artifact(self.path, digest, self.dtype, self.rows, self.dimension)
+        del staged   # unmap before discard() unlinks the staging file
+        self.discard()
+        return self.path
+
+    def discard(self) -> None:
+        """Drop the staged rows without touching the published snapshot."""
+        self._close_staging()
+        for name in ("vectors.f32", "ids.jsonl", "metadata.jsonl"):
+            (self.staging / name).unlink(missing_ok=True)
+        try:
+            self.staging.rmdir()
+        except OSError:
+            pass
+
+
+def update_catalog(path, vectors: dict, metadata: dict) -> int:
+    """
+    Rewrite the snapshot at *path* with the given rows replaced:
+    *vectors* and *metadata* map movie id → new vector / metadata dict.
+    Ids not in the catalog are appended (they need both). Streams the
+    catalog through :class:`CatalogWriter`; returns the row count.
+    """
+    catalog = load_catalog(path, mmap=True)
+    writer = CatalogWriter(path, dtype=catalog.vectors.dtype.name)
+    for start in range(0, len(catalog), CatalogWriter.COPY_ROWS):
+        stop = min(start + CatalogWriter.COPY_ROWS, len(catalog))
+        ids = catalog.ids[start:stop]
+        block = np.array(catalog.vectors[start:stop])
+        rows = catalog.metadata[start:stop]
+        for i, mid in enumerate(ids):
+            if mid in vectors:
+                block[i] = normalise_rows(vectors[mid])[0]
+            if mid in metadata:
+                rows[i] = metadata[mid]
+        writer.append(ids, block, rows, normalise=False)  # stored rows are already normalised
+    added = [mid for mid in vectors if mid not in catalog.id_to_row and mid in metadata]
+    if added:
+        writer.append(added, [vectors[mid] for mid in added], [metadata[mid] for mid in added])
+    del catalog
+    writer.commit()
+    return writer.rows
+
+
+def _write_json_list(f, lines_path: Path) -> None:
+    """Stream a JSON-lines file into *f* as one JSON array."""
+    f.write(b"[")
+    with open(lines_path, "rb") as lines:
+        for i, line in enumerate(lines):
+            if i:
+                f.write(b", ")
+            f.write(line.rstrip(b"\n"))
+    f.write(b"]")
+
+
+def replace_file(path: Path, write) -> None:
+    """Write *path* via ``write(binary_file)`` to a temp file, then rename over it."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def catalog_exists(path=CATALOG_DIR) -> bool:
+    """True when *path* holds a catalog snapshot."""
+    return (Path(path) / VECTORS_FILE).exists()
+
+
+def load_catalog(path=CATALOG_DIR, mmap: bool = False) -> Catalog:
+    """
+    Load a catalog snapshot written by :func:`write_catalog`.
+
+    With ``mmap=True`` the vectors are a read-only memory map: pages are
+    shared between worker processes and loaded on first touch.
+    """
+    source = Path(path)
+    vectors = np.load(source / VECTORS_FILE, mmap_mode="r" if mmap else None)
+    ids = json.loads((source / IDS_FILE).read_text(encoding="utf-8"))
+    metadata = json.loads((source / METADATA_FILE).read_text(encoding="utf-8"))
+    artifact = _matching_artifact(source, vectors) or {}
+    return Catalog(
+        ids=ids, vectors=vectors, metadata=metadata,
+        version=artifact.get("version"), rows_version=artifact.get("rows_version"),
+    )
+
+
+def _read_artifact(source: Path) -> Optional[dict]:
+    """artifact.json, if it describes the current vectors.npy (else None)."""
+    try:
+        artifact = json.loads((source / ARTIFACT_FILE).read_text(encoding="utf-8"))
+        if artifact.get("vectors_inode") != (source / VECTORS_FILE).stat().st_ino:
+            return None  # describes an older vectors.npy (caught mid re-ingest)
+    except (OSError, ValueError):
+        return None
+    return artifact
+
+
+def _matching_artifact(source: Path, vectors: np.ndarray) -> Optional[dict]:
+    """artifact.json, if it describes these vectors (else None)."""
+    artifact = _read_artifact(source)
+    if artifact is None:
+        return None
+    if artifact.get("rows") != vectors.shape[0] or artifact.get("dtype") != vectors.dtype.name:
+        return None
+    return artifact
+
+
+def read_catalog_version(path=CATALOG_DIR) -> Optional[str]:
+    """
+    Version of the snapshot at *path*, read from its artifact.json alone
+    (no vectors touched); ``None`` without a valid artifact.
+    """
+    artifact = _read_artifact(Path(path))
+    return artifact.get("version") if artifact else None
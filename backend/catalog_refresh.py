@@ -0,0 +1,105 @@
+"""
+backend/catalog_refresh.py
+--------------------------
+Swaps every catalog-backed piece of ``app.state`` to a re-ingested
+catalog snapshot, without a restart.
+
+The metadata store, the kNN graph, the local index (``VECTOR_BACKEND=
+local``), the vector mirror and the ``/movies`` snapshot are all derived
+from the snapshot in ``CATALOG_DIR``. An ingest publishes a new one by
+renaming files into place and bumping the version in ``artifact.json``;
+:class:`CatalogRefresher` notices that and replaces all of them together:
+
+    - at most every ``CATALOG_CHECK_INTERVAL`` seconds it reads the
+      version from ``artifact.json`` (one small JSON read)
+    - on a new version it maps the catalog, rebuilds the metadata store,
+      kNN graph and local index (same ``LOCAL_ANN`` mode), remaps or opens
+      the vector mirror and invalidates the ``/movies`` snapshot
+    - one request refreshes; the others keep serving the previous
+      objects meanwhile (the lock is taken non-blocking), and a failed
+      refresh is logged and leaves the previous state in place
+
+Every catalog-backed dependency getter in ``backend/dependencies.py``
+calls :meth:`CatalogRefresher.maybe_refresh`, so whichever endpoint is
+hit first after an ingest picks it up.
+
+Usage:
+    app.state.catalog_refresher = CatalogRefresher(app.state, CATALOG_DIR, version)
+    app.state.catalog_refresher.maybe_refresh()
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from backend.catalog import CATALOG_DIR, load_catalog, read_catalog_version
+from backend.knn_graph import load_knn_graph
+from backend.metadata_store import MetadataStore
+from backend.vector_mirror import VectorMirror
+from backend.vector_store import LOCAL_ANN, LocalVectorStore
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHECK_INTERVAL: float = float(os.getenv("CATALOG_CHECK_INTERVAL", "30"))   # seconds
+
+
+class CatalogRefresher:
+    """Replaces the catalog-backed objects on *state* when a new version is published."""
+
+    def __init__(
+        self,
+        state,
+        path=CATALOG_DIR,
+        version: Optional[str] = None,
+        check_interval: float = CATALOG_CHECK_INTERVAL,
+        ann: str = LOCAL_ANN,
+    ):
+        self.state = state
+        self.path = Path(path)
+        self.version = version
+        self.check_interval = check_interval
+        self.ann = ann
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def maybe_refresh(self) -> bool:
+        """Check the published version if due; returns True when state was swapped."""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return False
+        if not self._lock.acquire(blocking=False):
+            return False   # another request is checking or swapping
+        try:
+            self._checked_at = time.monotonic()
+            version = read_catalog_version(self.path)
+            if version is None or version == self.version:
+                return False
+            return self._swap(version)
+        except Exception as exc:
+            logger.warning("Catalog refresh failed (serving previous snapshot): %s", exc)
+            return False
+        finally:
+            self._lock.release()
+
+    def _swap(self, version: str) -> bool:
+        catalog = load_catalog(self.path, mmap=True)
+        if catalog.version != version:   # replaced again meanwhile; the next check catches up
+            return False
+        state = self.state
+        index = LocalVectorStore(catalog, ann=self.ann) if isinstance(state.index, LocalVectorStore) else None
+        metadata_store = MetadataStore(catalog)
+        knn_graph = load_knn_graph(self.path, catalog=catalog)
+        if state.vector_mirror is None:
+            state.vector_mirror = VectorMirror.open(self.path)
+        else:
+            state.vector_mirror.reload()
+        if index is not None:
+            state.index = index
+        state.metadata_store = metadata_store
+        state.knn_graph = knn_graph
+        self.version = version
+        state.graph_snapshots.invalidate(version)
+        logger.info("Catalog snapshot %s: %d movies", version, len(catalog))
+        return True
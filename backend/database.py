@@ -86,6 +86,19 @@ redis_pool = aioredis.ConnectionPool.from_url(
 )
 
 
+# Separate pool without response decoding, for raw binary values (embeddings)
+redis_binary_pool = aioredis.ConnectionPool.from_url(
+    REDIS_URL,
+    max_connections=20,
+    decode_responses=False,
+)
+
+
 def get_redis() -> aioredis.Redis:
     """Return a Redis client backed by the shared connection pool."""
     return aioredis.Redis(connection_pool=redis_pool)
+
+
+def get_redis_binary() -> aioredis.Redis:
+    """Return a Redis client that returns raw ``bytes`` values."""
+    return aioredis.Redis(connection_pool=redis_binary_pool)
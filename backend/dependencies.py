@@ -1,5 +1,5 @@
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 import os
 
 from fastapi import Request, HTTPException, Depends
@@ -8,7 +8,13 @@ from backend.database import get_redis
 
 if TYPE_CHECKING:
     from sentence_transformers import SentenceTransformer
-    import pinecone
+    from backend.vector_store import VectorStore
+    from backend.knn_graph import KnnGraph
+    from backend.metadata_store import MetadataStore
+    from backend.vector_mirror import VectorMirror
+    from backend.embedding_cache import EmbeddingCache
+    from backend.cache import SemanticCache
+    from backend.graph_snapshot import GraphSnapshotStore
 
 logger = logging.getLogger(__name__)
 
@@ -45,8 +51,50 @@ def get_model(request: Request) -> "SentenceTransformer":
     return request.app.state.model
 
 
-def get_index(request: Request) -> "pinecone.Index":
-    return request.app.state.index
+def get_encoder(request: Request):
+    """Query encoder strategy wrapping the model (see backend/encoder.py)."""
+    return request.app.state.encoder
+
+
+def _catalog_state(request: Request):
+    """app.state, after picking up a re-ingested catalog (backend/catalog_refresh.py)."""
+    refresher = getattr(request.app.state, "catalog_refresher", None)
+    if refresher is not None:
+        refresher.maybe_refresh()
+    return request.app.state
+
+
+def get_index(request: Request) -> "VectorStore":
+    """Pinecone index or LocalVectorStore, depending on VECTOR_BACKEND."""
+    return _catalog_state(request).index
+
+
+def get_embedding_cache(request: Request) -> "EmbeddingCache":
+    return request.app.state.embedding_cache
+
+
+def get_metadata_store(request: Request) -> Optional["MetadataStore"]:
+    """Columnar browse store, or None without a catalog snapshot."""
+    return _catalog_state(request).metadata_store
+
+
+def get_vector_mirror(request: Request) -> Optional["VectorMirror"]:
+    """Memory-mapped catalog vectors, or None without a catalog snapshot."""
+    return _catalog_state(request).vector_mirror
+
+
+def get_graph_snapshots(request: Request) -> "GraphSnapshotStore":
+    """Pre-serialised /movies graph, versioned by catalog."""
+    return _catalog_state(request).graph_snapshots
+
+
+def get_semantic_cache(request: Request) -> "SemanticCache":
+    return request.app.state.semantic_cache
+
+
+def get_knn_graph(request: Request) -> Optional["KnnGraph"]:
+    """Precomputed kNN graph, or None if it has not been built."""
+    return _catalog_state(request).knn_graph
 
 
 # --- Supabase Auth Dependency ---
@@ -0,0 +1,117 @@
+"""
+backend/embedding_cache.py
+--------------------------
+Two-level cache for query embeddings: an in-process LRU backed by Redis.
+
+Every call site that turns query text into a vector goes through
+:meth:`EmbeddingCache.encode`, so page changes and filter toggles on the
+same query never re-run the encoder. Keys combine the model name with a
+SHA-256 of the normalised text (lowercase, collapsed whitespace — the
+MiniLM tokenizer is uncased, so this does not change the embedding).
+Values are stored in Redis as raw float32 bytes.
+
+Redis failures are swallowed and treated as misses, like ``backend/cache.py``.
+
+Usage:
+    vector = await embedding_cache.encode("sad robots", encoder)
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+
+import numpy as np
+import redis.asyncio as aioredis
+
+from backend.database import get_redis_binary
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME: str = "all-MiniLM-L6-v2"
+DEFAULT_MAXSIZE: int = 4096       # in-process entries (~1.5 KB each at 384 dims)
+DEFAULT_TTL: int = 7 * 24 * 3600  # embeddings only change with the model
+CACHE_KEY_PREFIX: str = "nebula:embedding:"
+
+
+def normalise_query(text: str) -> str:
+    """Lowercase and collapse whitespace."""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """In-process LRU of query embeddings with a shared Redis tier behind it."""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        maxsize: int = DEFAULT_MAXSIZE,
+        ttl: int = DEFAULT_TTL,
+    ):
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lru: OrderedDict[str, np.ndarray] = OrderedDict()
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _key(self, normalised: str) -> str:
+        digest = hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+        return f"{CACHE_KEY_PREFIX}{self.model_name}:{digest}"
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    async def get(self, text: str) -> np.ndarray | None:
+        """Return the cached embedding for *text*, or ``None`` on a miss."""
+        key = self._key(normalise_query(text))
+
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+            self.stats["local_hits"] += 1
+            return vector
+
+        redis: aioredis.Redis = get_redis_binary()
+        try:
+            raw: bytes | None = await redis.get(key)
+        except Exception as exc:
+            logger.warning("Redis GET failed (treating as embedding miss): %s", exc)
+            raw = None
+
+        if raw is None or len(raw) % 4:
+            return None
+
+        vector = np.frombuffer(raw, dtype=np.float32)
+        self._remember(key, vector)
+        self.stats["redis_hits"] += 1
+        return vector
+
+    async def set(self, text: str, vector) -> np.ndarray:
+        """Store *vector* for *text* in both tiers and return it as float32."""
+        key = self._key(normalise_query(text))
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        vector.setflags(write=False)
+        self._remember(key, vector)
+
+        redis: aioredis.Redis = get_redis_binary()
+        try:
+            await redis.set(key, vector.tobytes(), ex=self.ttl)
+        except Exception as exc:
+            logger.warning("Redis SET failed (skipping embedding cache write): %s", exc)
+        return vector
+
+    async def encode(self, text: str, encoder) -> np.ndarray:
+        """
+        Return the embedding of *text*, running *encoder* on a miss.
+
+        *encoder* is one of the strategies in ``backend/encoder.py``.
+        """
+        cached = await self.get(text)
+        if cached is not None:
+            return cached
+
+        self.stats["misses"] += 1
+        raw_vector = await encoder.encode(normalise_query(text))
+        return await self.set(text, raw_vector)
@@ -0,0 +1,541 @@
+"""
+backend/encoder.py
+------------------
+Query-encoder loading and execution strategies.
+
+``load_model`` selects the inference backend shared by the API and
+``scripts/bulk_ingest.py`` (so query and document vectors always come
+from the same engine):
+
+    - "torch"     : SentenceTransformer in PyTorch fp32 (default)
+    - "onnx"      : ONNX Runtime fp32 graph
+    - "onnx-int8" : ONNX Runtime graph with dynamic int8 quantisation.
+                    Exported once to ENCODER_ONNX_DIR and only kept if
+                    its embeddings stay within ENCODER_COSINE_TOLERANCE
+                    of the fp32 model (see ``check_consistency``); a
+                    cached export is loaded only with its validation
+                    marker. Processes starting together (encoder or
+                    ingest workers) export under a file lock, so one
+                    exports and the others load its result.
+
+The ONNX backends need the optional ``optimum[onnxruntime]`` package.
+
+Every encoder exposes ``async encode(text) -> np.ndarray`` and
+``stats() -> dict`` so endpoints (via ``EmbeddingCache``) do not care how
+the model is run:
+
+    - ThreadEncoder   : one ``model.encode`` call per request in the
+                        default thread pool (previous behaviour)
+    - BatchingEncoder : dynamic micro-batching — requests arriving within
+                        a short window are encoded in one batched forward
+                        pass and each caller's future is resolved with its
+                        own row
+    - ProcessPoolEncoder : requests dispatched to worker processes that
+                        each load the model once, so tokenisation and
+                        preprocessing escape the GIL and use every core
+
+``ShardedEmbedder`` is the bulk-ingest counterpart: one call embeds a
+large batch of documents, length-sorted and sharded across workers.
+
+Configuration (environment):
+    ENCODER_BACKEND        "torch" (default), "onnx" or "onnx-int8"
+    ENCODER_QUANTIZATION   int8 kernel target: "avx512_vnni" (default),
+                           "avx512", "avx2" or "arm64"
+    ENCODER_MODE           "batch" (default), "thread" or "process"
+    ENCODER_BATCH_SIZE     max texts per batch (default 32)
+    ENCODER_BATCH_WAIT_MS  max time the first request waits for company (default 3)
+    ENCODER_WORKERS        worker processes in "process" mode (default: CPU count)
+    ENCODER_TORCH_THREADS  torch intra-op threads per worker
+                           (default: CPU count // workers, at least 1)
+    ENCODER_MAX_PENDING    max requests in flight to the pool (default: 4 × workers)
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from backend.catalog import normalise_rows
+
+logger = logging.getLogger(__name__)
+
+ENCODER_BACKEND: str = os.getenv("ENCODER_BACKEND", "torch")
+ENCODER_QUANTIZATION: str = os.getenv("ENCODER_QUANTIZATION", "avx512_vnni")
+ENCODER_ONNX_DIR: str = os.getenv(
+    "ENCODER_ONNX_DIR",
+    str(Path(__file__).resolve().parent.parent / "data" / "encoder"),
+)
+ENCODER_COSINE_TOLERANCE: float = float(os.getenv("ENCODER_COSINE_TOLERANCE", "0.01"))
+ENCODER_MODE: str = os.getenv("ENCODER_MODE", "batch")
+ENCODER_BATCH_SIZE: int = int(os.getenv("ENCODER_BATCH_SIZE", "32"))
+ENCODER_BATCH_WAIT_MS: float = float(os.getenv("ENCODER_BATCH_WAIT_MS", "3"))
+ENCODER_WORKERS: int = int(os.getenv("ENCODER_WORKERS", str(os.cpu_count() or 1)))
+ENCODER_TORCH_THREADS: int = int(os.getenv("ENCODER_TORCH_THREADS", "0"))
+ENCODER_MAX_PENDING: int = int(os.getenv("ENCODER_MAX_PENDING", "0"))
+
+
+# Representative queries/documents used to validate a quantised encoder
+CONSISTENCY_TEXTS = [
+    "sad robots",
+    "movies about a heist that goes wrong",
+    "feel-good animated film for the whole family",
+    "slow burn psychological horror in a remote cabin",
+    "space opera with political intrigue",
+    "Inception (Action, Science Fiction): Cobb, a skilled thief who commits corporate "
+    "espionage by infiltrating the subconscious of his targets, is offered a chance "
+    "to regain his old life.",
+    "Spirited Away (Animation, Family, Fantasy): A young girl, Chihiro, becomes trapped "
+    "in a strange new world of spirits.",
+    "romantic comedy set in paris",
+]
+
+
+class EncoderConsistencyError(RuntimeError):
+    """Raised when a quantised encoder drifts too far from the fp32 model."""
+
+
+def check_consistency(
+    candidate,
+    reference,
+    texts: list[str] = CONSISTENCY_TEXTS,
+    tolerance: float = ENCODER_COSINE_TOLERANCE,
+) -> float:
+    """
+    Compare *candidate* embeddings against *reference* (fp32) embeddings.
+
+    Returns the worst per-text cosine similarity; raises
+    :class:`EncoderConsistencyError` if it is below ``1 - tolerance``.
+    """
+    got = normalise_rows(candidate.encode(texts))
+    want = normalise_rows(reference.encode(texts))
+    worst = float(np.min(np.sum(got * want, axis=1)))
+    if worst < 1.0 - tolerance:
+        raise EncoderConsistencyError(
+            f"Encoder cosine similarity {worst:.4f} is below 1 - {tolerance} of the fp32 model"
+        )
+    return worst
+
+
+def _int8_file_name(quantization: str) -> str:
+    return f"onnx/model_qint8_{quantization}.onnx"
+
+
+# Written into an export only once it passed ``check_consistency``
+VALIDATED_FILE = "validated.json"
+
+
+def _int8_ready(export_dir: Path, quantization: str) -> bool:
+    return (export_dir / VALIDATED_FILE).exists() and (export_dir / _int8_file_name(quantization)).exists()
+
+
+@contextmanager
+def _export_lock(export_dir: Path):
+    """Exclusive lock serialising exports of *export_dir* across processes."""
+    export_dir.parent.mkdir(parents=True, exist_ok=True)
+    with open(export_dir.with_name(f"{export_dir.name}.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _export_int8_model(model_name: str, export_dir: Path, quantization: str) -> None:
+    """
+    Export *model_name* to ONNX, quantise it and validate it against fp32.
+
+    The export is built in a scratch directory and moved to *export_dir*
+    only after it passed validation, so a rejected model never lands
+    where :func:`load_model` looks for it. Callers hold :func:`_export_lock`.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    logger.info("Exporting int8 ONNX encoder for %s to %s", model_name, export_dir)
+    scratch = export_dir.with_name(f"{export_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(scratch, ignore_errors=True)
+    try:
+        onnx_model = SentenceTransformer(model_name, backend="onnx")
+        onnx_model.save(str(scratch))
+        export_dynamic_quantized_onnx_model(onnx_model, quantization, str(scratch))
+
+        quantised = SentenceTransformer(
+            str(scratch),
+            backend="onnx",
+            model_kwargs={"file_name": _int8_file_name(quantization)},
+        )
+        worst = check_consistency(quantised, SentenceTransformer(model_name))
+        (scratch / VALIDATED_FILE).write_text(
+            json.dumps({"quantization": quantization, "worst_cosine": worst}), encoding="utf-8"
+        )
+        shutil.rmtree(export_dir, ignore_errors=True)   # an unvalidated leftover
+        os.replace(scratch, export_dir)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    logger.info("int8 encoder validated (worst cosine vs fp32: %.4f)", worst)
+
+
+def load_model(
+    model_name: str,
+    backend: str = ENCODER_BACKEND,
+    quantization: str = ENCODER_QUANTIZATION,
+    onnx_dir: str = ENCODER_ONNX_DIR,
+):
+    """Load *model_name* with the inference *backend* ("torch", "onnx", "onnx-int8")."""
+    from sentence_transformers import SentenceTransformer
+
+    backend = (backend or "torch").lower()
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+    if backend == "onnx-int8":
+        export_dir = Path(onnx_dir) / model_name.replace("/", "__") / quantization
+        if not _int8_ready(export_dir, quantization):
+            with _export_lock(export_dir):
+                if not _int8_ready(export_dir, quantization):   # another process may have exported it
+                    _export_int8_model(model_name, export_dir, quantization)
+        return SentenceTransformer(
+            str(export_dir), backend="onnx", model_kwargs={"file_name": _int8_file_name(quantization)}
+        )
+    raise ValueError(f"Unknown ENCODER_BACKEND: {backend}")
+
+
+class ThreadEncoder:
+    """Run each ``model.encode`` call on its own in a worker thread."""
+
+    def __init__(self, model):
+        self.model = model
+        self._calls = 0
+
+    async def encode(self, text: str) -> np.ndarray:
+        self._calls += 1
+        return np.asarray(await asyncio.to_thread(self.model.encode, text), dtype=np.float32)
+
+    def stats(self) -> dict:
+        return {"mode": "thread", "calls": self._calls}
+
+    async def close(self) -> None:
+        pass
+
+
+class BatchingEncoder:
+    """
+    Collect concurrent ``encode`` requests into batches.
+
+    The scheduler task wakes on the first queued request, then keeps
+    collecting until ``max_batch_size`` texts are queued or ``max_wait_ms``
+    has passed, whichever comes first. Duplicate texts within a batch are
+    encoded once. The batched ``model.encode`` call runs in a worker
+    thread so the event loop is never blocked.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = ENCODER_BATCH_SIZE,
+        max_wait_ms: float = ENCODER_BATCH_WAIT_MS,
+    ):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def encode(self, text: str) -> np.ndarray:
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            texts = list(dict.fromkeys(text for text, _, _ in batch))
+
+            try:
+                vectors = await asyncio.to_thread(self.model.encode, texts)
+                vectors = np.asarray(vectors, dtype=np.float32)
+            except Exception as exc:
+                logger.warning("Batched encode of %d texts failed: %s", len(texts), exc)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            rows = {text: vectors[i] for i, text in enumerate(texts)}
+            for text, future, _ in batch:
+                if not future.done():
+                    future.set_result(rows[text])
+
+            waits = [started - queued_at for _, _, queued_at in batch]
+            self._batches += 1
+            self._items += len(batch)
+            self._max_batch = max(self._max_batch, len(batch))
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+    async def close(self) -> None:
+        """Stop the scheduler task (pending callers get a CancelledError)."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                future.cancel()
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": "batch",
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            "max_batch_size": self._max_batch,
+            "mean_queue_wait_ms": 1000 * self._wait_total / self._items if self._items else 0.0,
+            "max_queue_wait_ms": 1000 * self._wait_max,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Process pool
+# ---------------------------------------------------------------------------
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(loader, model_name: str, backend: str, torch_threads: int) -> None:
+    global _worker_model
+    # Must be set before torch / onnxruntime create their thread pools
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    _worker_model = loader(model_name, backend)
+
+
+def _encode_in_worker(texts) -> np.ndarray:
+    return np.asarray(_worker_model.encode(texts), dtype=np.float32)
+
+
+class ProcessPoolEncoder:
+    """
+    Dispatch encode requests to a pool of model-holding worker processes.
+
+    Workers are started with ``spawn`` (safe with torch's thread pools) and
+    each load the model once. Torch intra-op threads are split across
+    workers so ``workers × threads`` does not oversubscribe the cores. At
+    most ``max_pending`` requests are in flight; further callers wait on a
+    semaphore instead of piling up in the executor's unbounded queue.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = ENCODER_BACKEND,
+        workers: int = ENCODER_WORKERS,
+        torch_threads: int = ENCODER_TORCH_THREADS,
+        max_pending: int = ENCODER_MAX_PENDING,
+        loader=None,
+    ):
+        cores = os.cpu_count() or 1
+        self.workers = max(1, workers)
+        self.torch_threads = torch_threads or max(1, cores // self.workers)
+        self.max_pending = max_pending or 4 * self.workers
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(loader or load_model, model_name, backend, self.torch_threads),
+        )
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self._calls = 0
+        self._in_flight = 0
+        self._wait_total = 0.0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return self._slots
+
+    async def encode_batch(self, texts: list[str]) -> np.ndarray:
+        queued_at = time.perf_counter()
+        async with self._semaphore():
+            self._wait_total += time.perf_counter() - queued_at
+            self._calls += 1
+            self._in_flight += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._pool, _encode_in_worker, texts
+                )
+            finally:
+                self._in_flight -= 1
+
+    async def encode(self, text: str) -> np.ndarray:
+        return (await self.encode_batch([text]))[0]
+
+    async def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "mode": "process",
+            "workers": self.workers,
+            "torch_threads": self.torch_threads,
+            "max_pending": self.max_pending,
+            "calls": self._calls,
+            "in_flight": self._in_flight,
+            "mean_slot_wait_ms": 1000 * self._wait_total / self._calls if self._calls else 0.0,
+        }
+
+
+class ShardedEmbedder:
+    """
+    Bulk document embedding for ingest, sharded across worker processes.
+
+    A call sorts its texts by length, cuts them into contiguous shards of
+    ``shard_size`` (so each worker's forward passes pad to similar
+    lengths) and encodes the shards in parallel on ``workers`` processes
+    set up like :class:`ProcessPoolEncoder`'s. Each shard's float32 rows
+    are written straight into one preallocated output array at their
+    original positions. Synchronous, so it drops into the ingest
+    pipeline's embed stage (which runs it in a thread).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = ENCODER_BACKEND,
+        workers: int = ENCODER_WORKERS,
+        shard_size: int = 64,
+        torch_threads: int = ENCODER_TORCH_THREADS,
+        loader=None,
+    ):
+        cores = os.cpu_count() or 1
+        self.workers = max(1, workers)
+        self.shard_size = max(1, shard_size)
+        self.torch_threads = torch_threads or max(1, cores // self.workers)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(loader or load_model, model_name, backend, self.torch_threads),
+        )
+        self._sentences = 0
+        self._seconds = 0.0
+
+    @property
+    def batch_size(self) -> int:
+        """Texts per call that keep every worker busy with two shards."""
+        return 2 * self.workers * self.shard_size
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        return self.encode(texts)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        started = time.perf_counter()
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        shards = [order[start:start + self.shard_size] for start in range(0, len(texts), self.shard_size)]
+        futures = [self._pool.submit(_encode_in_worker, [texts[i] for i in shard]) for shard in shards]
+
+        out = None
+        for shard, future in zip(shards, futures):
+            vectors = future.result()
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[shard] = vectors
+        if out is None:
+            out = np.empty((0, 0), dtype=np.float32)
+
+        self._sentences += len(texts)
+        self._seconds += time.perf_counter() - started
+        return out
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "torch_threads": self.torch_threads,
+            "shard_size": self.shard_size,
+            "sentences": self._sentences,
+            "seconds": self._seconds,
+            "sentences_per_sec": self._sentences / self._seconds if self._seconds else 0.0,
+        }
+
+
+def create_encoder(
+    model,
+    mode: str = ENCODER_MODE,
+    model_name: str | None = None,
+    backend: str = ENCODER_BACKEND,
+):
+    """
+    Wrap *model* in the execution strategy selected by *mode*.
+
+    "process" mode ignores *model* and loads *model_name* inside each
+    worker instead, so the API process does not need its own copy.
+    """
+    mode = (mode or "batch").lower()
+    if mode == "batch":
+        return BatchingEncoder(model)
+    if mode == "thread":
+        return ThreadEncoder(model)
+    if mode == "process":
+        return ProcessPoolEncoder(model_name, backend)
+    raise ValueError(f"Unknown ENCODER_MODE: {mode}")
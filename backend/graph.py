@@ -0,0 +1,278 @@
+"""
+backend/graph.py
+----------------
+Vectorised graph-link construction shared by the graph endpoints.
+
+All edge selection runs as NumPy array operations over the pairwise
+cosine matrix — no Python-level ``for i / for j`` loops:
+
+    - threshold edges   : upper-triangle pairs with score >= threshold
+    - top-k edges       : each node's k best neighbours (``argpartition``),
+                          optionally restricted to mutual neighbours
+    - hub edges         : every node linked to one central node
+    - orphan rescue     : isolated nodes linked to their row-wise ``argmax``
+    - delta links       : only the edges touching newly added nodes, from a
+                          rectangular new × (new + known) matrix
+    - link blocks       : threshold edges produced a block of rows at a
+                          time, for streaming responses
+
+Callers pick the sparsification strategy through :func:`build_links`
+keyword arguments. Passing ``k`` bounds the number of links each node
+contributes, which keeps large graphs readable and cheap to serialise.
+
+Usage:
+    from backend.graph import graph_links
+
+    links = graph_links(vectors, ids, threshold=0.65, k=10, rescue_orphans=True)
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Weight floor used for rescued orphan links so they stay visible
+ORPHAN_MIN_WEIGHT: float = 0.1
+
+
+def similarity_matrix(vectors) -> np.ndarray:
+    """Pairwise cosine similarity of the rows of *vectors* (float32)."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = matrix / norms
+    return unit @ unit.T
+
+
+def _unique_pairs(src: np.ndarray, dst: np.ndarray, n: int):
+    """Canonicalise (src, dst) to src < dst, drop duplicates, sort row-major."""
+    lo = np.minimum(src, dst).astype(np.int64)
+    hi = np.maximum(src, dst).astype(np.int64)
+    keys = np.unique(lo * n + hi)
+    return keys // n, keys % n
+
+
+def threshold_edges(sim: np.ndarray, threshold: float):
+    """All pairs i < j whose similarity is at least *threshold*."""
+    rows, cols = np.triu_indices(sim.shape[0], k=1)
+    keep = sim[rows, cols] >= threshold
+    return rows[keep], cols[keep]
+
+
+def top_k_edges(
+    sim: np.ndarray,
+    k: int,
+    threshold: Optional[float] = None,
+    mutual: bool = False,
+):
+    """
+    Each node's *k* most similar neighbours.
+
+    With ``mutual=True`` an edge is kept only if both endpoints rank each
+    other in their top k, which caps every node's degree at k.
+    """
+    n = sim.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    scores = sim.copy()
+    np.fill_diagonal(scores, -np.inf)
+    neighbours = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    src = np.repeat(np.arange(n), k)
+    dst = neighbours.ravel()
+
+    if threshold is not None:
+        keep = scores[src, dst] >= threshold
+        src, dst = src[keep], dst[keep]
+
+    if mutual:
+        chosen = np.zeros((n, n), dtype=bool)
+        chosen[src, dst] = True
+        keep = chosen[dst, src]
+        src, dst = src[keep], dst[keep]
+
+    return _unique_pairs(src, dst, n)
+
+
+def hub_edges(n: int, hub: int):
+    """Edges from every other node to *hub*."""
+    others = np.delete(np.arange(n), hub)
+    return _unique_pairs(np.full(others.size, hub), others, n)
+
+
+def rescue_orphan_edges(sim: np.ndarray, src: np.ndarray, dst: np.ndarray):
+    """Link every node without an edge to its most similar other node."""
+    n = sim.shape[0]
+    degree = np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+    orphans = np.flatnonzero(degree == 0)
+    if orphans.size == 0 or n < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    scores = sim[orphans].copy()
+    scores[np.arange(orphans.size), orphans] = -np.inf
+    best = np.argmax(scores, axis=1)
+    return _unique_pairs(orphans, best, n)
+
+
+def build_links(
+    sim: np.ndarray,
+    ids: Sequence[str],
+    threshold: Optional[float] = 0.5,
+    k: Optional[int] = None,
+    mutual: bool = False,
+    rescue_orphans: bool = False,
+    hub: Optional[int] = None,
+) -> list[dict]:
+    """
+    Select edges from a similarity matrix and format them as graph links.
+
+    Strategy:
+        - ``k`` unset : every pair scoring >= ``threshold``
+        - ``k`` set   : each node's top-k neighbours (>= ``threshold`` if given)
+        - ``hub``     : additionally link every node to ``ids[hub]``; those
+                        links carry ``isCentralLink: True``
+        - ``rescue_orphans`` : give each still-isolated node one link to
+                        its best match (weight floored at 0.1)
+    """
+    n = sim.shape[0]
+    if n < 2:
+        return []
+
+    if k is None:
+        src, dst = threshold_edges(sim, -np.inf if threshold is None else threshold)
+    else:
+        src, dst = top_k_edges(sim, k, threshold=threshold, mutual=mutual)
+
+    if hub is not None:
+        hub_src, hub_dst = hub_edges(n, hub)
+        src, dst = _unique_pairs(
+            np.concatenate([src, hub_src]), np.concatenate([dst, hub_dst]), n
+        )
+
+    weights = sim[src, dst]
+
+    if rescue_orphans:
+        o_src, o_dst = rescue_orphan_edges(sim, src, dst)
+        if o_src.size:
+            src = np.concatenate([src, o_src])
+            dst = np.concatenate([dst, o_dst])
+            weights = np.concatenate(
+                [weights, np.maximum(sim[o_src, o_dst], ORPHAN_MIN_WEIGHT)]
+            )
+
+    ids = list(ids)
+    weights = weights.astype(float).tolist()
+    if hub is None:
+        return [
+            {"source": ids[i], "target": ids[j], "value": w, "similarity": w}
+            for i, j, w in zip(src.tolist(), dst.tolist(), weights)
+        ]
+    return [
+        {
+            "source": ids[i],
+            "target": ids[j],
+            "value": w,
+            "similarity": w,
+            "isCentralLink": i == hub or j == hub,
+        }
+        for i, j, w in zip(src.tolist(), dst.tolist(), weights)
+    ]
+
+
+def graph_links(vectors, ids: Sequence[str], **strategy) -> list[dict]:
+    """Compute the similarity matrix for *vectors* and build links from it."""
+    if len(ids) < 2:
+        return []
+    return build_links(similarity_matrix(vectors), ids, **strategy)
+
+
+# Rows of the similarity matrix computed per streamed link batch
+LINK_BLOCK_ROWS: int = 64
+
+
+def iter_link_blocks(vectors, ids: Sequence[str], threshold: float, block_rows: int = LINK_BLOCK_ROWS):
+    """
+    Yield threshold links one block of source rows at a time.
+
+    Concatenated, the blocks hold the same pairs in the same order as
+    ``graph_links(vectors, ids, threshold=threshold)``, but only a
+    ``block_rows × n`` slice of the similarity matrix exists at once and
+    the first links are ready after one slice.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    n = len(ids)
+    if n < 2:
+        return
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = matrix / norms
+    ids = list(ids)
+
+    for start in range(0, n, block_rows):
+        sim = unit[start:start + block_rows] @ unit.T
+        rows, cols = np.nonzero(sim >= threshold)
+        keep = cols > rows + start
+        rows, cols = rows[keep], cols[keep]
+        weights = sim[rows, cols].astype(float).tolist()
+        yield [
+            {"source": ids[start + i], "target": ids[j], "value": w, "similarity": w}
+            for i, j, w in zip(rows.tolist(), cols.tolist(), weights)
+        ]
+
+
+def delta_links(
+    new_vectors,
+    new_ids: Sequence[str],
+    known_vectors,
+    known_ids: Sequence[str],
+    threshold: float,
+    hub_pairs: Sequence[tuple[str, str]] = (),
+) -> list[dict]:
+    """
+    Links for a graph expansion: every new–new and new–known pair scoring
+    >= *threshold*, plus every ``(seed, neighbour)`` *hub_pair*
+    (``isCentralLink: True``) — including a known seed's links to
+    neighbours already on screen. Other known–known pairs are never
+    computed, so the cost is ``len(new) × (len(new) + len(known))``.
+    """
+    m = len(new_ids)
+    ids = list(new_ids) + list(known_ids)
+    if not ids:
+        return []
+    unit = np.concatenate([
+        np.asarray(vectors, dtype=np.float32).reshape(len(group), -1)
+        for vectors, group in ((new_vectors, new_ids), (known_vectors, known_ids))
+        if len(group)
+    ])
+    norms = np.linalg.norm(unit, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = unit / norms
+    sim = unit[:m] @ unit.T
+
+    # cols > rows keeps new–new pairs once and every new–known pair
+    src, dst = np.nonzero(sim >= threshold)
+    keep = dst > src
+    src, dst = src[keep], dst[keep]
+
+    position = {mid: i for i, mid in enumerate(ids)}
+    hub_src, hub_dst = [], []
+    for seed, neighbour in hub_pairs:
+        a, b = position.get(seed), position.get(neighbour)
+        if a is None or b is None or a == b:
+            continue
+        hub_src.append(min(a, b))
+        hub_dst.append(max(a, b))
+
+    n = len(ids)
+    hub_keys = np.unique(np.array(hub_src, dtype=np.int64) * n + np.array(hub_dst, dtype=np.int64))
+    keys = np.union1d(src.astype(np.int64) * n + dst, hub_keys)
+    src, dst = keys // n, keys % n
+    central = np.isin(keys, hub_keys)
+    # Row-wise dot products: hub pairs between two known nodes are outside ``sim``
+    weights = np.einsum("ij,ij->i", unit[src], unit[dst]).astype(float).tolist()
+    return [
+        {"source": ids[i], "target": ids[j], "value": w, "similarity": w, "isCentralLink": c}
+        for i, j, w, c in zip(src.tolist(), dst.tolist(), weights, central.tolist())
+    ]
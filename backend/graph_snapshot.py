@@ -0,0 +1,167 @@
+"""
+backend/graph_snapshot.py
+-------------------------
+Versioned, pre-serialised snapshot of the ``/movies`` graph.
+
+The ``/movies`` payload (500 nodes + similarity links) only changes when
+the catalog is re-ingested, so it is built once — at startup, or on the
+first request — and kept in memory as orjson bytes together with an
+``ETag``. Requests then cost a header comparison and a memcpy:
+
+    - ``If-None-Match`` matching the ETag → ``304 Not Modified``
+    - otherwise the cached bytes are returned as-is
+
+Versioning:
+    - with a catalog snapshot, the version is a digest of the catalog
+      (ids + vectors + metadata), so the ETag is stable across restarts and
+      replicas serving the same catalog. ``backend/catalog_refresh.py``
+      calls :meth:`GraphSnapshotStore.invalidate` with the new version
+      once an ingest published one;
+    - without one (Pinecone only), the version is a digest of the
+      payload and the snapshot is rebuilt after ``GRAPH_SNAPSHOT_TTL``
+      seconds so re-ingests show up without a restart.
+
+:meth:`GraphSnapshotStore.invalidate` forces a rebuild on the next request.
+Wire-format variants (``format=compact``, ``fields=``; see
+``backend/wire.py``) are serialised on first use and cached alongside
+the default body, each with its own ETag.
+
+Usage:
+    snapshots = GraphSnapshotStore(build_movies_graph, version=catalog_version(catalog))
+    snapshot = await snapshots.get()
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        ...  # 304
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from backend.catalog import Catalog
+from backend.wire import dumps, graph_payload, parse_fields
+
+GRAPH_SNAPSHOT_TTL: int = int(os.getenv("GRAPH_SNAPSHOT_TTL", "3600"))
+GRAPH_CACHE_MAX_AGE: int = int(os.getenv("GRAPH_CACHE_MAX_AGE", "300"))
+MAX_VARIANTS: int = 32             # cached format/fields combinations per snapshot
+
+
+@dataclass(frozen=True)
+class GraphSnapshot:
+    version: str
+    body: bytes
+    etag: str
+    built_at: float
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={GRAPH_CACHE_MAX_AGE}, must-revalidate",
+        }
+
+
+def _rows_digest(catalog: Catalog):
+    digest = hashlib.sha256()
+    digest.update("\n".join(catalog.ids).encode("utf-8"))
+    digest.update(np.ascontiguousarray(catalog.vectors).tobytes())
+    return digest
+
+
+def catalog_version(catalog: Catalog) -> str:
+    """
+    Short content digest of a catalog (ids + vectors + metadata) — read
+    from its ``artifact.json`` when present, so startup doesn't touch
+    every page.
+    """
+    if catalog.version:
+        return catalog.version
+    digest = _rows_digest(catalog)
+    digest.update(json.dumps(catalog.metadata).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def catalog_rows_version(catalog: Catalog) -> str:
+    """Digest of the catalog's ids + vectors only (unchanged by metadata refreshes)."""
+    if catalog.rows_version:
+        return catalog.rows_version
+    return _rows_digest(catalog).hexdigest()[:16]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison of an ``If-None-Match`` header against *etag*."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+class GraphSnapshotStore:
+    """Holds the current snapshot and rebuilds it (once, under a lock) when stale."""
+
+    def __init__(
+        self,
+        builder: Callable[[], Awaitable[dict]],
+        version: Optional[str] = None,
+        ttl: float = GRAPH_SNAPSHOT_TTL,
+    ):
+        self.builder = builder
+        self.version = version
+        self.ttl = ttl
+        self.current: Optional[GraphSnapshot] = None
+        self._payload: Optional[dict] = None
+        self._variants: dict[tuple, GraphSnapshot] = {}
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        if self.current is None:
+            return False
+        if self.version is not None:
+            return self.current.version == self.version
+        return time.time() - self.current.built_at < self.ttl
+
+    def invalidate(self, version: Optional[str] = None) -> None:
+        """Drop the snapshot; *version* replaces the catalog version if given."""
+        if version is not None:
+            self.version = version
+        self.current = None
+
+    async def get(self, format: str = "full", fields: Optional[str] = None) -> GraphSnapshot:
+        """Return the snapshot body in the requested wire format."""
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():  # another request may have rebuilt it meanwhile
+                    version = self.version   # a catalog swap mid-build must not stamp it
+                    self._rebuild(await self.builder(), version)
+
+        key = (format, parse_fields(fields))
+        if key == ("full", None):
+            return self.current
+        variant = self._variants.get(key)
+        if variant is None or variant.built_at != self.current.built_at:
+            body = dumps(graph_payload(self._payload, format, fields))
+            tag = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:8]
+            variant = GraphSnapshot(
+                version=self.current.version,
+                body=body,
+                etag=f'"{self.current.version}-{tag}"',
+                built_at=self.current.built_at,
+            )
+            if len(self._variants) >= MAX_VARIANTS:
+                self._variants.clear()
+            self._variants[key] = variant
+        return variant
+
+    def _rebuild(self, payload: dict, version: Optional[str]) -> None:
+        body = dumps(payload)
+        version = version or hashlib.sha256(body).hexdigest()[:16]
+        self._payload = payload
+        self._variants.clear()
+        self.current = GraphSnapshot(version=version, body=body, etag=f'"{version}"', built_at=time.time())
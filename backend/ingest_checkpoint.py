@@ -0,0 +1,204 @@
+"""
+backend/ingest_checkpoint.py
+----------------------------
+On-disk staging that makes ``scripts/bulk_ingest.py`` resumable.
+
+Without it a crash or a Pinecone outage at vector 8,000 threw away every
+fetched page and every embedding, and upserts that kept failing were
+only logged. With a checkpoint directory (``INGEST_CHECKPOINT_DIR``)
+the pipeline (``backend/ingest_pipeline.py``) stages each step as it
+completes:
+
+    records.jsonl         every fetched record (id, text to embed,
+                          metadata), appended as fetched
+    shards/000042.npy     float32 embeddings of one embedding batch
+    shards/000042.json    ids + metadata of that batch (written last, so
+                          its presence marks a complete shard)
+    upserted.log          "<shard> <start> <stop>" per upserted row range
+
+A rerun opens the same directory and
+
+    - re-queues shard rows missing from ``upserted.log`` (dropped or
+      in-flight batches) straight to the upsert stage,
+    - re-embeds records that were fetched but never made it into a shard,
+    - skips every staged id when fetching more from TMDB.
+
+Appends are flushed line by line; a torn last line (crash mid-write) is
+ignored on load. :meth:`IngestCheckpoint.write_catalog` assembles the
+local catalog snapshot from the shards one at a time, and
+:meth:`IngestCheckpoint.clear` removes the directory once a run finished
+with nothing left to upsert.
+
+Usage:
+    checkpoint = IngestCheckpoint(INGEST_CHECKPOINT_DIR)
+    stats = await run_pipeline(items, embed, upsert, checkpoint=checkpoint)
+    if not checkpoint.pending_rows():
+        checkpoint.clear()
+"""
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from backend.catalog import CATALOG_DIR, CatalogWriter, replace_file
+
+logger = logging.getLogger(__name__)
+
+INGEST_CHECKPOINT_DIR: str = os.getenv(
+    "INGEST_CHECKPOINT_DIR",
+    str(Path(__file__).resolve().parent.parent / "data" / "ingest_checkpoint"),
+)
+
+RECORDS_FILE = "records.jsonl"
+SHARDS_DIR = "shards"
+UPSERTED_FILE = "upserted.log"
+
+
+def _read_lines(path: Path) -> Iterator[str]:
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.endswith("\n"):  # an unterminated (torn) last line is dropped
+                yield line.rstrip("\n")
+
+
+def _open_log(path: Path):
+    """Open *path* for appending, terminating a torn last line first."""
+    log = open(path, "a+", encoding="utf-8")
+    if log.tell():
+        log.seek(log.tell() - 1)
+        if log.read(1) != "\n":
+            log.write("\n")
+    return log
+
+
+class IngestCheckpoint:
+    """Staged records, embedding shards and upsert progress of one ingest run."""
+
+    def __init__(self, path=INGEST_CHECKPOINT_DIR):
+        self.path = Path(path)
+        self.shards_dir = self.path / SHARDS_DIR
+        self.shards_dir.mkdir(parents=True, exist_ok=True)
+
+        # Only ids stay in memory; records are re-read from disk when replayed
+        self.record_ids: set[str] = {record["id"] for record in self.iter_records()}
+
+        self.shards: dict[str, list[str]] = {}      # shard name → ids
+        for marker in sorted(self.shards_dir.glob("*.json")):
+            if (self.shards_dir / f"{marker.stem}.npy").exists():
+                self.shards[marker.stem] = json.loads(marker.read_text(encoding="utf-8"))["ids"]
+        self.embedded_ids = {mid for ids in self.shards.values() for mid in ids}
+
+        self.upserted: dict[str, np.ndarray] = {
+            name: np.zeros(len(ids), dtype=bool) for name, ids in self.shards.items()
+        }
+        for line in _read_lines(self.path / UPSERTED_FILE):
+            try:
+                name, start, stop = line.split()
+                self.upserted[name][int(start):int(stop)] = True
+            except (KeyError, ValueError):  # torn by a crash, or an unfinished shard
+                continue
+
+        self._records_log = _open_log(self.path / RECORDS_FILE)
+        self._upserted_log = _open_log(self.path / UPSERTED_FILE)
+        self._next_shard = 1 + max((int(name) for name in self.shards), default=-1)
+
+    def iter_records(self) -> Iterator[dict]:
+        """Every staged record, in fetch order."""
+        for line in _read_lines(self.path / RECORDS_FILE):
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+    @property
+    def known_ids(self) -> set[str]:
+        """Every id already staged (fetched or embedded)."""
+        return self.record_ids | self.embedded_ids
+
+    def has(self, movie_id: str) -> bool:
+        return movie_id in self.record_ids or movie_id in self.embedded_ids
+
+    def record(self, record: dict) -> None:
+        """Stage one fetched record (``id``, ``text``, ``metadata``)."""
+        self.record_ids.add(record["id"])
+        self._records_log.write(json.dumps(record) + "\n")
+        self._records_log.flush()
+
+    def unembedded_records(self) -> Iterator[dict]:
+        """Records fetched by an earlier run that never reached a shard."""
+        embedded = set(self.embedded_ids)
+        for record in self.iter_records():
+            if record["id"] not in embedded:
+                embedded.add(record["id"])
+                yield record
+
+    def write_shard(self, ids: list[str], vectors: np.ndarray, metadata: list[dict]) -> str:
+        """Persist one embedded batch; returns the shard name."""
+        name = f"{self._next_shard:06d}"
+        self._next_shard += 1
+        replace_file(self.shards_dir / f"{name}.npy",
+                     lambda f: np.save(f, np.asarray(vectors, dtype=np.float32)))
+        replace_file(self.shards_dir / f"{name}.json",
+                     lambda f: f.write(json.dumps({"ids": ids, "metadata": metadata}).encode("utf-8")))
+        self.shards[name] = list(ids)
+        self.embedded_ids.update(ids)
+        self.upserted[name] = np.zeros(len(ids), dtype=bool)
+        return name
+
+    def load_shard(self, name: str) -> tuple[list[str], np.ndarray, list[dict]]:
+        body = json.loads((self.shards_dir / f"{name}.json").read_text(encoding="utf-8"))
+        vectors = np.load(self.shards_dir / f"{name}.npy", mmap_mode="r")
+        return body["ids"], vectors, body["metadata"]
+
+    def mark_upserted(self, name: str, start: int, stop: int) -> None:
+        self.upserted[name][start:stop] = True
+        self._upserted_log.write(f"{name} {start} {stop}\n")
+        self._upserted_log.flush()
+
+    def pending_rows(self) -> int:
+        """Embedded rows not upserted yet."""
+        return int(sum((~done).sum() for done in self.upserted.values()))
+
+    def pending_chunks(self, chunk_size: int) -> Iterator[tuple[str, int, int]]:
+        """``(shard, start, stop)`` runs of un-upserted rows, at most *chunk_size* long."""
+        for name, done in self.upserted.items():
+            start = None
+            for row in range(len(done) + 1):
+                if row < len(done) and not done[row]:
+                    if start is None:
+                        start = row
+                    if row + 1 - start < chunk_size:
+                        continue
+                    yield name, start, row + 1
+                    start = None
+                elif start is not None:
+                    yield name, start, row
+                    start = None
+
+    def write_catalog(self, path=CATALOG_DIR) -> int:
+        """Publish every shard as the local catalog snapshot; returns the row count."""
+        writer = CatalogWriter(path)
+        for name in self.shards:
+            ids, vectors, metadata = self.load_shard(name)
+            writer.append(ids, vectors, metadata)
+        if not writer.rows:
+            writer.discard()
+            return 0
+        writer.commit()
+        return writer.rows
+
+    def close(self) -> None:
+        self._records_log.close()
+        self._upserted_log.close()
+
+    def clear(self) -> None:
+        """Delete the checkpoint directory (after a fully successful run)."""
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,106 @@
+"""
+backend/ingest_manifest.py
+--------------------------
+Content-hash manifest that lets ``scripts/bulk_ingest.py --incremental``
+touch only what changed.
+
+For every ingested movie the manifest keeps two short digests:
+
+    text hash      of the embedding text, f"{title} ({genres}): {overview}"
+    metadata hash  of the metadata dict stored next to the vector
+
+A refreshed TMDB record is then classified as
+
+    - NEW        id not in the manifest → embed + upsert
+    - TEXT       embedding text changed → re-embed + upsert
+    - METADATA   only metadata drifted (rating, popularity, …) →
+                 metadata-only update, no embedding
+    - UNCHANGED  nothing to send
+
+The manifest lives next to the catalog snapshot (``manifest.json``) and
+is written by every full and incremental run. A catalog written before
+manifests existed is bootstrapped with :meth:`IngestManifest.from_catalog`;
+its overviews are truncated, so long ones re-embed once.
+
+Usage:
+    manifest = IngestManifest.load(CATALOG_DIR) or IngestManifest.from_catalog(catalog)
+    kind = manifest.classify(item.id, item.text, item.metadata)
+"""
+
+import hashlib
+import json
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+from backend.catalog import Catalog, replace_file
+
+MANIFEST_FILE = "manifest.json"
+
+NEW = "new"
+TEXT = "text"
+METADATA = "metadata"
+UNCHANGED = "unchanged"
+
+
+def embedding_text(title: str, genres: str, overview: str) -> str:
+    """The text a movie is embedded from (shared by full and incremental ingest)."""
+    return f"{title} ({genres}): {overview}"
+
+
+def content_hash(value) -> str:
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class IngestManifest:
+    """``movie id → (text hash, metadata hash)`` plus the date of the last run."""
+
+    def __init__(self, movies: Optional[dict[str, list[str]]] = None, updated: Optional[str] = None):
+        self.movies = movies or {}
+        self.updated = updated
+
+    def __len__(self) -> int:
+        return len(self.movies)
+
+    @property
+    def updated_on(self) -> Optional[date]:
+        return date.fromisoformat(self.updated) if self.updated else None
+
+    @classmethod
+    def load(cls, path) -> Optional["IngestManifest"]:
+        target = Path(path) / MANIFEST_FILE
+        if not target.exists():
+            return None
+        body = json.loads(target.read_text(encoding="utf-8"))
+        return cls(body.get("movies", {}), body.get("updated"))
+
+    @classmethod
+    def from_catalog(cls, catalog: Catalog) -> "IngestManifest":
+        manifest = cls()
+        for mid, meta in zip(catalog.ids, catalog.metadata):
+            text = embedding_text(meta.get("title", ""), meta.get("genres", ""), meta.get("overview", ""))
+            manifest.record(mid, text, meta)
+        return manifest
+
+    def classify(self, movie_id: str, text: str, metadata: dict) -> str:
+        known = self.movies.get(movie_id)
+        if known is None:
+            return NEW
+        if known[0] != content_hash(text):
+            return TEXT
+        if known[1] != content_hash(metadata):
+            return METADATA
+        return UNCHANGED
+
+    def record(self, movie_id: str, text: str, metadata: dict) -> None:
+        self.movies[movie_id] = [content_hash(text), content_hash(metadata)]
+
+    def save(self, path, updated: Optional[date] = None) -> Path:
+        self.updated = (updated or date.today()).isoformat()
+        target = Path(path)
+        target.mkdir(parents=True, exist_ok=True)
+        body = {"updated": self.updated, "movies": self.movies}
+        replace_file(target / MANIFEST_FILE, lambda f: f.write(json.dumps(body).encode("utf-8")))
+        return target / MANIFEST_FILE
@@ -0,0 +1,271 @@
+"""
+backend/ingest_pipeline.py
+--------------------------
+Streaming fetch → embed → upsert pipeline for ``scripts/bulk_ingest.py``.
+
+Bulk ingest used to run in phases — fetch every movie, then embed them
+all, then upsert them one batch at a time — so network and CPU never
+overlapped and the whole catalog (plus its embeddings as Python lists)
+sat in memory. :func:`run_pipeline` connects three stages with bounded
+queues instead:
+
+    fetch ──▶ [embed queue] ──▶ embed ──▶ [upsert queue] ──▶ upsert × N
+
+    - fetch  : drains an async iterator of :class:`IngestItem` (the TMDB
+               fetcher) into embedding batches
+    - embed  : runs the model in a worker thread (torch and ONNX Runtime
+               release the GIL) so pages keep arriving meanwhile — or,
+               via ``encoder.ShardedEmbedder``, across
+               ``INGEST_EMBED_WORKERS`` processes; each embedded batch
+               goes to the optional ``sink`` and is split into upsert
+               batches
+    - upsert : ``INGEST_UPSERT_WORKERS`` concurrent ``upsert`` calls
+
+Each queue holds at most ``INGEST_QUEUE_DEPTH`` batches, so a slow stage
+back-pressures the ones before it and memory stays flat however many
+movies are ingested. Every stage keeps a :class:`StageStats` (items,
+busy time, time blocked on a full downstream queue), which tells which
+stage is the bottleneck.
+
+With a ``checkpoint`` (``backend/ingest_checkpoint.py``) every fetched
+item, embedded batch and upserted range is staged on disk, and a run
+first replays what an earlier one left behind: un-upserted rows go
+straight to the upsert stage (alongside new work) and fetched but
+unembedded items are embedded before the source is read.
+
+Usage:
+    stats = await run_pipeline(items, embed=model.encode, upsert=index.aupsert, sink=writer.append)
+    print(stats.report())
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import numpy as np
+
+from backend.ingest_checkpoint import IngestCheckpoint
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE: int = 256
+INGEST_EMBED_WORKERS: int = int(os.getenv("INGEST_EMBED_WORKERS", str(os.cpu_count() or 1)))
+INGEST_SHARD_SIZE: int = int(os.getenv("INGEST_SHARD_SIZE", "64"))   # texts per worker call
+UPSERT_BATCH_SIZE: int = 100
+INGEST_UPSERT_WORKERS: int = int(os.getenv("INGEST_UPSERT_WORKERS", "4"))
+INGEST_QUEUE_DEPTH: int = int(os.getenv("INGEST_QUEUE_DEPTH", "4"))   # batches per queue
+MAX_RETRIES: int = 3
+RETRY_DELAY: float = 2.0           # seconds, doubled per attempt
+
+_FAILED = object()
+
+
+@dataclass
+class IngestItem:
+    id: str
+    text: str          # what gets embedded
+    metadata: dict     # stored next to the vector
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    batches: int = 0
+    failed: int = 0
+    busy: float = 0.0       # seconds spent doing the stage's work
+    blocked: float = 0.0    # seconds waiting for room in the downstream queue
+    started: float = 0.0
+    finished: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return max(0.0, self.finished - self.started)
+
+    @property
+    def rate(self) -> float:
+        """Items per second over the stage's lifetime."""
+        return self.items / self.elapsed if self.elapsed else 0.0
+
+    def line(self) -> str:
+        return (
+            f"{self.name:<7} {self.items:>7} items  {self.rate:>8.1f}/s  "
+            f"busy {self.busy:6.1f}s  blocked {self.blocked:6.1f}s  failed {self.failed}"
+        )
+
+
+@dataclass
+class PipelineStats:
+    fetch: StageStats = field(default_factory=lambda: StageStats("fetch"))
+    embed: StageStats = field(default_factory=lambda: StageStats("embed"))
+    upsert: StageStats = field(default_factory=lambda: StageStats("upsert"))
+    resumed_records: int = 0    # items re-embedded from a checkpoint
+    resumed_vectors: int = 0    # rows re-upserted from a checkpoint
+
+    def report(self) -> str:
+        lines = [stage.line() for stage in (self.fetch, self.embed, self.upsert)]
+        if self.resumed_records or self.resumed_vectors:
+            lines.append(
+                f"resumed {self.resumed_records} staged records, {self.resumed_vectors} staged vectors"
+            )
+        return "\n".join(lines)
+
+
+async def _put(queue: asyncio.Queue, batch, stage: StageStats) -> None:
+    started = time.perf_counter()
+    await queue.put(batch)
+    stage.blocked += time.perf_counter() - started
+
+
+async def _attempt(call: Callable[[], Awaitable], what: str, max_retries: int, retry_delay: float):
+    """Await ``call()`` with exponential back-off; ``_FAILED`` once every attempt failed."""
+    for attempt in range(1, max_retries + 1):
+        try:
+            return await call()
+        except Exception as exc:
+            logger.warning("%s failed (attempt %d/%d): %s", what, attempt, max_retries, exc)
+            if attempt < max_retries:
+                await asyncio.sleep(retry_delay * 2 ** (attempt - 1))
+    return _FAILED
+
+
+async def run_pipeline(
+    source: AsyncIterator[IngestItem],
+    embed: Callable[[list[str]], np.ndarray],
+    upsert: Callable[[list[dict]], Awaitable],
+    sink: Optional[Callable[[list[str], np.ndarray, list[dict]], None]] = None,
+    checkpoint: Optional[IngestCheckpoint] = None,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    upsert_batch_size: int = UPSERT_BATCH_SIZE,
+    upsert_workers: int = INGEST_UPSERT_WORKERS,
+    queue_depth: int = INGEST_QUEUE_DEPTH,
+    max_retries: int = MAX_RETRIES,
+    retry_delay: float = RETRY_DELAY,
+) -> PipelineStats:
+    """
+    Stream *source* through ``embed`` (sync, run in a thread) and
+    ``upsert`` (async). Batches that still fail after *max_retries* are
+    dropped and counted in the stage's ``failed`` (and, with a
+    *checkpoint*, retried by the next run); an exception from *source*
+    or *sink* aborts the run.
+    """
+    stats = PipelineStats()
+    upsert_workers = max(1, upsert_workers)
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_depth))
+    upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_depth))
+    # Listed before any new shard is written, so only earlier runs' rows replay
+    replay = list(checkpoint.pending_chunks(upsert_batch_size)) if checkpoint else []
+    replayed = asyncio.Event()
+
+    async def staged(items: AsyncIterator[IngestItem]) -> AsyncIterator[IngestItem]:
+        for record in checkpoint.unembedded_records():
+            stats.resumed_records += 1
+            yield IngestItem(**record)
+        async for item in items:
+            if checkpoint.has(item.id):
+                continue
+            checkpoint.record(asdict(item))
+            yield item
+
+    async def fetch_stage() -> None:
+        stage = stats.fetch
+        stage.started = time.perf_counter()
+        batch: list[IngestItem] = []
+        iterator = (staged(source) if checkpoint else source).__aiter__()
+        while True:
+            started = time.perf_counter()
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                stage.busy += time.perf_counter() - started
+            batch.append(item)
+            stage.items += 1
+            if len(batch) >= embed_batch_size:
+                stage.batches += 1
+                await _put(embed_queue, batch, stage)
+                batch = []
+        if batch:
+            stage.batches += 1
+            await _put(embed_queue, batch, stage)
+        await embed_queue.put(None)
+        stage.finished = time.perf_counter()
+
+    async def embed_stage() -> None:
+        stage = stats.embed
+        stage.started = time.perf_counter()
+        while (batch := await embed_queue.get()) is not None:
+            texts = [item.text for item in batch]
+            started = time.perf_counter()
+            vectors = await _attempt(
+                lambda: asyncio.to_thread(embed, texts), "Embedding", max_retries, retry_delay
+            )
+            stage.busy += time.perf_counter() - started
+            if vectors is _FAILED:
+                stage.failed += len(batch)
+                continue
+            vectors = np.asarray(vectors, dtype=np.float32)
+            stage.items += len(batch)
+            stage.batches += 1
+            ids = [item.id for item in batch]
+            metadata = [item.metadata for item in batch]
+            shard = checkpoint.write_shard(ids, vectors, metadata) if checkpoint else None
+            if sink is not None:
+                sink(ids, vectors, metadata)
+            for start in range(0, len(batch), upsert_batch_size):
+                stop = min(start + upsert_batch_size, len(batch))
+                chunk = [
+                    {"id": ids[row], "values": vectors[row], "metadata": metadata[row]}
+                    for row in range(start, stop)
+                ]
+                await _put(upsert_queue, ((shard, start, stop) if shard else None, chunk), stage)
+        await replayed.wait()
+        for _ in range(upsert_workers):
+            await upsert_queue.put(None)
+        stage.finished = time.perf_counter()
+
+    async def replay_stage() -> None:
+        loaded = (None, None)
+        for shard, start, stop in replay:
+            if loaded[0] != shard:
+                loaded = (shard, checkpoint.load_shard(shard))
+            ids, vectors, metadata = loaded[1]
+            chunk = [
+                {"id": ids[row], "values": np.array(vectors[row]), "metadata": metadata[row]}
+                for row in range(start, stop)
+            ]
+            stats.resumed_vectors += len(chunk)
+            await upsert_queue.put(((shard, start, stop), chunk))
+        replayed.set()
+
+    async def upsert_stage() -> None:
+        stage = stats.upsert
+        stage.started = stage.started or time.perf_counter()
+        while (entry := await upsert_queue.get()) is not None:
+            rows, chunk = entry
+            started = time.perf_counter()
+            done = await _attempt(lambda: upsert(chunk), "Upsert", max_retries, retry_delay)
+            stage.busy += time.perf_counter() - started
+            if done is _FAILED:
+                stage.failed += len(chunk)
+                continue
+            if rows is not None:
+                checkpoint.mark_upserted(*rows)
+            stage.items += len(chunk)
+            stage.batches += 1
+        stage.finished = max(stage.finished, time.perf_counter())
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(fetch_stage())
+            group.create_task(embed_stage())
+            group.create_task(replay_stage())
+            for _ in range(upsert_workers):
+                group.create_task(upsert_stage())
+    except ExceptionGroup as errors:
+        raise errors.exceptions[0] from None
+    return stats
@@ -0,0 +1,227 @@
+"""
+backend/knn_graph.py
+--------------------
+Precomputed catalog-wide k-nearest-neighbour graph.
+
+``scripts/build_knn_graph.py`` computes, for every movie in the catalog
+snapshot, its top-K neighbours and the strong cross-edges among them,
+and stores the result as a compact adjacency structure next to the
+snapshot:
+
+    knn/neighbors.npy     int32   (n, K)  neighbour rows, best first
+    knn/scores.npy        float32 (n, K)  cosine similarity to the seed
+    knn/edge_offsets.npy  int64   (n + 1) CSR offsets into the edge arrays
+    knn/edge_pairs.npy    uint8   (E, 2)  neighbourhood-local endpoints
+                                          (0 = seed, 1..K = neighbours)
+    knn/edge_scores.npy   float32 (E,)    cross-edge similarity
+    knn/meta.json         {"k", "threshold", "count", "rows_version"}
+
+``/engine/similar/{movie_id}`` then becomes a constant-time lookup: one
+row of ``neighbors``/``scores`` plus one CSR slice of edges.
+
+Neighbours are stored as catalog row numbers, so a graph is only valid
+for the exact rows it was built from: ``meta.json`` records the
+snapshot's ``catalog_rows_version`` (ids + vectors, so metadata-only
+refreshes keep the graph) and :func:`load_knn_graph` rejects the graph
+for any other.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from backend.catalog import CATALOG_DIR, Catalog, load_catalog
+from backend.graph_snapshot import catalog_rows_version
+from backend.vector_store import Match
+
+logger = logging.getLogger(__name__)
+
+KNN_DIR = "knn"
+DEFAULT_K: int = 30            # neighbours per movie (seed excluded)
+DEFAULT_THRESHOLD: float = 0.75  # minimum cross-edge similarity
+BLOCK_SIZE: int = 1024         # rows per similarity block while building
+
+
+def build_knn_arrays(
+    vectors: np.ndarray,
+    k: int = DEFAULT_K,
+    threshold: float = DEFAULT_THRESHOLD,
+    block_size: int = BLOCK_SIZE,
+) -> dict[str, np.ndarray]:
+    """
+    Compute the kNN adjacency for L2-normalised *vectors*.
+
+    Similarities are computed in row blocks so peak memory stays at
+    ``block_size × n`` floats instead of the full n × n matrix.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    n = vectors.shape[0]
+    k = max(0, min(k, n - 1))
+    if k > 255:
+        raise ValueError("k must fit the uint8 neighbourhood-local edge encoding")
+
+    if k == 0:
+        return {
+            "neighbors": np.empty((n, 0), dtype=np.int32),
+            "scores": np.empty((n, 0), dtype=np.float32),
+            "edge_offsets": np.zeros(n + 1, dtype=np.int64),
+            "edge_pairs": np.empty((0, 2), dtype=np.uint8),
+            "edge_scores": np.empty(0, dtype=np.float32),
+        }
+
+    neighbors = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    edge_counts = np.zeros(n, dtype=np.int64)
+    pair_blocks, score_blocks = [], []
+
+    # Local (seed excluded) upper-triangle positions within a neighbourhood
+    iu, ju = np.triu_indices(k, k=1)
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        sims = vectors[start:end] @ vectors.T
+        sims[np.arange(end - start), np.arange(start, end)] = -np.inf
+
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(sims, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind="stable")
+        block_neighbors = np.take_along_axis(part, order, axis=1)
+        neighbors[start:end] = block_neighbors
+        scores[start:end] = np.take_along_axis(part_scores, order, axis=1)
+
+        # Cross-similarity among each seed's neighbours: (b, k, d) @ (b, d, k)
+        members = vectors[block_neighbors]
+        cross = np.einsum("bid,bjd->bij", members, members)[:, iu, ju]
+        keep = cross >= threshold
+        edge_counts[start:end] = keep.sum(axis=1)
+        rows, cols = np.nonzero(keep)
+        pair_blocks.append(np.stack([iu[cols] + 1, ju[cols] + 1], axis=1).astype(np.uint8))
+        score_blocks.append(cross[rows, cols].astype(np.float32))
+
+    return {
+        "neighbors": neighbors,
+        "scores": scores,
+        "edge_offsets": np.concatenate(([0], np.cumsum(edge_counts))).astype(np.int64),
+        "edge_pairs": np.concatenate(pair_blocks),
+        "edge_scores": np.concatenate(score_blocks),
+    }
+
+
+def write_knn_graph(
+    catalog_dir,
+    catalog: Catalog,
+    k: int = DEFAULT_K,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> Path:
+    """Build the kNN graph for *catalog* and store it under ``catalog_dir/knn``."""
+    target = Path(catalog_dir) / KNN_DIR
+    target.mkdir(parents=True, exist_ok=True)
+    arrays = build_knn_arrays(catalog.vectors, k=k, threshold=threshold)
+    for name, array in arrays.items():
+        np.save(target / f"{name}.npy", array)
+    (target / "meta.json").write_text(json.dumps({
+        "k": int(arrays["neighbors"].shape[1]),
+        "threshold": threshold,
+        "count": len(catalog),
+        "rows_version": catalog_rows_version(catalog),
+    }))
+    return target
+
+
+class KnnGraph:
+    """Read-only neighbourhood lookups over a precomputed kNN graph."""
+
+    def __init__(self, catalog: Catalog, arrays: dict[str, np.ndarray], threshold: float):
+        self.catalog = catalog
+        self.threshold = threshold
+        self.neighbors = arrays["neighbors"]
+        self.scores = arrays["scores"]
+        self.edge_offsets = arrays["edge_offsets"]
+        self.edge_pairs = arrays["edge_pairs"]
+        self.edge_scores = arrays["edge_scores"]
+        self.k = self.neighbors.shape[1]      # neighbours stored per movie
+
+    def __contains__(self, movie_id: str) -> bool:
+        return self.catalog.row_of(movie_id) is not None
+
+    def neighborhood(self, movie_id: str) -> Optional[tuple[list[Match], list[dict]]]:
+        """
+        Return ``(matches, links)`` for *movie_id*, or ``None`` if unknown.
+
+        ``matches`` starts with the seed (score 1.0) followed by its
+        neighbours, best first. Links connect the seed to every
+        neighbour (``isCentralLink``) plus the precomputed cross-edges.
+        """
+        row = self.catalog.row_of(movie_id)
+        if row is None:
+            return None
+
+        rows = [row] + self.neighbors[row].tolist()
+        weights = [1.0] + self.scores[row].astype(float).tolist()
+        ids = [self.catalog.ids[r] for r in rows]
+        matches = [
+            Match(id=ids[pos], score=weights[pos], metadata=self.catalog.metadata[r])
+            for pos, r in enumerate(rows)
+        ]
+
+        links = [
+            {
+                "source": movie_id,
+                "target": ids[pos],
+                "value": weights[pos],
+                "similarity": weights[pos],
+                "isCentralLink": True,
+            }
+            for pos in range(1, len(ids))
+        ]
+        lo, hi = self.edge_offsets[row], self.edge_offsets[row + 1]
+        for (a, b), score in zip(
+            self.edge_pairs[lo:hi].tolist(), self.edge_scores[lo:hi].astype(float).tolist()
+        ):
+            links.append({
+                "source": ids[a],
+                "target": ids[b],
+                "value": score,
+                "similarity": score,
+                "isCentralLink": False,
+            })
+        return matches, links
+
+
+def load_knn_graph(catalog_dir=CATALOG_DIR, catalog: Optional[Catalog] = None) -> Optional[KnnGraph]:
+    """
+    Load the kNN graph stored next to a catalog snapshot.
+
+    Returns ``None`` if no graph has been built, or if it was built for a
+    different snapshot (row count or rows version mismatch) — callers
+    then fall back to live vector queries.
+    """
+    source = Path(catalog_dir) / KNN_DIR
+    meta_path = source / "meta.json"
+    if not meta_path.exists():
+        return None
+
+    meta = json.loads(meta_path.read_text())
+    catalog = catalog or load_catalog(catalog_dir)
+    if meta.get("count") != len(catalog):
+        logger.warning(
+            "Ignoring stale kNN graph (%s rows) for catalog of %d rows",
+            meta.get("count"), len(catalog),
+        )
+        return None
+    version = catalog_rows_version(catalog)
+    if meta.get("rows_version") != version:
+        logger.warning(
+            "Ignoring stale kNN graph (rows %s) for catalog rows %s",
+            meta.get("rows_version"), version,
+        )
+        return None
+
+    arrays = {
+        name: np.load(source / f"{name}.npy", mmap_mode="r")
+        for name in ("neighbors", "scores", "edge_offsets", "edge_pairs", "edge_scores")
+    }
+    return KnnGraph(catalog, arrays, threshold=meta.get("threshold", DEFAULT_THRESHOLD))
@@ -1,28 +1,68 @@
 import os
 import asyncio
-import numpy as np
 import json
-from sklearn.metrics.pairwise import cosine_similarity
-from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Depends
-from backend.dependencies import rate_limiter, get_model, get_index, get_current_user
+from contextlib import asynccontextmanager
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Depends, Request, Response
+from backend.dependencies import (
+    rate_limiter, get_encoder, get_index, get_knn_graph, get_metadata_store,
+    get_vector_mirror, get_embedding_cache, get_semantic_cache, get_graph_snapshots,
+    get_current_user
+)
+from backend.embedding_cache import EmbeddingCache
+from backend.encoder import ENCODER_BACKEND, ENCODER_MODE, create_encoder, load_model
+from backend.vector_store import VECTOR_BACKEND, LocalVectorStore, open_vector_store
+from backend.knn_graph import load_knn_graph
+from backend.catalog import CATALOG_DIR, catalog_exists, load_catalog
+from backend.catalog_refresh import CatalogRefresher
+from backend.metadata_store import SORT_FIELDS, MetadataStore
 from backend.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from backend.models import Watchlist, RecommendationState, MovieMetadata
-from backend.cache import get_cached_search, set_cached_search
+from backend.models import RecommendationState
+from backend.watchlist import (
+    MAX_WATCHLIST_BATCH, MAX_WATCHLIST_PAGE_SIZE, WATCHLIST_PAGE_SIZE,
+    add_statement as watchlist_add_statement, decode_cursor as decode_watchlist_cursor,
+    page_payload as watchlist_page_payload, page_query as watchlist_page_query,
+    remove_statement as watchlist_remove_statement,
+)
+from backend.cache import SemanticCache, get_cached_search
+from backend.graph import delta_links, graph_links, iter_link_blocks
+from backend.graph_snapshot import GraphSnapshotStore, catalog_version, etag_matches
+from backend.wire import (
+    NDJSON_MEDIA_TYPE, dumps, graph_payload, graph_response, links_record, ndjson, nodes_record
+)
+from backend.vector_mirror import VectorMirror, resolve_vectors
+from backend.result_pool import (
+    MAX_FETCH_DEPTH, InvalidCursor, decode_cursor, encode_cursor, fetch_depth,
+    load_pool, new_pool_id, save_pool,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
 
 # 1. Load Environment Variables
 load_dotenv()
 PINECONE_KEY = os.getenv("PINECONE_API_KEY")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv('TESTING') != 'true':
+        # Warm the /movies snapshot so the first visitor doesn't pay for it
+        try:
+            await app.state.graph_snapshots.get()
+        except Exception as e:
+            print(f"Error building /movies graph snapshot: {e}")
+    yield
+    await app.state.encoder.close()
+    if hasattr(app.state.index, "aclose"):
+        await app.state.index.aclose()
+
+
 # 2. Initialize App
-app = FastAPI(title="Nebula API", description="Semantic Search Engine for Movies")
+app = FastAPI(title="Nebula API", description="Semantic Search Engine for Movies", lifespan=lifespan)
 
 # 3. Enable CORS (Critical for connecting React to Python)
 app.add_middleware(
@@ -38,28 +78,78 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Link strategies for the graph endpoints (see backend/graph.py)
+SEARCH_LINK_THRESHOLD = 0.5     # Higher threshold for search results
+MOVIES_LINK_THRESHOLD = 0.65
+MOVIES_LINKS_PER_NODE = 10      # Bounds /movies links per node
+SIMILAR_LINK_THRESHOLD = 0.75   # Cross-links between neighbours of the central node
+MAX_EXPAND_SEEDS = 10           # Seeds per /engine/expand call
+MAX_KNOWN_IDS = 5000            # Client-side graph size accepted by /engine/expand
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
 # 4. Load AI Model & DB (Runs once on startup, skip in tests)
 if os.getenv('TESTING') != 'true':
-    print(f"Loading Model... (PINECONE_KEY present: {bool(PINECONE_KEY)})")
+    print(
+        f"Loading Model... (encoder: {ENCODER_BACKEND}, vectors: {VECTOR_BACKEND}, "
+        f"PINECONE_KEY present: {bool(PINECONE_KEY)})"
+    )
     try:
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        pc = Pinecone(api_key=PINECONE_KEY)
-        index = pc.Index("nebula-index")
+        # In process mode the model lives in the encoder worker processes only
+        model = load_model(EMBEDDING_MODEL, ENCODER_BACKEND) if ENCODER_MODE != "process" else None
+        index = open_vector_store(VECTOR_BACKEND, api_key=PINECONE_KEY)
         print("Successfully loaded model and index.")
     except Exception as e:
         print(f"Error loading model/index: {e}")
         model = None
-        pc = None
         index = None
+    # Local catalog snapshot: backs the kNN graph and the browse metadata store
+    try:
+        if isinstance(index, LocalVectorStore):
+            catalog = index.catalog
+        else:
+            catalog = load_catalog(CATALOG_DIR, mmap=True) if catalog_exists(CATALOG_DIR) else None
+        knn_graph = load_knn_graph(CATALOG_DIR, catalog=catalog) if catalog else None
+        metadata_store = MetadataStore(catalog) if catalog else None
+        snapshot_version = catalog_version(catalog) if catalog else None
+        # Vectors for link computation, so queries can skip include_values
+        vector_mirror = VectorMirror.open(CATALOG_DIR)
+        print(
+            f"Catalog snapshot: {len(catalog) if catalog else 'not found'} "
+            f"(kNN graph: {'loaded' if knn_graph else 'not found'})"
+        )
+    except Exception as e:
+        print(f"Error loading catalog snapshot: {e}")
+        knn_graph = None
+        metadata_store = None
+        snapshot_version = None
+        vector_mirror = None
 else:
     # In test mode, use None (mocked in actual tests if needed)
     model = None
-    pc = None
     index = None
+    knn_graph = None
+    metadata_store = None
+    snapshot_version = None
+    vector_mirror = None
 
 # Attach to app.state so getters can inject them without circular imports
 app.state.model = model
+app.state.encoder = create_encoder(model, ENCODER_MODE, model_name=EMBEDDING_MODEL)
 app.state.index = index
+app.state.knn_graph = knn_graph
+app.state.metadata_store = metadata_store
+app.state.vector_mirror = vector_mirror
+# Cache keys include the inference backend: int8 vectors differ slightly from fp32
+app.state.embedding_cache = EmbeddingCache(model_name=f"{EMBEDDING_MODEL}:{ENCODER_BACKEND}")
+app.state.semantic_cache = SemanticCache()
+# /movies payload, rebuilt only when the catalog version changes
+app.state.graph_snapshots = GraphSnapshotStore(
+    lambda: build_movies_graph(app.state.index, app.state.metadata_store, app.state.vector_mirror),
+    version=snapshot_version,
+)
+# Swaps the catalog-backed state above when an ingest publishes a new snapshot
+app.state.catalog_refresher = CatalogRefresher(app.state, CATALOG_DIR, snapshot_version) if snapshot_version else None
 
 # --- Data Models ---
 
@@ -79,6 +169,14 @@ class MovieResponse(BaseModel):
 
 # --- Helper: Build Pinecone metadata filter ---
 
+DECADE_RANGES = {
+    "2020s": (2020, 2029),
+    "2010s": (2010, 2019),
+    "2000s": (2000, 2009),
+    "1990s": (1990, 1999),
+    "Earlier": (1900, 1989),
+}
+
 
 def build_metadata_filter(
     genre: Optional[str],
@@ -86,13 +184,17 @@ def build_metadata_filter(
     rating: Optional[float],
     min_year: Optional[int] = None
 ):
-    """Convert query params into a Pinecone metadata filter dict."""
+    """
+    Convert query params into a Pinecone metadata filter dict.
+    The same dict is understood by the local vector store.
+    """
     conditions = []
 
     if genre:
-        # genres is stored as comma-separated string; use $eq for exact substring match
-        # Pinecone string filter matches if the metadata field contains the value
-        conditions.append({"genres": {"$eq": genre}})
+        # genres is a display string ("Action, Drama") that $eq matches only
+        # whole; genre_list holds the names, so $in matches by membership like
+        # the browse store. The $eq arm covers vectors ingested before genre_list.
+        conditions.append({"$or": [{"genre_list": {"$in": [genre]}}, {"genres": {"$eq": genre}}]})
 
     if rating is not None and rating > 0:
         conditions.append({"rating": {"$gte": rating}})
@@ -101,15 +203,8 @@ def build_metadata_filter(
         conditions.append({"year": {"$gte": min_year}})
 
     if decade:
-        year_ranges = {
-            "2020s": (2020, 2029),
-            "2010s": (2010, 2019),
-            "2000s": (2000, 2009),
-            "1990s": (1990, 1999),
-            "Earlier": (1900, 1989),
-        }
-        if decade in year_ranges:
-            start_year, end_year = year_ranges[decade]
+        if decade in DECADE_RANGES:
+            start_year, end_year = DECADE_RANGES[decade]
             # Use numeric year field (requires numeric metadata in Pinecone)
             conditions.append({"year": {"$gte": start_year}})
             conditions.append({"year": {"$lte": end_year}})
@@ -128,8 +223,97 @@ def home():
     return {"message": "Nebula API is running. Go to /docs for swagger UI."}
 
 
+@app.get("/metrics/encoder")
+async def encoder_metrics(
+    encoder=Depends(get_encoder),
+    index=Depends(get_index),
+    embedding_cache=Depends(get_embedding_cache),
+    semantic_cache=Depends(get_semantic_cache),
+):
+    """Encoder batching, vector-store client and cache counters for this worker."""
+    return {
+        "encoder": encoder.stats(),
+        "vector_store": index.stats() if hasattr(index, "stats") else None,
+        "embedding_cache": embedding_cache.stats,
+        "semantic_cache": semantic_cache.stats(),
+    }
+
+
+async def _ranked_movie_pool(params: dict, depth: int, encoder, index, embedding_cache) -> list[dict]:
+    """Run the /api/search vector query for *params* and format the top *depth* matches."""
+    q = params["q"]
+    metadata_filter = build_metadata_filter(
+        params["genre"], params["decade"], params["rating"], params["min_year"]
+    )
+
+    if q.strip():
+        # Semantic search mode (embedding cached across pages and filters)
+        query_vector = (await embedding_cache.encode(q, encoder)).tolist()
+    else:
+        # Browse mode — non-zero dummy vector (cosine needs non-zero magnitude)
+        query_vector = [0.1] * 384
+
+    # Query Pinecone
+    query_kwargs = {
+        "vector": query_vector,
+        "top_k": depth,
+        "include_metadata": True,
+    }
+    if metadata_filter:
+        query_kwargs["filter"] = metadata_filter
+
+    print(f"API Search: q='{q}', genre={params['genre']}, decade={params['decade']}, depth={depth}")
+    results = await index.aquery(**query_kwargs)
+    print(f"Found {len(results.matches)} matches in Pinecone.")
+
+    return [
+        {
+            "id": match.id,
+            "title": match.metadata.get("title", "Unknown"),
+            "poster": match.metadata.get("poster_path", ""),
+            "overview": match.metadata.get("overview", ""),
+            "rating": match.metadata.get("rating", 0.0),
+            "genres": match.metadata.get("genres", "Unknown"),
+            "release_date": match.metadata.get("release_date", "Unknown"),
+            "language": match.metadata.get("original_language", "en"),
+            "popularity": match.metadata.get("popularity", 0.0),
+            "score": float(match.score),
+        }
+        for match in results.matches
+    ]
+
+
+def _browse_page(store: MetadataStore, params: dict, offset: int, limit: int) -> dict:
+    """Serve one /api/search browse page from the metadata store."""
+    sort = params.get("sort") or "popularity"
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORT_FIELDS)}")
+
+    rows, total = store.browse(
+        sort=sort,
+        descending=params.get("order", "desc") != "asc",
+        offset=offset,
+        limit=limit,
+        genre=params["genre"],
+        min_rating=params["rating"],
+        year_range=DECADE_RANGES.get(params["decade"]),
+        min_year=params["min_year"],
+    )
+    end_idx = offset + limit
+    has_more = end_idx < total
+    return {
+        "movies": [store.movie(int(row)) for row in rows],
+        "total": total,
+        "page": offset // limit + 1,
+        "limit": limit,
+        "hasMore": has_more,
+        "nextCursor": encode_cursor("", end_idx, params) if has_more else None,
+    }
+
+
 @app.get("/api/search")
-def api_search(
+async def api_search(
+    background_tasks: BackgroundTasks,
     q: str = Query("", description="Search query text"),
     genre: Optional[str] = Query(None, description="Filter by genre name"),
     decade: Optional[str] = Query(None, description="Filter by decade (e.g., '2020s')"),
@@ -137,71 +321,75 @@ def api_search(
     min_year: Optional[int] = Query(None, description="Minimum release year"),
     page: int = Query(1, ge=1, description="Page number (1-indexed)"),
     limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    sort: str = Query("popularity", description="Browse sort field: popularity, rating or year"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Browse sort order"),
+    encoder=Depends(get_encoder),
+    index=Depends(get_index),
+    embedding_cache=Depends(get_embedding_cache),
+    metadata_store=Depends(get_metadata_store),
 ):
     """
     Unified search + browse endpoint.
     - With `q`: semantic search using vector similarity + optional metadata filters.
-    - Without `q`: browse mode using a dummy vector + metadata filters.
+    - Without `q`: browse mode — filter + sort over the in-memory metadata
+      store (`sort`/`order`), falling back to a dummy-vector query when no
+      catalog snapshot is loaded.
     Returns paginated results.
+
+    The first page stores the ranked results in a Redis result pool and
+    returns `nextCursor`; passing it back serves later pages from the pool
+    (search params are carried in the cursor, so other params are ignored).
+    The fetch depth grows with the requested page instead of a fixed 200.
     """
     try:
-        # Build metadata filter
-        metadata_filter = build_metadata_filter(genre, decade, rating, min_year)
-
-        # Determine query vector
-        fetch_top_k = 200  # Fetch a large pool for pagination slicing
-
-        if q.strip():
-            # Semantic search mode
-            query_vector = [float(x) for x in model.encode(q.strip())]
+        if cursor:
+            try:
+                pool_id, offset, params = decode_cursor(cursor)
+            except InvalidCursor:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
         else:
-            # Browse mode — non-zero dummy vector (cosine needs non-zero magnitude)
-            query_vector = [0.1] * 384
-
-        # Query Pinecone
-        query_kwargs = {
-            "vector": query_vector,
-            "top_k": fetch_top_k,
-            "include_metadata": True,
-        }
-        if metadata_filter:
-            query_kwargs["filter"] = metadata_filter
-
-        print(f"API Search: q='{q}', genre={genre}, decade={decade}")
-        results = index.query(**query_kwargs)
-        print(f"Found {len(results.matches)} matches in Pinecone.")
-
-        # Format all results
-        all_movies = []
-        for match in results.matches:
-            all_movies.append({
-                "id": match.id,
-                "title": match.metadata.get("title", "Unknown"),
-                "poster": match.metadata.get("poster_path", ""),
-                "overview": match.metadata.get("overview", ""),
-                "rating": match.metadata.get("rating", 0.0),
-                "genres": match.metadata.get("genres", "Unknown"),
-                "release_date": match.metadata.get("release_date", "Unknown"),
-                "language": match.metadata.get("original_language", "en"),
-                "popularity": match.metadata.get("popularity", 0.0),
-                "score": float(match.score),
-            })
+            params = {
+                "q": q, "genre": genre, "decade": decade, "rating": rating,
+                "min_year": min_year, "sort": sort, "order": order,
+            }
+            pool_id, offset = new_pool_id(), (page - 1) * limit
+
+        # Browse mode: no vector query, no result pool
+        if not params["q"].strip() and metadata_store is not None:
+            return _browse_page(metadata_store, params, offset, limit)
+
+        pool = await load_pool(pool_id) if cursor else None
+
+        # (Re)fill the pool when it is missing/expired or too shallow for this page
+        if pool is None or (
+            offset + limit > len(pool["movies"])
+            and not pool["exhausted"]
+            and pool["depth"] < MAX_FETCH_DEPTH
+        ):
+            depth = fetch_depth(offset, limit, pool["depth"] if pool else 0)
+            movies = await _ranked_movie_pool(params, depth, encoder, index, embedding_cache)
+            pool = {"movies": movies, "depth": depth, "exhausted": len(movies) < depth}
+            background_tasks.add_task(save_pool, pool_id, pool)
 
         # Paginate
+        all_movies = pool["movies"]
         total = len(all_movies)
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        page_movies = all_movies[start_idx:end_idx]
-        has_more = end_idx < total
+        end_idx = offset + limit
+        page_movies = all_movies[offset:end_idx]
+        has_more = end_idx < total or (not pool["exhausted"] and pool["depth"] < MAX_FETCH_DEPTH)
 
         return {
             "movies": page_movies,
             "total": total,
-            "page": page,
+            "page": offset // limit + 1,
             "limit": limit,
             "hasMore": has_more,
+            "nextCursor": encode_cursor(pool_id, end_idx, params) if has_more else None,
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -210,85 +398,85 @@ def api_search(
 async def search_movies(
     req: SearchRequest,
     background_tasks: BackgroundTasks,
+    format: str = Query("full", pattern="^(full|compact)$", description="Wire format (see backend/wire.py)"),
+    fields: Optional[str] = Query(None, description="Comma-separated node fields to return"),
+    stream: bool = Query(False, description="Stream NDJSON records: nodes, link batches, summary"),
     _: None = Depends(rate_limiter),
-    model=Depends(get_model),
-    index=Depends(get_index)
+    encoder=Depends(get_encoder),
+    index=Depends(get_index),
+    embedding_cache=Depends(get_embedding_cache),
+    semantic_cache=Depends(get_semantic_cache),
+    vector_mirror=Depends(get_vector_mirror),
 ):
     """
     Takes a user query (e.g., "sad robots"), converts to vector,
     and finds matching movies in Pinecone.
     Returns a graph structure (nodes + links) instead of just a list.
 
-    All blocking operations (model.encode, index.query, cosine_similarity)
-    are offloaded to threads via asyncio.to_thread() to keep the
-    async event loop unblocked for concurrent requests.
+    Blocking work (model.encode, link building) is offloaded to threads
+    via asyncio.to_thread(); the vector query is natively async
+    (see backend/pinecone_client.py), so the event loop is never blocked.
 
     Results are cached in Redis keyed by normalized query string.
+    On an exact-key miss, a cached paraphrase whose embedding is within
+    SEMANTIC_CACHE_THRESHOLD cosine similarity is served instead.
     Cache writes happen in the background so the client never waits.
+
+    `format=compact` / `fields=` shape the response (see backend/wire.py);
+    the cache always stores the full payload.
+
+    `stream=true` returns NDJSON instead: the ranked nodes as soon as
+    Pinecone answers, then link batches as they are computed, then a
+    summary record. The cache write happens once the stream is done.
     """
     # ── Cache check (before any heavy work) ──────────────────────────
     cached = await get_cached_search(req.query)
     if cached is not None:
         cached["cached"] = True
-        return cached
+        if stream:
+            return StreamingResponse(_stream_cached(cached, format, fields), media_type=NDJSON_MEDIA_TYPE)
+        return graph_response(cached, format, fields)
 
     try:
-        # 1. Convert text to numbers — CPU-bound, offload to thread
-        raw_vector = await asyncio.to_thread(model.encode, req.query)
-        query_vector = [float(x) for x in raw_vector]
-
-        # 2. Query Pinecone — synchronous I/O, offload to thread
+        # 1. Convert text to numbers — cached, micro-batched encoder on a miss
+        raw_vector = await embedding_cache.encode(req.query, encoder)
+        query_vector = raw_vector.tolist()
+
+        # ── Semantic cache check (nearest previously cached query) ──
+        semantic_hit = await semantic_cache.get(req.query, raw_vector)
+        if semantic_hit is not None:
+            cached, matched_query, similarity = semantic_hit
+            cached["cached"] = True
+            cached["semanticMatch"] = {"query": matched_query, "similarity": similarity}
+            if stream:
+                return StreamingResponse(_stream_cached(cached, format, fields), media_type=NDJSON_MEDIA_TYPE)
+            return graph_response(cached, format, fields)
+
+        # 2. Query Pinecone — async, pooled, concurrency-limited
         query_kwargs = {
             "vector": query_vector,
             "top_k": req.top_k,
             "include_metadata": True,
-            "include_values": True,  # CRITICAL: Need vectors to calculate links
+            # Vectors for link building come from the local mirror when present
+            "include_values": vector_mirror is None,
         }
-        results = await asyncio.to_thread(index.query, **query_kwargs)
+        results = await index.aquery(**query_kwargs)
 
         # 3. Build nodes and collect vectors
-        nodes = []
-        vectors = []
-        id_map = {}
-
-        for i, match in enumerate(results.matches):
-            nodes.append({
-                "id": match.id,
-                "title": match.metadata.get("title", "Unknown"),
-                "poster": match.metadata.get("poster_path", ""),
-                "overview": match.metadata.get("overview", ""),
-                "score": float(match.score),
-                "rating": match.metadata.get("rating", 0.0),
-                "val": match.metadata.get("rating", 5.0) * 2,  # Node size
-                "genres": match.metadata.get("genres", "Unknown"),
-                "release_date": match.metadata.get("release_date", "Unknown"),
-                "language": match.metadata.get("original_language", "en"),
-                "popularity": match.metadata.get("popularity", 0.0),
-                "isSearchResult": True,
-                "relevanceRank": i + 1
-            })
-            vectors.append(match.values)
-            id_map[i] = match.id
-
-        # 4. Calculate similarity — CPU-bound matrix math, offload to thread
-        links = []
-        if len(vectors) > 1:
-            vec_matrix = np.array(vectors)
-            sim_matrix = await asyncio.to_thread(cosine_similarity, vec_matrix)
-
-            # Create links for highly similar search results
-            threshold = 0.5  # Higher threshold for search results
-            rows, cols = sim_matrix.shape
-            for i in range(rows):
-                for j in range(i + 1, cols):
-                    score = sim_matrix[i][j]
-                    if score > threshold:
-                        links.append({
-                            "source": id_map[i],
-                            "target": id_map[j],
-                            "value": float(score),
-                            "similarity": float(score)
-                        })
+        nodes = _search_nodes(results.matches)
+        if stream:
+            return StreamingResponse(
+                _stream_search(req.query, raw_vector, results.matches, nodes, index,
+                               vector_mirror, semantic_cache, format, fields),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+        vectors = await _match_vectors(results.matches, index, vector_mirror)
+
+        # 4. Build similarity links — vectorised, offloaded to thread
+        links = await asyncio.to_thread(
+            graph_links, vectors, [node["id"] for node in nodes],
+            threshold=SEARCH_LINK_THRESHOLD,
+        )
 
         result = {
             "nodes": nodes,
@@ -299,68 +487,155 @@ async def search_movies(
         }
 
         # ── Background cache write (client doesn't wait) ────────────
-        background_tasks.add_task(set_cached_search, req.query, result)
+        background_tasks.add_task(semantic_cache.set, req.query, raw_vector, result)
 
-        return result
+        return graph_response(result, format, fields)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/movies")
-async def get_movies(
-    index=Depends(get_index)
-):
+def _search_nodes(matches):
+    """Format /search matches as ranked graph nodes."""
+    return [
+        {
+            "id": match.id,
+            "title": match.metadata.get("title", "Unknown"),
+            "poster": match.metadata.get("poster_path", ""),
+            "overview": match.metadata.get("overview", ""),
+            "score": float(match.score),
+            "rating": match.metadata.get("rating", 0.0),
+            "val": match.metadata.get("rating", 5.0) * 2,  # Node size
+            "genres": match.metadata.get("genres", "Unknown"),
+            "release_date": match.metadata.get("release_date", "Unknown"),
+            "language": match.metadata.get("original_language", "en"),
+            "popularity": match.metadata.get("popularity", 0.0),
+            "isSearchResult": True,
+            "relevanceRank": i + 1
+        }
+        for i, match in enumerate(matches)
+    ]
+
+
+async def _stream_search(query, raw_vector, matches, nodes, index, vector_mirror,
+                         semantic_cache, format, fields):
+    """NDJSON body of a streamed /search miss; caches the full result at the end."""
+    yield ndjson(nodes_record(nodes, format, fields, query=query, totalResults=len(nodes)))
+
+    vectors = await _match_vectors(matches, index, vector_mirror)
+    blocks = iter_link_blocks(vectors, [node["id"] for node in nodes], SEARCH_LINK_THRESHOLD)
+    links = []
+    while (batch := await asyncio.to_thread(next, blocks, None)) is not None:
+        if batch:
+            links.extend(batch)
+            yield ndjson(links_record(batch, nodes, format))
+
+    yield ndjson({
+        "type": "summary", "query": query, "totalResults": len(nodes),
+        "totalLinks": len(links), "cached": False,
+    })
+
+    result = {"nodes": nodes, "links": links, "query": query, "totalResults": len(nodes), "cached": False}
+    await semantic_cache.set(query, raw_vector, result)
+
+
+async def _stream_cached(payload, format, fields):
+    """NDJSON body of a cached /search result (same records as a live stream)."""
+    nodes = payload["nodes"]
+    yield ndjson(nodes_record(nodes, format, fields, query=payload["query"], totalResults=len(nodes)))
+    if payload["links"]:
+        yield ndjson(links_record(payload["links"], nodes, format))
+    summary = {
+        "type": "summary", "query": payload["query"], "totalResults": len(nodes),
+        "totalLinks": len(payload["links"]), "cached": True,
+    }
+    if "semanticMatch" in payload:
+        summary["semanticMatch"] = payload["semanticMatch"]
+    yield ndjson(summary)
+
+
+async def build_movies_graph(index, metadata_store, vector_mirror=None) -> dict:
     """
-    Unified endpoint that returns a flat list of movies with all metadata.
-    Calculates cosine similarity on the backend to provide pre-computed graph links.
+    Build the /movies payload: 500 movies with metadata plus similarity
+    links computed on the backend.
+
+    With a catalog snapshot loaded, the 500 most popular movies with posters
+    come straight from the metadata store (vectors from the catalog rows);
+    otherwise a dummy-vector Pinecone query picks them.
     """
-    try:
+    if metadata_store is not None:
+        rows, _ = metadata_store.browse(limit=500, require_poster=True)
+        nodes = [_store_node(metadata_store, int(row)) for row in rows]
+        vectors = metadata_store.catalog.vectors[rows]
+    else:
         # Fetch top 500 movies with full metadata
         dummy_vec = [0.1] * 384
 
-        # Offload synchronous Pinecone query to thread
-        results = await asyncio.to_thread(
-            index.query,
+        results = await index.aquery(
             vector=dummy_vec,
             top_k=500,
             include_metadata=True,
-            include_values=True
+            include_values=vector_mirror is None
         )
 
-        nodes, vectors, id_map = _format_matches_to_nodes(results.matches)
+        matches = _matches_with_posters(results.matches)
+        nodes = _format_matches_to_nodes(matches)
+        vectors = await _match_vectors(matches, index, vector_mirror)
+
+    print(f"Movies graph snapshot: {len(nodes)} movies (with posters)")
 
-        print(f"Movies endpoint: returned {len(nodes)} movies (with posters)")
+    # Calculate similarity links on backend (bounded per node, orphans rescued)
+    links = await asyncio.to_thread(
+        graph_links, vectors, [node["id"] for node in nodes],
+        threshold=MOVIES_LINK_THRESHOLD,
+        k=MOVIES_LINKS_PER_NODE,
+        rescue_orphans=True,
+    )
 
-        # Calculate similarity matrix on backend
-        links = []
-        if len(vectors) > 1:
-            vec_matrix = np.array(vectors)
-            sim_matrix = await asyncio.to_thread(cosine_similarity, vec_matrix)
-            links = _calculate_similarity_links(sim_matrix, id_map)
+    return {"movies": nodes, "nodes": nodes, "links": links, "total": len(nodes)}
 
-        return {"movies": nodes, "nodes": nodes, "links": links, "total": len(nodes)}
 
+@app.get("/movies")
+async def get_movies(
+    request: Request,
+    format: str = Query("full", pattern="^(full|compact)$", description="Wire format (see backend/wire.py)"),
+    fields: Optional[str] = Query(None, description="Comma-separated node fields to return"),
+    graph_snapshots=Depends(get_graph_snapshots),
+):
+    """
+    Unified endpoint that returns a flat list of movies with all metadata
+    and pre-computed graph links.
+
+    The payload is built once per catalog version and served from memory
+    as pre-serialised bytes; clients revalidate with `If-None-Match` and
+    get `304 Not Modified` while the catalog is unchanged.
+    `format=compact` sends nodes once and links as index triples;
+    `fields=` drops unneeded node fields (e.g. overviews).
+    """
+    try:
+        snapshot = await graph_snapshots.get(format, fields)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=snapshot.headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=snapshot.headers)
 
-def _format_matches_to_nodes(matches):
-    """Helper to format Pinecone matches into nodes."""
-    nodes = []
-    vectors = []
-    id_map = {}
-    idx = 0
 
-    for match in matches:
-        poster = match.metadata.get("poster_path", "")
-        if not poster or not poster.strip():
-            continue  # Skip movies without posters
+def _matches_with_posters(matches):
+    """Drop matches without a poster (the graph views need one per node)."""
+    return [m for m in matches if (m.metadata.get("poster_path") or "").strip()]
 
-        nodes.append({
+
+def _format_matches_to_nodes(matches):
+    """Helper to format Pinecone matches into nodes."""
+    return [
+        {
             "id": match.id,
             "title": match.metadata.get("title", "Unknown"),
-            "poster": poster,
+            "poster": match.metadata.get("poster_path", ""),
             "overview": match.metadata.get("overview", ""),
             "rating": match.metadata.get("rating", 0.0),
             "val": match.metadata.get("rating", 5.0) * 2,
@@ -369,77 +644,47 @@ def _format_matches_to_nodes(matches):
             "language": match.metadata.get("original_language", "en"),
             "popularity": match.metadata.get("popularity", 0.0),
             "group": 1,
-        })
-        vectors.append(match.values)
-        id_map[idx] = match.id
-        idx += 1
-    return nodes, vectors, id_map
+        }
+        for match in matches
+    ]
 
 
-def _calculate_similarity_links(sim_matrix, id_map, threshold=0.65):
-    """Helper to calculate links between similar movies and rescue orphans."""
-    links = []
-    rows, cols = sim_matrix.shape
-    connected_indices = set()
-
-    for i in range(rows):
-        for j in range(i + 1, cols):
-            score = sim_matrix[i][j]
-            if score > threshold:
-                links.append({
-                    "source": id_map[i],
-                    "target": id_map[j],
-                    "value": float(score),
-                    "similarity": float(score)
-                })
-                connected_indices.add(i)
-                connected_indices.add(j)
-
-    # Rescue orphan nodes (ensure every node has at least 1 connection)
-    for i in range(rows):
-        if i not in connected_indices:
-            best_j, best_sim = _find_best_match(i, sim_matrix, cols)
-            if best_j >= 0:
-                links.append({
-                    "source": id_map[i],
-                    "target": id_map[best_j],
-                    "value": float(max(best_sim, 0.1)),
-                    "similarity": float(max(best_sim, 0.1))
-                })
-    return links
-
-
-def _find_best_match(node_idx, sim_matrix, cols):
-    """Helper to find the best match for a given node index."""
-    best_j = -1
-    best_sim = -1
-    for j in range(cols):
-        if node_idx == j:
-            continue
-        score = sim_matrix[node_idx][j] if node_idx < j else sim_matrix[j][node_idx]
-        if score > best_sim:
-            best_sim = score
-            best_j = j
-    return best_j, best_sim
+async def _match_vectors(matches, index, vector_mirror):
+    """
+    Vectors of *matches* for link building: from the local mirror when one
+    is loaded (the query skipped include_values), else from the matches.
+    """
+    if vector_mirror is None:
+        return [match.values for match in matches]
+    return await resolve_vectors([match.id for match in matches], vector_mirror, index)
+
+
+def _store_node(store: MetadataStore, row: int) -> dict:
+    """Format a metadata-store row like _format_matches_to_nodes does."""
+    movie = store.movie(row)
+    del movie["score"]
+    movie["val"] = movie["rating"] * 2
+    movie["group"] = 1
+    return movie
 
 
 # Keep legacy endpoints for backwards compatibility during transition
 @app.get("/graph")
-async def get_graph_data():
+async def get_graph_data(request: Request, graph_snapshots=Depends(get_graph_snapshots)):
     """
-    Legacy endpoint - redirects to /movies.
+    Legacy endpoint - serves the /movies snapshot.
     Graph construction now handled by frontend.
     """
-    return await get_movies()
+    return await get_movies(request, "full", None, graph_snapshots)
 
 
 @app.get("/browse")
-async def browse_movies():
+async def browse_movies(request: Request, graph_snapshots=Depends(get_graph_snapshots)):
     """
-    Legacy endpoint - redirects to /movies.
+    Legacy endpoint - serves the /movies snapshot.
     Categorization now handled by frontend.
     """
-    return await get_movies()
+    return await get_movies(request, "full", None, graph_snapshots)
 
 
 # --- Engine Endpoints (Connected Papers Style) ---
@@ -451,17 +696,17 @@ class EngineSearchRequest(BaseModel):
 @app.post("/engine/search")
 async def engine_search(
     req: EngineSearchRequest,
-    model=Depends(get_model),
-    index=Depends(get_index)
+    encoder=Depends(get_encoder),
+    index=Depends(get_index),
+    embedding_cache=Depends(get_embedding_cache)
 ):
     """
     Takes a natural language query, encodes it (using the existing SentenceTransformer),
     queries Pinecone, and returns enriched TMDB metadata matches (top 25).
     """
     try:
-        # 1. Convert text to numbers
-        raw_vector = await asyncio.to_thread(model.encode, req.query)
-        query_vector = [float(x) for x in raw_vector]
+        # 1. Convert text to numbers (cached)
+        query_vector = (await embedding_cache.encode(req.query, encoder)).tolist()
 
         # 2. Query Pinecone
         query_kwargs = {
@@ -469,27 +714,10 @@ async def engine_search(
             "top_k": 25,
             "include_metadata": True,
         }
-        results = await asyncio.to_thread(index.query, **query_kwargs)
+        results = await index.aquery(**query_kwargs)
 
         # 3. Build top matches (list of movies for the vertical sidebar)
-        matches = []
-        for i, match in enumerate(results.matches):
-            matches.append({
-                "id": match.id,
-                "title": match.metadata.get("title", "Unknown"),
-                "poster": match.metadata.get("poster_path", ""),
-                "overview": match.metadata.get("overview", ""),
-                "rating": match.metadata.get("rating", 0.0),
-                "val": match.metadata.get("rating", 5.0) * 2,
-                "genres": match.metadata.get("genres", "Unknown"),
-                "release_date": match.metadata.get("release_date", "Unknown"),
-                "language": match.metadata.get("original_language", "en"),
-                "popularity": match.metadata.get("popularity", 0.0),
-                "vote_count": match.metadata.get("vote_count", 100),  # Used for node sizing
-                "score": float(match.score),
-                "isSearchResult": True,
-                "relevanceRank": i + 1
-            })
+        matches = _engine_results(results.matches)
 
         return {"results": matches, "query": req.query}
 
@@ -497,20 +725,94 @@ async def engine_search(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _engine_results(matches):
+    """Format search matches as /engine/search sidebar results."""
+    return [
+        {
+            "id": match.id,
+            "title": match.metadata.get("title", "Unknown"),
+            "poster": match.metadata.get("poster_path", ""),
+            "overview": match.metadata.get("overview", ""),
+            "rating": match.metadata.get("rating", 0.0),
+            "val": match.metadata.get("rating", 5.0) * 2,
+            "genres": match.metadata.get("genres", "Unknown"),
+            "release_date": match.metadata.get("release_date", "Unknown"),
+            "language": match.metadata.get("original_language", "en"),
+            "popularity": match.metadata.get("popularity", 0.0),
+            "vote_count": match.metadata.get("vote_count", 100),  # Used for node sizing
+            "score": float(match.score),
+            "isSearchResult": True,
+            "relevanceRank": i + 1
+        }
+        for i, match in enumerate(matches)
+    ]
+
+
+def _similar_node(match, central_id):
+    """Format a neighbourhood match as an /engine/similar node."""
+    return {
+        "id": match.id,
+        "title": match.metadata.get("title", "Unknown"),
+        "poster": match.metadata.get("poster_path", ""),
+        "overview": match.metadata.get("overview", ""),
+        "rating": match.metadata.get("rating", 0.0),
+        "val": match.metadata.get("rating", 5.0) * 2,
+        "genres": match.metadata.get("genres", "Unknown"),
+        "release_date": match.metadata.get("release_date", "Unknown"),
+        "vote_count": match.metadata.get("vote_count", 100),
+        "score": float(match.score),
+        "isCentralNode": match.id == central_id
+    }
+
+
 @app.get("/engine/similar/{movie_id}")
 async def engine_similar(
     movie_id: str,
-    index=Depends(get_index)
+    format: str = Query("full", pattern="^(full|compact)$", description="Wire format (see backend/wire.py)"),
+    fields: Optional[str] = Query(None, description="Comma-separated node fields to return"),
+    index=Depends(get_index),
+    knn_graph=Depends(get_knn_graph),
+    vector_mirror=Depends(get_vector_mirror),
 ):
     """
     Fetches a specific movie and its top similar neighbors.
     Returns the central node, neighbor nodes, and the similarity links between them.
     Also calculates cross-similarity edges between the neighbors if >0.75.
+
+    Served from the precomputed kNN graph (scripts/build_knn_graph.py) when
+    it covers the movie; otherwise falls back to live Pinecone queries
+    (vectors from the local mirror when loaded). Supports the `format=compact` / `fields=` wire options of /movies.
     """
     try:
+        graph = await _similar_graph(movie_id, index, knn_graph, vector_mirror)
+        return graph_response(graph, format, fields)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _similar_graph(movie_id, index, knn_graph, vector_mirror, seed_vector=None) -> dict:
+    """
+    Build the /engine/similar payload for *movie_id*.
+
+    *seed_vector* skips the seed lookup when the caller already has it
+    (e.g. from a search response). Raises a 404 HTTPException for
+    unknown movies.
+    """
+    neighborhood = knn_graph.neighborhood(movie_id) if knn_graph is not None else None
+    if neighborhood is not None:
+        matches, links = neighborhood
+        nodes = [_similar_node(match, movie_id) for match in matches]
+        return {"nodes": nodes, "links": links, "centralNodeId": movie_id}
+
+    if seed_vector is None and vector_mirror is not None and movie_id in vector_mirror.id_to_row:
+        # Seed vector from the local mirror — no lookup round trip
+        seed_vector = vector_mirror.lookup([movie_id])[0][0].tolist()
+    if seed_vector is None:
         # First, fetch the selected movie's vector from Pinecone
-        selected_res = await asyncio.to_thread(
-            index.query,
+        selected_res = await index.aquery(
             id=movie_id,
             top_k=1,
             include_values=True,
@@ -520,72 +822,181 @@ async def engine_similar(
         if not selected_res.matches:
             raise HTTPException(status_code=404, detail="Movie not found")
 
-        seed_match = selected_res.matches[0]
-        seed_vector = seed_match.values
+        seed_vector = selected_res.matches[0].values
+
+    # Query Pinecone for the nearest neighbors using the seed vector
+    # Fetching ~30 robust neighbors
+    query_kwargs = {
+        "vector": seed_vector,
+        "top_k": 31,  # including the seed itself
+        "include_metadata": True,
+        "include_values": vector_mirror is None,
+    }
+    neighbor_res = await index.aquery(**query_kwargs)
+
+    # Pinecone includes the seed itself; it becomes the central node
+    nodes = [_similar_node(match, movie_id) for match in neighbor_res.matches]
+    vectors = await _match_vectors(neighbor_res.matches, index, vector_mirror)
+
+    # Connect everything to the central node, plus strong cross-similarity edges
+    ids = [node["id"] for node in nodes]
+    links = await asyncio.to_thread(
+        graph_links, vectors, ids,
+        threshold=SIMILAR_LINK_THRESHOLD,
+        hub=ids.index(movie_id) if movie_id in ids else None,
+    )
 
-        # Query Pinecone for the nearest neighbors using the seed vector
-        # Fetching ~30 robust neighbors
-        query_kwargs = {
-            "vector": seed_vector,
-            "top_k": 31,  # including the seed itself
-            "include_metadata": True,
-            "include_values": True,
+    return {"nodes": nodes, "links": links, "centralNodeId": movie_id}
+
+
+@app.post("/engine/launch")
+async def engine_launch(
+    req: EngineSearchRequest,
+    format: str = Query("full", pattern="^(full|compact)$", description="Graph wire format (see backend/wire.py)"),
+    fields: Optional[str] = Query(None, description="Comma-separated graph node fields to return"),
+    encoder=Depends(get_encoder),
+    index=Depends(get_index),
+    embedding_cache=Depends(get_embedding_cache),
+    knn_graph=Depends(get_knn_graph),
+    vector_mirror=Depends(get_vector_mirror),
+):
+    """
+    /engine/search and /engine/similar for the top hit in one request.
+
+    The query is encoded once. When neither the kNN graph nor the vector
+    mirror is loaded, the search asks for vector values so the top hit's
+    vector is already in hand and the neighbourhood graph needs no seed
+    lookup. First paint needs one remote round trip with the kNN graph
+    and two without it, instead of four sequential calls.
+
+    Returns `{"results", "query", "graph"}`; `graph` is null without hits.
+    """
+    try:
+        query_vector = (await embedding_cache.encode(req.query, encoder)).tolist()
+        results = await index.aquery(
+            vector=query_vector,
+            top_k=25,
+            include_metadata=True,
+            include_values=knn_graph is None and vector_mirror is None,
+        )
+
+        graph = None
+        if results.matches:
+            top = results.matches[0]
+            graph = await _similar_graph(
+                top.id, index, knn_graph, vector_mirror, seed_vector=top.values or None,
+            )
+        matches = _engine_results(results.matches)
+
+        payload = {
+            "results": matches,
+            "query": req.query,
+            "graph": graph_payload(graph, format, fields) if graph is not None else None,
         }
-        neighbor_res = await asyncio.to_thread(index.query, **query_kwargs)
+        return Response(content=dumps(payload), media_type="application/json")
 
-        nodes = []
-        vectors = []
-        id_map = {}
-        idx = 0
-
-        # Only add valid neighbors (skip self just in case, though Pinecone includes it)
-        for match in neighbor_res.matches:
-            # Pinecone might return the exact same document, we add it back.
-            poster = match.metadata.get("poster_path", "")
-
-            nodes.append({
-                "id": match.id,
-                "title": match.metadata.get("title", "Unknown"),
-                "poster": poster,
-                "overview": match.metadata.get("overview", ""),
-                "rating": match.metadata.get("rating", 0.0),
-                "val": match.metadata.get("rating", 5.0) * 2,
-                "genres": match.metadata.get("genres", "Unknown"),
-                "release_date": match.metadata.get("release_date", "Unknown"),
-                "vote_count": match.metadata.get("vote_count", 100),
-                "score": float(match.score),
-                "isCentralNode": match.id == seed_match.id
-            })
-            vectors.append(match.values)
-            id_map[idx] = match.id
-            idx += 1
-
-        # Calculate cross-similarity
-        links = []
-        if len(vectors) > 1:
-            vec_matrix = np.array(vectors)
-            sim_matrix = await asyncio.to_thread(cosine_similarity, vec_matrix)
-
-            rows, cols = sim_matrix.shape
-            for i in range(rows):
-                for j in range(i + 1, cols):
-                    score = sim_matrix[i][j]
-                    u = id_map[i]
-                    v = id_map[j]
-
-                    # Connect everything to central node OR if cross-similarity > 0.75
-                    is_central_link = (u == movie_id or v == movie_id)
-                    if is_central_link or score >= 0.75:
-                        links.append({
-                            "source": u,
-                            "target": v,
-                            "value": float(score),
-                            "similarity": float(score),
-                            "isCentralLink": is_central_link
-                        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return {"nodes": nodes, "links": links, "centralNodeId": movie_id}
 
+class ExpandRequest(BaseModel):
+    seed_ids: list[str] = Field(..., min_length=1, max_length=MAX_EXPAND_SEEDS)
+    known_ids: list[str] = Field(default_factory=list, max_length=MAX_KNOWN_IDS)
+    neighbors: int = Field(30, ge=1, le=100)
+
+
+async def _seed_neighbors(seed_id, neighbors, index, knn_graph, vector_mirror):
+    """
+    The seed followed by its *neighbors* nearest movies, or None if
+    unknown. Served from the kNN graph when it stores that many
+    neighbours; a wider request falls back to a vector query.
+    """
+    use_graph = knn_graph is not None and neighbors <= knn_graph.k
+    neighborhood = knn_graph.neighborhood(seed_id) if use_graph else None
+    if neighborhood is not None:
+        return neighborhood[0][:neighbors + 1]
+
+    if vector_mirror is not None and seed_id in vector_mirror.id_to_row:
+        seed_vector = vector_mirror.lookup([seed_id])[0][0].tolist()
+    else:
+        selected_res = await index.aquery(id=seed_id, top_k=1, include_values=True)
+        if not selected_res.matches:
+            return None
+        seed_vector = selected_res.matches[0].values
+
+    res = await index.aquery(vector=seed_vector, top_k=neighbors + 1, include_metadata=True)
+    return sorted(res.matches, key=lambda match: match.id != seed_id)  # seed first
+
+
+@app.post("/engine/expand")
+async def engine_expand(
+    req: ExpandRequest,
+    fields: Optional[str] = Query(None, description="Comma-separated node fields to return"),
+    index=Depends(get_index),
+    knn_graph=Depends(get_knn_graph),
+    vector_mirror=Depends(get_vector_mirror),
+):
+    """
+    Grow a client-side graph around one or more seed movies.
+
+    Takes the ids already on screen (`known_ids`) and the clicked
+    `seed_ids`; returns only the nodes the client does not have yet, the
+    new–new and new–known edges above SIMILAR_LINK_THRESHOLD, and every
+    seed→neighbour link (`isCentralLink`), also between on-screen nodes.
+    All seeds are resolved concurrently in one call. Link ids refer to
+    known nodes too, so only the full wire format is offered.
+
+    New–known edges are computed against the known ids in the seeds'
+    neighbourhoods and, with a vector mirror, every known id it holds —
+    never by fetching the whole screen's vectors from the index.
+    """
+    try:
+        seeds = list(dict.fromkeys(req.seed_ids))
+        neighborhoods = await asyncio.gather(*(
+            _seed_neighbors(seed, req.neighbors, index, knn_graph, vector_mirror) for seed in seeds
+        ))
+        missing = [seed for seed, matches in zip(seeds, neighborhoods) if matches is None]
+        if len(missing) == len(seeds):
+            raise HTTPException(status_code=404, detail="Movie not found")
+
+        known = set(req.known_ids)
+        new_matches, hub_pairs = {}, []
+        for seed, matches in zip(seeds, neighborhoods):
+            for match in matches or []:
+                if match.id not in known:
+                    new_matches.setdefault(match.id, match)
+                if match.id != seed:
+                    hub_pairs.append((seed, match.id))
+
+        new_ids = list(new_matches)
+        nearby = {match.id for matches in neighborhoods for match in matches or []}
+        local = vector_mirror.id_to_row if vector_mirror is not None else {}
+        known_ids = [mid for mid in dict.fromkeys(req.known_ids) if mid in nearby or mid in local]
+        new_vectors, known_vectors = await asyncio.gather(
+            resolve_vectors(new_ids, vector_mirror, index),
+            resolve_vectors(known_ids, vector_mirror, index),
+        )
+        links = await asyncio.to_thread(
+            delta_links, new_vectors, new_ids, known_vectors, known_ids,
+            threshold=SIMILAR_LINK_THRESHOLD, hub_pairs=hub_pairs,
+        )
+
+        seed_set = set(seeds)
+        nodes = []
+        for match in new_matches.values():
+            node = _similar_node(match, None)
+            node["isCentralNode"] = match.id in seed_set
+            nodes.append(node)
+
+        return graph_response(
+            {"nodes": nodes, "links": links, "seedIds": seeds, "missingSeedIds": missing},
+            "full", fields,
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -593,28 +1004,27 @@ async def engine_similar(
 # --- Watchlist & Recommendation State Endpoints ---
 
 
+class WatchlistBatch(BaseModel):
+    movie_ids: list[str] = Field(..., min_length=1, max_length=MAX_WATCHLIST_BATCH)
+
+
 @app.get("/api/watchlist")
 async def get_watchlist(
+    limit: int = Query(WATCHLIST_PAGE_SIZE, ge=1, le=MAX_WATCHLIST_PAGE_SIZE, description="Entries per page"),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
     db: AsyncSession = Depends(get_db),
     user: dict = Depends(get_current_user)
 ):
-    """Fetch the watchlist for the authenticated user."""
-    user_id = user["sub"]
-    result = await db.execute(
-        select(Watchlist, MovieMetadata)
-        .join(MovieMetadata, Watchlist.movie_id == MovieMetadata.id)
-        .where(Watchlist.user_id == user_id)
-    )
-    watchlist = []
-    for wl, movie in result:
-        watchlist.append({
-            "id": str(wl.id),
-            "movie_id": str(movie.id),
-            "title": movie.title,
-            "rating": movie.rating,
-            "added_at": wl.added_at
-        })
-    return watchlist
+    """
+    One page of the authenticated user's watchlist, newest first. Pass
+    the returned `nextCursor` back for the next page (`null` on the last).
+    """
+    try:
+        after = decode_watchlist_cursor(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    result = await db.execute(watchlist_page_query(user["sub"], limit, after))
+    return watchlist_page_payload(result.all(), limit)
 
 
 @app.post("/api/watchlist")
@@ -623,14 +1033,45 @@ async def add_to_watchlist(
     db: AsyncSession = Depends(get_db),
     user: dict = Depends(get_current_user)
 ):
-    """Add a movie to the user's watchlist."""
-    user_id = user["sub"]
-    # Check if movie exists in metadata (simplified logic)
-    # ...
-    new_entry = Watchlist(user_id=user_id, movie_id=movie_id)
-    db.add(new_entry)
+    """
+    Add a movie to the user's watchlist. *movie_id* is the catalog/Pinecone
+    id used by the graph endpoints (or a ``movie_metadata`` UUID); it is
+    resolved against the mirror ingest keeps in Postgres. Adding a movie
+    twice is a no-op.
+    """
+    found, added = (await db.execute(watchlist_add_statement(user["sub"], [movie_id]))).one()
+    if not found:
+        raise HTTPException(status_code=404, detail=f"Movie {movie_id} not found")
+    await db.commit()
+    return {"message": "Added to watchlist", "added": bool(added)}
+
+
+@app.post("/api/watchlist/batch")
+async def add_to_watchlist_batch(
+    batch: WatchlistBatch,
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Add several movies in one statement. `added` counts the new entries,
+    `skipped` the movies already on the watchlist; ids that match no
+    movie are ignored.
+    """
+    found, added = (await db.execute(watchlist_add_statement(user["sub"], batch.movie_ids))).one()
+    await db.commit()
+    return {"added": added, "skipped": found - added}
+
+
+@app.post("/api/watchlist/batch/remove")
+async def remove_from_watchlist_batch(
+    batch: WatchlistBatch,
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user)
+):
+    """Remove several movies from the watchlist in one statement."""
+    result = await db.execute(watchlist_remove_statement(user["sub"], batch.movie_ids))
     await db.commit()
-    return {"message": "Added to watchlist"}
+    return {"removed": result.rowcount}
 
 
 @app.get("/api/recommendations/state")
@@ -0,0 +1,153 @@
+"""
+backend/metadata_store.py
+-------------------------
+Columnar, array-backed movie metadata for browse mode.
+
+Browsing (no search text) does not need vector search at all: it is a
+filter + sort over a ~10k-row table. ``MetadataStore`` keeps that table
+in NumPy columns built once from the catalog snapshot at startup:
+
+    - year / rating / popularity : numeric arrays
+    - genres                     : one uint32 bitset per movie
+    - titles, posters, ...       : interned Python strings
+
+Every sort order is precomputed, so a browse request is one boolean
+mask applied to a presorted index array — microseconds, with
+deterministic ordering (ties broken by catalog row).
+
+Rows are aligned with the catalog, so ``catalog.vectors[rows]`` gives
+the embeddings of any browse result.
+
+A genre filter matches by membership ("Drama" keeps "Action, Drama"),
+as the search path's ``genre_list`` filter does (see
+``build_metadata_filter``); :func:`split_genres` is the one parser both
+use.
+"""
+
+import sys
+from typing import Optional
+
+import numpy as np
+
+from backend.catalog import Catalog
+
+SORT_FIELDS = ("popularity", "rating", "year")
+
+
+def split_genres(text: Optional[str]) -> list[str]:
+    """Genre names of a comma-separated ``genres`` string, without "Unknown"."""
+    names = (name.strip() for name in (text or "").split(","))
+    return [name for name in names if name and name != "Unknown"]
+
+
+class MetadataStore:
+    """Filter/sort/paginate the catalog without touching the vector index."""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        metadata = catalog.metadata
+        n = len(metadata)
+
+        self.ids = catalog.ids
+        self.year = np.array([int(m.get("year") or 0) for m in metadata], dtype=np.int32)
+        self.rating = np.array([float(m.get("rating") or 0.0) for m in metadata], dtype=np.float32)
+        self.popularity = np.array(
+            [float(m.get("popularity") or 0.0) for m in metadata], dtype=np.float32
+        )
+
+        def intern(value, default: str) -> str:
+            return sys.intern(value) if isinstance(value, str) and value else default
+
+        self.titles = [intern(m.get("title"), "Unknown") for m in metadata]
+        self.posters = [intern(m.get("poster_path"), "") for m in metadata]
+        self.genre_text = [intern(m.get("genres"), "Unknown") for m in metadata]
+        self.release_dates = [intern(m.get("release_date"), "Unknown") for m in metadata]
+        self.languages = [intern(m.get("original_language"), "en") for m in metadata]
+        self.has_poster = np.array([bool(p.strip()) for p in self.posters], dtype=bool)
+
+        # Genre bitsets ("Action, Drama" → bit(Action) | bit(Drama))
+        self.genre_bits: dict[str, int] = {}
+        self.genres = np.zeros(n, dtype=np.uint32)
+        for row, text in enumerate(self.genre_text):
+            for name in split_genres(text):
+                if name not in self.genre_bits:
+                    if len(self.genre_bits) == 32:
+                        continue
+                    self.genre_bits[name] = 1 << len(self.genre_bits)
+                self.genres[row] |= self.genre_bits[name]
+
+        # Precomputed orders, highest first; lexsort's last key is primary,
+        # ties fall back to catalog row for deterministic pagination.
+        rows = np.arange(n)
+        self._orders = {
+            field: np.lexsort((rows, -getattr(self, field).astype(np.float64)))
+            for field in SORT_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def mask(
+        self,
+        genre: Optional[str] = None,
+        min_rating: Optional[float] = None,
+        year_range: Optional[tuple[int, int]] = None,
+        min_year: Optional[int] = None,
+        require_poster: bool = False,
+    ) -> np.ndarray:
+        """
+        Boolean row mask for the browse filters. Same semantics as
+        ``build_metadata_filter``: *genre* matches any movie listing it.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if genre:
+            bit = self.genre_bits.get(genre)
+            if bit is None:
+                return np.zeros(len(self), dtype=bool)
+            keep &= (self.genres & np.uint32(bit)) != 0
+        if min_rating is not None and min_rating > 0:
+            keep &= self.rating >= min_rating
+        if min_year:
+            keep &= self.year >= min_year
+        if year_range is not None:
+            keep &= (self.year >= year_range[0]) & (self.year <= year_range[1])
+        if require_poster:
+            keep &= self.has_poster
+        return keep
+
+    def browse(
+        self,
+        sort: str = "popularity",
+        descending: bool = True,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        **filters,
+    ) -> tuple[np.ndarray, int]:
+        """
+        Return ``(rows, total)``: catalog rows of the requested page and
+        the number of movies matching the filters.
+        """
+        if sort not in self._orders:
+            raise ValueError(f"Unknown sort field: {sort}")
+        order = self._orders[sort]
+        if not descending:
+            order = order[::-1]
+        matching = order[self.mask(**filters)[order]]
+        end = None if limit is None else offset + limit
+        return matching[offset:end], int(matching.size)
+
+    def movie(self, row: int) -> dict:
+        """Format *row* like an /api/search result."""
+        meta = self.catalog.metadata[row]
+        return {
+            "id": self.ids[row],
+            "title": self.titles[row],
+            "poster": self.posters[row],
+            "overview": meta.get("overview", ""),
+            "rating": float(self.rating[row]),
+            "genres": self.genre_text[row],
+            "release_date": self.release_dates[row],
+            "language": self.languages[row],
+            "popularity": float(self.popularity[row]),
+            "score": 0.0,
+        }
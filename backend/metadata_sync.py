@@ -0,0 +1,113 @@
+"""
+backend/metadata_sync.py
+------------------------
+Bulk sync of the ``movie_metadata`` table (``MovieMetadata``, the
+relational mirror of the vector index) from the catalog snapshot.
+
+Ingest upserts thousands of movies at once, so rows go through asyncpg's
+binary ``COPY`` rather than per-row ORM inserts:
+
+    1. ``COPY`` a batch into a temporary staging table
+       (``ON COMMIT DELETE ROWS``, created once per connection)
+    2. ``INSERT … SELECT DISTINCT ON (pinecone_id) … FROM staging
+       ON CONFLICT (pinecone_id) DO UPDATE`` — rows whose columns did not
+       change are skipped by the ``WHERE … IS DISTINCT FROM`` guard, so
+       re-syncing an unchanged catalog writes nothing
+
+one transaction per ``MOVIE_SYNC_BATCH_SIZE`` rows. Existing rows keep
+their primary key, so watchlist entries referencing them survive.
+
+Usage:
+    async with connect() as conn:
+        written = await sync_movie_metadata(conn, movie_rows(catalog.ids, catalog.metadata))
+"""
+
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, Optional
+
+import asyncpg
+
+from backend.database import DATABASE_URL
+from backend.models import MovieMetadata
+
+MOVIE_SYNC_BATCH_SIZE: int = int(os.getenv("MOVIE_SYNC_BATCH_SIZE", "5000"))
+
+TABLE = MovieMetadata.__tablename__
+STAGING_TABLE = f"{TABLE}_staging"
+COLUMNS = ("pinecone_id", "title", "year", "rating")
+TITLE_MAX_LENGTH = MovieMetadata.__table__.c.title.type.length
+
+CREATE_STAGING = f"""
+CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} (
+    pinecone_id text NOT NULL,
+    title       text NOT NULL,
+    year        integer,
+    rating      double precision
+) ON COMMIT DELETE ROWS
+"""
+
+MERGE_STAGING = f"""
+INSERT INTO {TABLE} (id, pinecone_id, title, year, rating)
+SELECT DISTINCT ON (pinecone_id) gen_random_uuid(), pinecone_id, title, year, rating
+FROM {STAGING_TABLE}
+ORDER BY pinecone_id
+ON CONFLICT (pinecone_id) DO UPDATE
+SET title = EXCLUDED.title, year = EXCLUDED.year, rating = EXCLUDED.rating
+WHERE ({TABLE}.title, {TABLE}.year, {TABLE}.rating)
+      IS DISTINCT FROM (EXCLUDED.title, EXCLUDED.year, EXCLUDED.rating)
+"""
+
+
+def asyncpg_dsn(url: str = DATABASE_URL) -> str:
+    """The SQLAlchemy ``postgresql+asyncpg://`` URL as a plain asyncpg DSN."""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def movie_rows(ids: Iterable[str], metadata: Iterable[dict]) -> Iterable[tuple]:
+    """``movie_metadata`` staging records for catalog rows (year 0 → NULL)."""
+    for mid, meta in zip(ids, metadata):
+        year = int(meta.get("year") or 0) or None
+        rating = meta.get("rating")
+        yield (
+            str(mid),
+            (meta.get("title") or "")[:TITLE_MAX_LENGTH],
+            year,
+            float(rating) if rating is not None else None,
+        )
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterable[list[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def sync_movie_metadata(conn, rows: Iterable[tuple], batch_size: int = MOVIE_SYNC_BATCH_SIZE) -> int:
+    """
+    Upsert *rows* (see :func:`movie_rows`) into ``movie_metadata`` over an
+    asyncpg connection; returns the number of rows inserted or changed.
+    """
+    await conn.execute(CREATE_STAGING)
+    written = 0
+    for batch in _batches(rows, max(1, batch_size)):
+        async with conn.transaction():
+            await conn.copy_records_to_table(STAGING_TABLE, records=batch, columns=COLUMNS)
+            status = await conn.execute(MERGE_STAGING)
+        written += int(status.split()[-1])  # "INSERT 0 <rows>"
+    return written
+
+
+@asynccontextmanager
+async def connect(dsn: Optional[str] = None) -> AsyncIterator:
+    """A dedicated asyncpg connection (bulk COPY bypasses the ORM pool)."""
+    conn = await asyncpg.connect(dsn or asyncpg_dsn())
+    try:
+        yield conn
+    finally:
+        await conn.close()
@@ -13,7 +13,7 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import ForeignKey, String, Float, Integer, DateTime, func
+from sqlalchemy import ForeignKey, Index, String, Float, Integer, DateTime, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -85,6 +85,12 @@ class MovieMetadata(Base):
 # ---------------------------------------------------------------------------
 class Watchlist(Base):
     __tablename__ = "watchlists"
+    __table_args__ = (
+        # One entry per movie; also serves user_id lookups (no separate index)
+        UniqueConstraint("user_id", "movie_id", name="uq_watchlists_user_movie"),
+        # Keyset pagination: WHERE user_id = ? AND (added_at, id) < (?, ?)
+        Index("ix_watchlists_user_added", "user_id", "added_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -93,7 +99,6 @@ class Watchlist(Base):
         UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     movie_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -102,7 +107,7 @@ class Watchlist(Base):
         index=True,
     )
     added_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), nullable=False, server_default=func.now()
     )
 
     # Relationships
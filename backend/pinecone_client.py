@@ -0,0 +1,244 @@
+"""
+backend/pinecone_client.py
+--------------------------
+Native asyncio access to the Pinecone data plane.
+
+The ``pinecone`` SDK is synchronous, so every endpoint used to wrap it in
+``asyncio.to_thread``; under load the default executor's thread count
+capped in-flight queries and threads piled up in blocking HTTP.
+:class:`AsyncPineconeIndex` speaks the data-plane REST API directly over
+one pooled ``httpx.AsyncClient`` per event loop:
+
+    - HTTP/2 (when the optional ``h2`` package is installed) with
+      keep-alive, so concurrent queries multiplex over a few connections
+    - a per-process semaphore bounding in-flight calls
+      (``PINECONE_MAX_CONCURRENCY``); excess callers queue on the loop
+      instead of in threads
+    - a per-call deadline (``PINECONE_TIMEOUT``) covering the semaphore
+      wait and the request, raised as :class:`VectorStoreTimeout`
+
+Responses are parsed into the ``Match``/``QueryResponse``/``FetchResponse``
+types of ``backend/vector_store.py``, so endpoint code is unchanged.
+
+Tests point the client at a stand-in server by passing an ASGI app as
+``transport`` (see ``backend/tests/test_pinecone_client.py``).
+
+Configuration (environment):
+    PINECONE_INDEX_HOST        data-plane host; resolved via the control
+                               plane when unset
+    PINECONE_MAX_CONCURRENCY   in-flight calls per process (default 32)
+    PINECONE_TIMEOUT           seconds per call, queueing included (default 5)
+    PINECONE_CONNECT_TIMEOUT   seconds to open a connection (default 2)
+    PINECONE_HTTP2             "true" (default) or "false"
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import time
+from typing import Optional
+
+import httpx
+import orjson
+
+from backend.vector_store import FetchResponse, Match, QueryResponse
+
+logger = logging.getLogger(__name__)
+
+PINECONE_INDEX_HOST: Optional[str] = os.getenv("PINECONE_INDEX_HOST")
+PINECONE_MAX_CONCURRENCY: int = int(os.getenv("PINECONE_MAX_CONCURRENCY", "32"))
+PINECONE_TIMEOUT: float = float(os.getenv("PINECONE_TIMEOUT", "5"))
+PINECONE_CONNECT_TIMEOUT: float = float(os.getenv("PINECONE_CONNECT_TIMEOUT", "2"))
+PINECONE_HTTP2: bool = os.getenv("PINECONE_HTTP2", "true").lower() == "true"
+PINECONE_API_VERSION: str = "2024-07"
+KEEPALIVE_EXPIRY: float = 60.0
+
+
+class VectorStoreError(RuntimeError):
+    """A vector-store call failed (HTTP error or malformed response)."""
+
+
+class VectorStoreTimeout(VectorStoreError):
+    """A vector-store call exceeded its deadline."""
+
+
+def _match(raw: dict) -> Match:
+    return Match(
+        id=raw["id"],
+        score=float(raw.get("score", 0.0)),
+        values=raw.get("values") or [],
+        metadata=raw.get("metadata") or {},
+    )
+
+
+class AsyncPineconeIndex:
+    """Async, connection-pooled, concurrency-limited Pinecone index client."""
+
+    def __init__(
+        self,
+        host: str,
+        api_key: Optional[str],
+        max_concurrency: int = PINECONE_MAX_CONCURRENCY,
+        timeout: float = PINECONE_TIMEOUT,
+        connect_timeout: float = PINECONE_CONNECT_TIMEOUT,
+        http2: bool = PINECONE_HTTP2,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = host if host.startswith("http") else f"https://{host}"
+        self.api_key = api_key
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._calls = 0
+        self._timeouts = 0
+        self._errors = 0
+        self._in_flight = 0
+        self._waiting = 0
+        self._latency_max = 0.0
+
+    def _ensure_client(self) -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._client is None or self._client.is_closed:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                transport=self.transport,
+                headers={
+                    "Api-Key": self.api_key or "",
+                    "X-Pinecone-API-Version": PINECONE_API_VERSION,
+                    "Content-Type": "application/json",
+                },
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            )
+        return self._client, self._semaphore
+
+    async def _request(self, method: str, path: str, **kwargs) -> dict:
+        client, semaphore = self._ensure_client()
+        started = time.perf_counter()
+        self._calls += 1
+
+        async def call() -> httpx.Response:
+            self._waiting += 1
+            try:
+                await semaphore.acquire()
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+            try:
+                return await client.request(method, path, **kwargs)
+            finally:
+                self._in_flight -= 1
+                semaphore.release()
+
+        try:
+            response = await asyncio.wait_for(call(), self.timeout)
+        except (asyncio.TimeoutError, httpx.TimeoutException) as exc:
+            self._timeouts += 1
+            raise VectorStoreTimeout(f"Pinecone {path} timed out after {self.timeout}s") from exc
+        except httpx.HTTPError as exc:
+            self._errors += 1
+            raise VectorStoreError(f"Pinecone {path} failed: {exc}") from exc
+        finally:
+            self._latency_max = max(self._latency_max, time.perf_counter() - started)
+
+        if response.status_code >= 400:
+            self._errors += 1
+            raise VectorStoreError(
+                f"Pinecone {path} returned {response.status_code}: {response.text[:200]}"
+            )
+        return orjson.loads(response.content)
+
+    async def aquery(
+        self,
+        vector=None,
+        id: Optional[str] = None,
+        top_k: int = 10,
+        filter: Optional[dict] = None,
+        include_values: bool = False,
+        include_metadata: bool = False,
+        namespace: str = "",
+    ) -> QueryResponse:
+        body = {
+            "topK": top_k,
+            "includeValues": include_values,
+            "includeMetadata": include_metadata,
+            "namespace": namespace,
+        }
+        if id is not None:
+            body["id"] = id
+        else:
+            body["vector"] = [float(x) for x in vector]
+        if filter:
+            body["filter"] = filter
+        data = await self._request("POST", "/query", content=orjson.dumps(body))
+        return QueryResponse(
+            matches=[_match(raw) for raw in data.get("matches", [])],
+            namespace=data.get("namespace", namespace),
+        )
+
+    async def afetch(self, ids: list[str], namespace: str = "") -> FetchResponse:
+        params = [("ids", mid) for mid in ids]
+        if namespace:
+            params.append(("namespace", namespace))
+        data = await self._request("GET", "/vectors/fetch", params=params)
+        return FetchResponse(
+            vectors={mid: _match({"id": mid, **raw}) for mid, raw in data.get("vectors", {}).items()},
+            namespace=data.get("namespace", namespace),
+        )
+
+    async def aupsert(self, vectors: list[dict], namespace: str = "") -> int:
+        """Upsert ``{"id", "values", "metadata"}`` dicts; returns the upserted count."""
+        body = {"vectors": vectors, "namespace": namespace}
+        data = await self._request(
+            "POST", "/vectors/upsert", content=orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+        )
+        return int(data.get("upsertedCount", len(vectors)))
+
+    async def aupdate(self, id: str, set_metadata: dict, namespace: str = "") -> None:
+        """Overwrite the given metadata fields of one vector, leaving its values alone."""
+        body = {"id": id, "setMetadata": set_metadata, "namespace": namespace}
+        await self._request("POST", "/vectors/update", content=orjson.dumps(body))
+
+    async def adescribe_index_stats(self) -> dict:
+        return await self._request("POST", "/describe_index_stats", content=b"{}")
+
+    def stats(self) -> dict:
+        return {
+            "http2": self.http2,
+            "max_concurrency": self.max_concurrency,
+            "calls": self._calls,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "timeouts": self._timeouts,
+            "errors": self._errors,
+            "max_latency_ms": 1000 * self._latency_max,
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+def resolve_index_host(index_name: str, api_key: Optional[str]) -> str:
+    """Return the data-plane host of *index_name* (``PINECONE_INDEX_HOST`` wins)."""
+    if PINECONE_INDEX_HOST:
+        return PINECONE_INDEX_HOST
+    from pinecone import Pinecone
+
+    return Pinecone(api_key=api_key).describe_index(index_name).host
@@ -0,0 +1,115 @@
+"""
+backend/result_pool.py
+----------------------
+Cursor-based pagination for ``/api/search`` backed by a cached result pool.
+
+The first page runs the vector query once, stores the ranked results in
+Redis under a random pool id (with a TTL) and returns an opaque cursor.
+Later pages decode the cursor and slice the stored pool — no re-encode,
+no re-query. When a client scrolls past the end of the pool, it is
+refilled with a deeper query (fetch depth grows geometrically up to
+``MAX_FETCH_DEPTH``) instead of always fetching a fixed 200 matches.
+
+Cursors are URL-safe base64 of ``{"p": pool_id, "o": offset, "q": params}``.
+The search params travel inside the cursor, so an expired pool is simply
+rebuilt from them; they are type-checked on decode (``CURSOR_PARAMS``),
+so a tampered cursor is a 400, not a 500. Like ``backend/cache.py``, Redis failures degrade to
+"pool not found".
+"""
+
+import base64
+import logging
+import secrets
+
+import orjson
+import redis.asyncio as aioredis
+
+from backend.database import get_redis
+
+logger = logging.getLogger(__name__)
+
+POOL_TTL: int = 900                # seconds a pool survives after its last write
+POOL_KEY_PREFIX: str = "nebula:result_pool:"
+PREFETCH_PAGES: int = 5            # pages fetched up front on the first request
+MAX_FETCH_DEPTH: int = 1000        # hard cap on top_k per vector query
+
+
+# Search params carried in a cursor → accepted JSON types (``sort``/``order`` may be absent)
+CURSOR_PARAMS: dict[str, tuple[type, ...]] = {
+    "q": (str,),
+    "genre": (str, type(None)),
+    "decade": (str, type(None)),
+    "rating": (int, float, type(None)),
+    "min_year": (int, type(None)),
+}
+OPTIONAL_CURSOR_PARAMS: dict[str, tuple[type, ...]] = {"sort": (str,), "order": (str,)}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded."""
+
+
+def _valid_params(params) -> bool:
+    if not isinstance(params, dict) or not CURSOR_PARAMS.keys() <= params.keys():
+        return False
+    expected = {**CURSOR_PARAMS, **OPTIONAL_CURSOR_PARAMS}
+    return all(
+        name in expected and isinstance(value, expected[name]) and not isinstance(value, bool)
+        for name, value in params.items()
+    )
+
+
+def fetch_depth(offset: int, limit: int, previous_depth: int = 0) -> int:
+    """
+    Choose ``top_k`` for a query that must cover ``offset + limit`` results.
+
+    The first fetch covers ``PREFETCH_PAGES`` pages; refills at least
+    double the previous depth so deep scrolling needs few round trips.
+    """
+    needed = offset + limit
+    depth = max(needed + limit, limit * PREFETCH_PAGES, 2 * previous_depth)
+    return min(depth, MAX_FETCH_DEPTH)
+
+
+def encode_cursor(pool_id: str, offset: int, params: dict) -> str:
+    raw = orjson.dumps({"p": pool_id, "o": offset, "q": params})
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int, dict]:
+    """
+    Decode a cursor; raises :class:`InvalidCursor` unless it is well formed
+    and its search params have the keys and types ``/api/search`` expects.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = orjson.loads(base64.urlsafe_b64decode(padded))
+        pool_id, offset, params = data["p"], data["o"], data["q"]
+    except Exception as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(pool_id, str) or type(offset) is not int or offset < 0 or not _valid_params(params):
+        raise InvalidCursor("Malformed cursor")
+    return pool_id, offset, params
+
+
+def new_pool_id() -> str:
+    return secrets.token_urlsafe(12)
+
+
+async def load_pool(pool_id: str) -> dict | None:
+    """Return ``{"movies", "depth", "exhausted"}`` for *pool_id*, or ``None``."""
+    redis: aioredis.Redis = get_redis()
+    try:
+        raw = await redis.get(POOL_KEY_PREFIX + pool_id)
+        return orjson.loads(raw) if raw is not None else None
+    except Exception as exc:
+        logger.warning("Redis GET failed (result pool miss): %s", exc)
+        return None
+
+
+async def save_pool(pool_id: str, pool: dict, ttl: int = POOL_TTL) -> None:
+    redis: aioredis.Redis = get_redis()
+    try:
+        await redis.set(POOL_KEY_PREFIX + pool_id, orjson.dumps(pool), ex=ttl)
+    except Exception as exc:
+        logger.warning("Redis SET failed (result pool not stored): %s", exc)
@@ -3,3 +3,94 @@ import pytest
 
 # Set TESTING environment variable before any application code is imported
 os.environ["TESTING"] = "true"
+
+import zlib  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from backend.catalog import Catalog, normalise_rows  # noqa: E402
+from backend.vector_store import LocalVectorStore  # noqa: E402
+
+GENRES = ["Action", "Drama", "Comedy", "Horror", "Science Fiction"]
+
+
+@pytest.fixture
+def tiny_catalog():
+    """Deterministic 200-movie catalog with random 16-dim vectors."""
+    rng = np.random.default_rng(42)
+    n = 200
+    vectors = normalise_rows(rng.normal(size=(n, 16)))
+    metadata = [
+        {
+            "title": f"Movie {i}",
+            "poster_path": f"/p{i}.jpg" if i % 10 else "",
+            "overview": f"Overview of movie {i}",
+            "rating": round(float(i % 10), 1),
+            "genres": GENRES[i % len(GENRES)],
+            "release_date": f"{1980 + i % 45}-01-01",
+            "year": 1980 + i % 45,
+            "original_language": "en",
+            "popularity": float(n - i),
+        }
+        for i in range(n)
+    ]
+    return Catalog(ids=[str(1000 + i) for i in range(n)], vectors=vectors, metadata=metadata)
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the handful of async Redis calls the app makes."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    from backend import cache, embedding_cache, result_pool
+
+    redis = FakeRedis()
+    monkeypatch.setattr(cache, "get_redis", lambda: redis)
+    monkeypatch.setattr(embedding_cache, "get_redis_binary", lambda: redis)
+    monkeypatch.setattr(result_pool, "get_redis", lambda: redis)
+    return redis
+
+
+class HashEncoder:
+    """Deterministic text → 16-dim vector encoder for API tests."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def encode(self, text):
+        self.calls += 1
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        return rng.normal(size=16).astype(np.float32)
+
+    def stats(self):
+        return {"mode": "hash", "calls": self.calls}
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def local_app(tiny_catalog, fake_redis):
+    """The FastAPI app wired to a LocalVectorStore over ``tiny_catalog``."""
+    from backend.graph_snapshot import GraphSnapshotStore
+    from backend.main import app, build_movies_graph
+
+    saved = dict(app.state._state)
+    app.state.index = LocalVectorStore(tiny_catalog)
+    app.state.encoder = HashEncoder()
+    app.state.graph_snapshots = GraphSnapshotStore(
+        lambda: build_movies_graph(app.state.index, app.state.metadata_store, app.state.vector_mirror)
+    )
+    yield app
+    app.state._state.clear()
+    app.state._state.update(saved)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from backend import cache
+from backend.cache import SemanticCache
+
+
+@pytest.fixture
+def redis_payloads(monkeypatch):
+    store = {}
+
+    async def fake_get(query):
+        return store.get(query.lower().strip())
+
+    async def fake_set(query, data, ttl=cache.DEFAULT_TTL):
+        store[query.lower().strip()] = data
+
+    monkeypatch.setattr(cache, "get_cached_search", fake_get)
+    monkeypatch.setattr(cache, "set_cached_search", fake_set)
+    return store
+
+
+def _vec(*values):
+    return np.array(values, dtype=np.float32)
+
+
+async def test_paraphrase_within_threshold_hits(redis_payloads):
+    semantic = SemanticCache(threshold=0.9, capacity=8)
+    await semantic.set("Sad robot movies", _vec(1, 0, 0), {"nodes": [1]})
+
+    hit = await semantic.get("movies about sad robots", _vec(0.95, 0.1, 0))
+
+    payload, matched, similarity = hit
+    assert payload == {"nodes": [1]}
+    assert matched == "sad robot movies"
+    assert similarity > 0.9
+    assert semantic.stats()["hits"] == 1
+
+
+async def test_distant_query_misses(redis_payloads):
+    semantic = SemanticCache(threshold=0.9, capacity=8)
+    await semantic.set("sad robots", _vec(1, 0, 0), {"nodes": [1]})
+    assert await semantic.get("cowboys", _vec(0, 1, 0)) is None
+    assert semantic.stats()["hit_rate"] == 0.0
+
+
+async def test_expired_payload_is_dropped(redis_payloads):
+    semantic = SemanticCache(threshold=0.9, capacity=8)
+    await semantic.set("sad robots", _vec(1, 0, 0), {"nodes": [1]})
+    redis_payloads.clear()
+
+    assert await semantic.get("sad robot", _vec(1, 0.01, 0)) is None
+    assert semantic.stats()["entries"] == 0
+
+
+def test_ring_buffer_evicts_oldest():
+    semantic = SemanticCache(threshold=0.99, capacity=2)
+    semantic.add("a", _vec(1, 0, 0))
+    semantic.add("b", _vec(0, 1, 0))
+    semantic.add("c", _vec(0, 0, 1))
+
+    assert semantic.nearest(_vec(1, 0, 0)) is None
+    assert semantic.nearest(_vec(0, 0, 1))[0] == "c"
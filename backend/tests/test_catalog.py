@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+
+from backend.catalog import ARTIFACT_FILE, CatalogWriter, load_catalog, update_catalog, write_catalog
+from backend.graph_snapshot import catalog_rows_version, catalog_version
+from backend.knn_graph import load_knn_graph, write_knn_graph
+from backend.vector_mirror import VectorMirror
+
+
+def test_artifact_version_matches_the_content_digest(tmp_path, tiny_catalog):
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    catalog = load_catalog(tmp_path, mmap=True)
+
+    assert catalog.version is not None
+    artifact = json.loads((tmp_path / ARTIFACT_FILE).read_text())
+    assert artifact["dtype"] == "float32" and artifact["rows"] == 200 and artifact["dimension"] == 16
+    # Same digest as hashing the loaded catalog
+    catalog.version = catalog.rows_version = None
+    assert catalog_version(catalog) == artifact["version"]
+    assert catalog_rows_version(catalog) == artifact["rows_version"]
+
+    # The streaming writer produces the same version for the same rows
+    streamed = tmp_path / "streamed"
+    writer = CatalogWriter(streamed)
+    for start in range(0, 200, 64):
+        stop = start + 64
+        writer.append(tiny_catalog.ids[start:stop], tiny_catalog.vectors[start:stop], tiny_catalog.metadata[start:stop])
+    writer.commit()
+    assert load_catalog(streamed).version == artifact["version"]
+
+
+def test_metadata_refresh_changes_version_but_keeps_the_knn_graph(tmp_path, tiny_catalog):
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    before = load_catalog(tmp_path, mmap=True)
+    write_knn_graph(tmp_path, before, k=5)
+
+    update_catalog(tmp_path, {}, {"1003": {**tiny_catalog.metadata[3], "rating": 9.9}})
+    after = load_catalog(tmp_path, mmap=True)
+
+    assert after.version != before.version
+    assert after.rows_version == before.rows_version
+    assert load_knn_graph(tmp_path, catalog=after) is not None
+
+
+def test_float16_artifact_is_half_the_size(tmp_path, tiny_catalog):
+    write_catalog(tmp_path / "f32", tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    write_catalog(tmp_path / "f16", tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata, dtype="float16")
+    f32 = (tmp_path / "f32" / "vectors.npy").stat().st_size
+    f16 = (tmp_path / "f16" / "vectors.npy").stat().st_size
+    assert f16 < 0.55 * f32
+
+    catalog = load_catalog(tmp_path / "f16", mmap=True)
+    assert catalog.vectors.dtype == np.float16 and catalog.version
+
+    mirror = VectorMirror(tmp_path / "f16")
+    matrix, missing = mirror.lookup(["1003", "nope"])
+    assert matrix.dtype == np.float32 and missing == [1]
+    np.testing.assert_allclose(matrix[0], tiny_catalog.vectors[3], atol=1e-3)
+
+
+def test_stale_artifact_is_ignored(tmp_path, tiny_catalog):
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    stale = (tmp_path / ARTIFACT_FILE).read_text()
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors[::-1], tiny_catalog.metadata)
+    (tmp_path / ARTIFACT_FILE).write_text(stale)  # as if the run died before artifact.json
+
+    assert load_catalog(tmp_path).version is None
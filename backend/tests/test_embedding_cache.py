@@ -0,0 +1,71 @@
+import numpy as np
+
+from backend import embedding_cache as ec
+from backend.embedding_cache import EmbeddingCache
+from backend.encoder import ThreadEncoder
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("redis down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis down")
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, text):
+        self.calls.append(text)
+        return np.arange(4, dtype=np.float64) + len(text)
+
+
+class CountingEncoder(ThreadEncoder):
+    @property
+    def calls(self):
+        return self.model.calls
+
+
+async def test_normalised_queries_share_one_encode(fake_redis):
+    cache = EmbeddingCache()
+    model = CountingEncoder(CountingModel())
+
+    first = await cache.encode("Sad  Robots", model)
+    second = await cache.encode("  sad robots ", model)
+
+    assert model.calls == ["sad robots"]
+    assert first.dtype == np.float32
+    np.testing.assert_array_equal(first, second)
+    assert cache.stats == {"local_hits": 1, "redis_hits": 0, "misses": 1}
+
+
+async def test_redis_tier_survives_lru_eviction(fake_redis):
+    model = CountingEncoder(CountingModel())
+    await EmbeddingCache(maxsize=1).encode("space opera", model)
+
+    fresh = EmbeddingCache(maxsize=1)  # e.g. another worker process
+    vector = await fresh.encode("space opera", model)
+
+    assert len(model.calls) == 1
+    assert fresh.stats["redis_hits"] == 1
+    assert list(fake_redis.store.values())[0] == vector.tobytes()
+
+
+async def test_keys_are_scoped_by_model(fake_redis):
+    model = CountingEncoder(CountingModel())
+    await EmbeddingCache(model_name="a").encode("heist", model)
+    await EmbeddingCache(model_name="b").encode("heist", model)
+    assert len(model.calls) == 2
+
+
+async def test_redis_failure_falls_back_to_encoder(monkeypatch):
+    monkeypatch.setattr(ec, "get_redis_binary", lambda: BrokenRedis())
+    model = CountingEncoder(CountingModel())
+    cache = EmbeddingCache()
+
+    await cache.encode("noir", model)
+    await cache.encode("noir", model)
+
+    assert model.calls == ["noir"]
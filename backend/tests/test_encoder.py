@@ -0,0 +1,175 @@
+import asyncio
+import os
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from backend.encoder import (
+    BatchingEncoder,
+    EncoderConsistencyError,
+    ProcessPoolEncoder,
+    ShardedEmbedder,
+    VALIDATED_FILE,
+    check_consistency,
+    load_model,
+)
+
+
+class BatchRecordingModel:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def encode(self, texts):
+        if self.fail:
+            raise RuntimeError("model exploded")
+        self.batches.append(list(texts))
+        return np.array([[len(t), i] for i, t in enumerate(texts)], dtype=np.float32)
+
+
+async def test_concurrent_requests_share_one_batch():
+    model = BatchRecordingModel()
+    encoder = BatchingEncoder(model, max_batch_size=64, max_wait_ms=20)
+
+    texts = [f"query {i}" for i in range(10)] + ["query 3"]
+    vectors = await asyncio.gather(*(encoder.encode(t) for t in texts))
+
+    assert len(model.batches) == 1
+    assert len(model.batches[0]) == 10  # duplicate encoded once
+    for text, vector in zip(texts, vectors):
+        assert vector[0] == len(text)
+        assert model.batches[0][int(vector[1])] == text
+    stats = encoder.stats()
+    assert stats["items"] == 11 and stats["max_batch_size"] == 11
+    await encoder.close()
+
+
+async def test_batch_size_cap():
+    model = BatchRecordingModel()
+    encoder = BatchingEncoder(model, max_batch_size=4, max_wait_ms=20)
+    await asyncio.gather(*(encoder.encode(f"q{i}") for i in range(10)))
+    assert [len(b) for b in model.batches] == [4, 4, 2]
+    await encoder.close()
+
+
+async def test_errors_propagate_to_every_caller():
+    encoder = BatchingEncoder(BatchRecordingModel(fail=True), max_wait_ms=5)
+    results = await asyncio.gather(
+        encoder.encode("a"), encoder.encode("b"), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    with pytest.raises(RuntimeError):
+        await encoder.encode("c")  # scheduler is still alive
+    await encoder.close()
+
+
+class FixedModel:
+    def __init__(self, noise=0.0):
+        self.noise = noise
+
+    def encode(self, texts):
+        rng = np.random.default_rng(len(texts))
+        base = np.stack([np.linspace(1, 2, 8) * (i + 1) for i in range(len(texts))])
+        return base + self.noise * rng.normal(size=base.shape)
+
+
+def test_consistency_check_accepts_close_embeddings():
+    worst = check_consistency(FixedModel(noise=0.01), FixedModel(), tolerance=0.01)
+    assert worst > 0.99
+
+
+def test_consistency_check_rejects_drift():
+    with pytest.raises(EncoderConsistencyError):
+        check_consistency(FixedModel(noise=5.0), FixedModel(), tolerance=0.01)
+
+
+def fake_sentence_transformers(int8_noise):
+    """Stand-in ``sentence_transformers`` whose int8 model drifts by *int8_noise*."""
+    module = types.SimpleNamespace(exports=0)
+
+    class SentenceTransformer(FixedModel):
+        def __init__(self, name, backend="torch", model_kwargs=None):
+            super().__init__(int8_noise if model_kwargs else 0.0)
+
+        def save(self, path):
+            os.makedirs(os.path.join(path, "onnx"), exist_ok=True)
+
+    def export_dynamic_quantized_onnx_model(model, quantization, path):
+        module.exports += 1
+        time.sleep(0.05)   # long enough for concurrent loaders to overlap
+        with open(os.path.join(path, "onnx", f"model_qint8_{quantization}.onnx"), "wb") as f:
+            f.write(b"onnx")
+
+    module.SentenceTransformer = SentenceTransformer
+    module.export_dynamic_quantized_onnx_model = export_dynamic_quantized_onnx_model
+    return module
+
+
+def test_int8_export_is_kept_only_after_validation(tmp_path, monkeypatch):
+    drifting = fake_sentence_transformers(int8_noise=5.0)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", drifting)
+    with pytest.raises(EncoderConsistencyError):
+        load_model("org/model", "onnx-int8", "avx2", onnx_dir=tmp_path)
+    assert not any(tmp_path.rglob("*.onnx"))  # nothing left to be served next start
+
+    close = fake_sentence_transformers(int8_noise=0.001)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", close)
+    load_model("org/model", "onnx-int8", "avx2", onnx_dir=tmp_path)
+    assert (tmp_path / "org__model" / "avx2" / VALIDATED_FILE).exists()
+    load_model("org/model", "onnx-int8", "avx2", onnx_dir=tmp_path)
+    assert close.exports == 1  # the validated export is reused
+
+
+def test_concurrent_loads_export_once(tmp_path, monkeypatch):
+    fake = fake_sentence_transformers(int8_noise=0.001)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake)
+    with ThreadPoolExecutor(4) as pool:
+        models = list(pool.map(
+            lambda _: load_model("org/model", "onnx-int8", "avx2", onnx_dir=tmp_path), range(4)
+        ))
+    assert len(models) == 4 and fake.exports == 1
+    assert (tmp_path / "org__model" / "avx2" / VALIDATED_FILE).exists()
+
+
+class PidModel:
+    def encode(self, texts):
+        return np.array([[len(t), os.getpid()] for t in texts], dtype=np.float32)
+
+
+def pid_model_loader(model_name, backend):
+    return PidModel()
+
+
+async def test_process_pool_encoder_runs_in_workers():
+    encoder = ProcessPoolEncoder("unused", workers=2, max_pending=3, loader=pid_model_loader)
+    try:
+        vectors = await asyncio.gather(*(encoder.encode("x" * i) for i in range(1, 9)))
+    finally:
+        await encoder.close()
+
+    assert [int(v[0]) for v in vectors] == list(range(1, 9))
+    assert all(int(v[1]) != os.getpid() for v in vectors)
+    stats = encoder.stats()
+    assert stats["calls"] == 8 and stats["in_flight"] == 0
+
+
+def test_sharded_embedder_keeps_input_order():
+    embedder = ShardedEmbedder("unused", workers=2, shard_size=3, loader=pid_model_loader)
+    texts = ["x" * n for n in (5, 1, 9, 3, 7, 2, 8)]
+    try:
+        vectors = embedder(texts)
+        empty = embedder([])
+    finally:
+        embedder.close()
+
+    assert vectors.dtype == np.float32 and vectors.shape == (7, 2)
+    assert [int(v) for v in vectors[:, 0]] == [5, 1, 9, 3, 7, 2, 8]
+    assert all(int(pid) != os.getpid() for pid in vectors[:, 1])
+    assert empty.shape[0] == 0
+    stats = embedder.stats()
+    assert stats["sentences"] == 7 and stats["sentences_per_sec"] > 0
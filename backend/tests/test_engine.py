@@ -0,0 +1,81 @@
+from httpx import ASGITransport, AsyncClient
+
+
+async def test_expand_returns_only_deltas(local_app):
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        first = (await ac.get("/engine/similar/1007")).json()
+        known = [node["id"] for node in first["nodes"]]
+
+        delta = (await ac.post(
+            "/engine/expand",
+            json={"seed_ids": [known[5], "1150"], "known_ids": known, "neighbors": 20},
+            params={"fields": "title"},
+        )).json()
+        missing = await ac.post("/engine/expand", json={"seed_ids": ["nope"]})
+
+    new_ids = {node["id"] for node in delta["nodes"]}
+    assert new_ids and not new_ids & set(known)
+    assert "1150" in new_ids and known[5] not in new_ids
+    assert set(delta["nodes"][0]) == {"id", "title"}
+    for link in delta["links"]:
+        assert (new_ids | {known[5]}) & {link["source"], link["target"]}
+        assert {link["source"], link["target"]} <= new_ids | set(known)
+    # The on-screen seed keeps its links to neighbours that are also on screen
+    seed_links = [link for link in delta["links"] if known[5] in (link["source"], link["target"])]
+    assert len(seed_links) == 20 and all(link["isCentralLink"] for link in seed_links)
+    assert missing.status_code == 404
+
+
+async def test_expand_fetches_only_nearby_known_vectors(local_app):
+    store = local_app.state.index
+    fetched = []
+    original = store.afetch
+
+    async def afetch(ids, **kwargs):
+        fetched.extend(ids)
+        return await original(ids, **kwargs)
+
+    store.afetch = afetch
+    known = [str(1000 + i) for i in range(180)]
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        delta = (await ac.post(
+            "/engine/expand", json={"seed_ids": ["1007"], "known_ids": known[:150], "neighbors": 10},
+        )).json()
+
+    # No mirror: only the seed's neighbourhood is fetched, not all 150 on-screen ids
+    assert len(fetched) <= 11 and "1007" in fetched
+    assert all(node["id"] not in known[:150] for node in delta["nodes"])
+
+
+async def test_expand_wider_than_the_knn_graph(local_app, tmp_path, tiny_catalog):
+    from backend.catalog import load_catalog, write_catalog
+    from backend.knn_graph import load_knn_graph, write_knn_graph
+
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    write_knn_graph(tmp_path, load_catalog(tmp_path), k=5)
+    local_app.state.knn_graph = load_knn_graph(tmp_path)
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        narrow = (await ac.post("/engine/expand", json={"seed_ids": ["1007"], "neighbors": 5})).json()
+        wide = (await ac.post("/engine/expand", json={"seed_ids": ["1007"], "neighbors": 20})).json()
+
+    assert len(narrow["nodes"]) == 6
+    assert len(wide["nodes"]) == 21
+
+
+async def test_launch_combines_search_and_neighbourhood(local_app):
+    store = local_app.state.index
+    calls = []
+    original = store.query
+    store.query = lambda **kwargs: calls.append(kwargs) or original(**kwargs)
+
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        launched = (await ac.post("/engine/launch", json={"query": "lonely astronaut"})).json()
+        search = (await ac.post("/engine/search", json={"query": "lonely astronaut"})).json()
+        top = search["results"][0]["id"]
+        similar = (await ac.get(f"/engine/similar/{top}")).json()
+
+    assert launched["results"] == search["results"]
+    assert launched["graph"] == similar
+    # search (with values) + neighbours; /engine/similar alone needs seed lookup + neighbours
+    assert len(calls) == 2 + 1 + 2
+    assert calls[0]["include_values"] is True and "id" not in calls[1]
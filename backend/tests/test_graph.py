@@ -0,0 +1,105 @@
+import numpy as np
+
+from backend.graph import build_links, delta_links, graph_links, iter_link_blocks, similarity_matrix
+
+
+def _loop_threshold_links(sim, threshold):
+    """Reference implementation: the old nested-loop link builder."""
+    pairs = []
+    n = sim.shape[0]
+    for i in range(n):
+        for j in range(i + 1, n):
+            if sim[i][j] >= threshold:
+                pairs.append((i, j))
+    return pairs
+
+
+def test_threshold_links_match_reference(tiny_catalog):
+    sim = similarity_matrix(tiny_catalog.vectors[:60])
+    ids = tiny_catalog.ids[:60]
+    links = build_links(sim, ids, threshold=0.3)
+
+    expected = _loop_threshold_links(sim, 0.3)
+    assert [(ids.index(link["source"]), ids.index(link["target"])) for link in links] == expected
+    assert all(link["value"] == link["similarity"] for link in links)
+
+
+def test_top_k_bounds_links_per_node(tiny_catalog):
+    sim = similarity_matrix(tiny_catalog.vectors)
+    ids = tiny_catalog.ids
+    links = build_links(sim, ids, threshold=None, k=3, mutual=True)
+
+    degree = {}
+    for link in links:
+        degree[link["source"]] = degree.get(link["source"], 0) + 1
+        degree[link["target"]] = degree.get(link["target"], 0) + 1
+    assert max(degree.values()) <= 3
+
+
+def test_orphans_are_rescued(tiny_catalog):
+    vectors = tiny_catalog.vectors[:40]
+    ids = tiny_catalog.ids[:40]
+    links = graph_links(vectors, ids, threshold=0.99, rescue_orphans=True)
+
+    connected = {link["source"] for link in links} | {link["target"] for link in links}
+    assert connected == set(ids)
+    assert all(link["value"] >= 0.1 for link in links)
+
+
+def test_hub_links_flag_central_node(tiny_catalog):
+    vectors = tiny_catalog.vectors[:10]
+    ids = tiny_catalog.ids[:10]
+    links = graph_links(vectors, ids, threshold=0.99, hub=0)
+
+    central = [link for link in links if link["isCentralLink"]]
+    assert len(central) == 9
+    assert all(ids[0] in (link["source"], link["target"]) for link in central)
+    np.testing.assert_allclose(
+        sorted(link["value"] for link in central),
+        sorted(similarity_matrix(vectors)[0, 1:].tolist()),
+        rtol=1e-5,
+    )
+
+
+def test_delta_links_touch_new_nodes_or_seeds():
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(40, 8)).astype(np.float32)
+    ids = [f"m{i}" for i in range(40)]
+    new, known = list(range(10)), list(range(10, 40))
+
+    links = delta_links(
+        vectors[new], [ids[i] for i in new], vectors[known], [ids[i] for i in known],
+        threshold=0.3, hub_pairs=[("m12", "m3"), ("m12", "m13")],
+    )
+
+    sim = similarity_matrix(vectors)
+    full = {
+        (link["source"], link["target"]): link["value"]
+        for link in build_links(sim, ids, threshold=0.3)
+    }
+    new_ids = {ids[i] for i in new}
+    expected = {pair for pair in full if new_ids & set(pair)}
+    got = {(link["source"], link["target"]) for link in links}
+    assert expected <= got
+    # Hub links are kept below the threshold, even between two known nodes
+    assert got - expected <= {("m3", "m12"), ("m12", "m13")}
+    assert all((new_ids | {"m12"}) & {link["source"], link["target"]} for link in links)
+    central = {(c["source"], c["target"]): c["value"] for c in links if c["isCentralLink"]}
+    assert set(central) == {("m3", "m12"), ("m12", "m13")}
+    assert np.isclose(central[("m12", "m13")], sim[12, 13], atol=1e-5)
+
+
+def test_delta_links_for_an_on_screen_neighbourhood():
+    vectors = np.random.default_rng(4).normal(size=(5, 8)).astype(np.float32)
+    ids = [f"m{i}" for i in range(5)]
+    links = delta_links([], [], vectors, ids, threshold=0.99, hub_pairs=[("m0", mid) for mid in ids[1:]])
+    assert [(link["source"], link["target"]) for link in links] == [("m0", mid) for mid in ids[1:]]
+
+
+def test_link_blocks_match_threshold_links(tiny_catalog):
+    vectors, ids = tiny_catalog.vectors[:150], tiny_catalog.ids[:150]
+    blocks = list(iter_link_blocks(vectors, ids, threshold=0.3, block_rows=32))
+    assert len(blocks) == 5
+    streamed = [(link["source"], link["target"]) for block in blocks for link in block]
+    expected = [(link["source"], link["target"]) for link in graph_links(vectors, ids, threshold=0.3)]
+    assert streamed == expected
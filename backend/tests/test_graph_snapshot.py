@@ -0,0 +1,82 @@
+import orjson
+from httpx import ASGITransport, AsyncClient
+
+from backend.graph_snapshot import GraphSnapshotStore, catalog_version, etag_matches
+from backend.metadata_store import MetadataStore
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+async def test_snapshot_is_built_once_per_version(tiny_catalog):
+    builds = []
+
+    async def builder():
+        builds.append(1)
+        return {"nodes": [], "links": [], "total": len(builds)}
+
+    version = catalog_version(tiny_catalog)
+    snapshots = GraphSnapshotStore(builder, version=version)
+    first = await snapshots.get()
+    assert await snapshots.get() is first
+    assert first.etag == f'"{version}"'
+    assert orjson.loads(first.body)["total"] == 1
+
+    snapshots.invalidate(version="next")
+    assert (await snapshots.get()).etag == '"next"'
+    assert len(builds) == 2
+
+
+async def test_movies_endpoint_revalidates_with_etag(local_app, tiny_catalog):
+    local_app.state.metadata_store = MetadataStore(tiny_catalog)
+
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        first = await ac.get("/movies")
+        etag = first.headers["etag"]
+        revalidated = await ac.get("/movies", headers={"If-None-Match": etag})
+        legacy = await ac.get("/graph")
+
+    assert first.status_code == 200 and "max-age" in first.headers["cache-control"]
+    assert first.json()["total"] == 180
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert legacy.content == first.content
+
+
+async def test_new_catalog_version_replaces_the_snapshot(local_app, tiny_catalog, tmp_path):
+    from backend.catalog import load_catalog, read_catalog_version, write_catalog
+    from backend.catalog_refresh import CatalogRefresher
+    from backend.main import build_movies_graph
+    from backend.vector_mirror import VectorMirror
+    from backend.vector_store import LocalVectorStore
+
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    catalog = load_catalog(tmp_path, mmap=True)
+    state = local_app.state
+    state.index = LocalVectorStore(catalog, ann="ivf")
+    state.metadata_store = MetadataStore(catalog)
+    state.vector_mirror = VectorMirror(tmp_path)
+    state.graph_snapshots = GraphSnapshotStore(
+        lambda: build_movies_graph(state.index, state.metadata_store, state.vector_mirror),
+        version=catalog.version,
+    )
+    state.catalog_refresher = CatalogRefresher(state, tmp_path, catalog.version, check_interval=0, ann="ivf")
+
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        first = await ac.get("/movies")
+        assert (await ac.get("/movies", headers={"If-None-Match": first.headers["etag"]})).status_code == 304
+
+        # Re-ingest publishes a smaller catalog
+        write_catalog(tmp_path, tiny_catalog.ids[:100], tiny_catalog.vectors[:100], tiny_catalog.metadata[:100])
+        second = await ac.get("/movies", headers={"If-None-Match": first.headers["etag"]})
+
+    assert second.status_code == 200
+    assert second.headers["etag"] == f'"{read_catalog_version(tmp_path)}"' != first.headers["etag"]
+    assert second.json()["total"] == 90
+    assert len(state.metadata_store.catalog) == 100
+    assert len(state.index.catalog) == 100 and state.index.ann is not None
+    assert len(state.vector_mirror) == 100
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from backend.catalog import load_catalog
+from backend.ingest_checkpoint import IngestCheckpoint
+from backend.ingest_pipeline import run_pipeline
+from backend.tests.test_ingest_pipeline import FakeIndex, fake_embed, items
+
+SMALL = dict(embed_batch_size=20, upsert_batch_size=10, upsert_workers=2, retry_delay=0.0)
+
+
+def counting_embed(calls):
+    def embed(texts):
+        calls.extend(texts)
+        return fake_embed(texts)
+    return embed
+
+
+async def test_dropped_upserts_are_retried_on_the_next_run(tmp_path):
+    async def flaky_upsert(vectors):
+        if any(v["id"] == "42" for v in vectors):
+            raise RuntimeError("Pinecone outage")
+
+    checkpoint = IngestCheckpoint(tmp_path)
+    first = await run_pipeline(items(60), embed=fake_embed, upsert=flaky_upsert, checkpoint=checkpoint, **SMALL)
+    assert first.upsert.failed == 10 and checkpoint.pending_rows() == 10
+    checkpoint.close()
+
+    # Rerun with the same source: nothing is re-embedded, only the dropped rows go out
+    embedded = []
+    index = FakeIndex()
+    checkpoint = IngestCheckpoint(tmp_path)
+    second = await run_pipeline(
+        items(60), embed=counting_embed(embedded), upsert=index.aupsert, checkpoint=checkpoint, **SMALL
+    )
+    assert embedded == []
+    assert second.resumed_vectors == 10
+    assert sorted(index.upserted, key=int) == [str(i) for i in range(40, 50)]
+    np.testing.assert_allclose(index.upserted["42"]["values"], [43, 1, 0, 0])
+    assert checkpoint.pending_rows() == 0
+
+
+async def test_a_crashed_run_resumes_without_refetching(tmp_path):
+    async def crashing(n):
+        async for item in items(n):
+            yield item
+        raise ConnectionError("TMDB went away")
+
+    checkpoint = IngestCheckpoint(tmp_path)
+    with pytest.raises(ConnectionError):
+        await run_pipeline(crashing(45), embed=fake_embed, upsert=FakeIndex().aupsert, checkpoint=checkpoint, **SMALL)
+    checkpoint.close()
+
+    checkpoint = IngestCheckpoint(tmp_path)
+    assert len(checkpoint.known_ids) == 45
+    already_embedded = len(checkpoint.embedded_ids)
+    embedded = []
+    index = FakeIndex()
+    stats = await run_pipeline(
+        items(60), embed=counting_embed(embedded), upsert=index.aupsert, checkpoint=checkpoint, **SMALL
+    )
+    # Only records that never reached a shard, and new ones, are embedded
+    assert len(embedded) == 60 - already_embedded
+    assert stats.resumed_records > 0
+    assert checkpoint.pending_rows() == 0
+    assert len(checkpoint.embedded_ids) == 60
+
+    assert checkpoint.write_catalog(tmp_path / "catalog") == 60
+    catalog = load_catalog(tmp_path / "catalog")
+    assert sorted(catalog.ids, key=int) == [str(i) for i in range(60)]
+    checkpoint.clear()
+    assert not tmp_path.joinpath("records.jsonl").exists()
+
+
+def test_torn_lines_are_ignored(tmp_path):
+    checkpoint = IngestCheckpoint(tmp_path)
+    checkpoint.record({"id": "1", "text": "movie 1", "metadata": {}})
+    name = checkpoint.write_shard(["1"], np.ones((1, 4)), [{}])
+    checkpoint.mark_upserted(name, 0, 1)
+    checkpoint.close()
+    with open(tmp_path / "records.jsonl", "a") as f:
+        f.write('{"id": "2", "te')
+    with open(tmp_path / "upserted.log", "a") as f:
+        f.write(f"{name} 0")
+
+    reopened = IngestCheckpoint(tmp_path)
+    assert reopened.record_ids == {"1"}
+    assert reopened.pending_rows() == 0
+    assert list(reopened.pending_chunks(10)) == []
+    reopened.record({"id": "3", "text": "movie 3", "metadata": {}})
+    reopened.close()
+    assert IngestCheckpoint(tmp_path).record_ids == {"1", "3"}
+
+
+def test_pending_chunks_split_runs(tmp_path):
+    checkpoint = IngestCheckpoint(tmp_path)
+    name = checkpoint.write_shard([str(i) for i in range(25)], np.ones((25, 4)), [{}] * 25)
+    checkpoint.mark_upserted(name, 5, 10)
+    assert list(checkpoint.pending_chunks(8)) == [(name, 0, 5), (name, 10, 18), (name, 18, 25)]
+    checkpoint.close()
@@ -0,0 +1,48 @@
+import numpy as np
+
+from backend.catalog import load_catalog, update_catalog, write_catalog
+from backend.ingest_manifest import (
+    METADATA, NEW, TEXT, UNCHANGED, IngestManifest, embedding_text,
+)
+
+
+def test_classify_separates_text_and_metadata_changes(tmp_path):
+    manifest = IngestManifest()
+    text = embedding_text("Heat", "Crime", "A heist in LA.")
+    manifest.record("949", text, {"title": "Heat", "rating": 8.3})
+
+    assert manifest.classify("949", text, {"rating": 8.3, "title": "Heat"}) == UNCHANGED
+    assert manifest.classify("949", text, {"title": "Heat", "rating": 8.4}) == METADATA
+    assert manifest.classify("949", text + " Again.", {"title": "Heat", "rating": 8.3}) == TEXT
+    assert manifest.classify("1", text, {}) == NEW
+
+    manifest.save(tmp_path)
+    loaded = IngestManifest.load(tmp_path)
+    assert loaded.movies == manifest.movies and loaded.updated_on is not None
+    assert IngestManifest.load(tmp_path / "missing") is None
+
+
+def test_bootstrap_from_catalog(tiny_catalog):
+    manifest = IngestManifest.from_catalog(tiny_catalog)
+    meta = tiny_catalog.metadata[3]
+    text = embedding_text(meta["title"], meta["genres"], meta["overview"])
+    assert len(manifest) == len(tiny_catalog)
+    assert manifest.classify(tiny_catalog.ids[3], text, meta) == UNCHANGED
+
+
+def test_update_catalog_replaces_only_the_given_rows(tmp_path, tiny_catalog):
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    new_vector = np.arange(16, dtype=np.float32)
+    rows = update_catalog(
+        tmp_path,
+        vectors={"1005": new_vector, "9999": np.ones(16)},
+        metadata={"1007": {"title": "Renamed"}, "9999": {"title": "Added"}},
+    )
+
+    catalog = load_catalog(tmp_path)
+    assert rows == len(catalog) == len(tiny_catalog) + 1
+    np.testing.assert_allclose(catalog.vectors[5], new_vector / np.linalg.norm(new_vector), rtol=1e-6)
+    np.testing.assert_allclose(catalog.vectors[6], tiny_catalog.vectors[6])
+    assert catalog.metadata[7] == {"title": "Renamed"}
+    assert catalog.metadata[5] == tiny_catalog.metadata[5]
+    assert catalog.ids[-1] == "9999" and catalog.metadata[-1] == {"title": "Added"}
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from backend.catalog import CatalogWriter, load_catalog
+from backend.ingest_pipeline import IngestItem, run_pipeline
+
+
+async def items(n: int):
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield IngestItem(id=str(i), text=f"movie {i}", metadata={"title": f"Movie {i}"})
+
+
+def fake_embed(texts):
+    return np.array([[float(t.split()[-1]) + 1, 1.0, 0.0, 0.0] for t in texts])
+
+
+class FakeIndex:
+    def __init__(self, delay: float = 0.0, fail_first: int = 0):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.upserted = {}
+        self.active = self.peak = 0
+
+    async def aupsert(self, vectors):
+        if self.fail_first:
+            self.fail_first -= 1
+            raise RuntimeError("transient")
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        self.upserted.update({v["id"]: v for v in vectors})
+        return len(vectors)
+
+
+async def test_every_item_is_embedded_upserted_and_written(tmp_path):
+    index = FakeIndex(delay=0.01, fail_first=1)
+    writer = CatalogWriter(tmp_path)
+    stats = await run_pipeline(
+        items(250), embed=fake_embed, upsert=index.aupsert, sink=writer.append,
+        embed_batch_size=64, upsert_batch_size=20, upsert_workers=3, retry_delay=0.0,
+    )
+    writer.commit()
+
+    assert stats.fetch.items == stats.embed.items == stats.upsert.items == 250
+    assert stats.upsert.failed == 0
+    assert sorted(index.upserted, key=int) == [str(i) for i in range(250)]
+    assert index.peak == 3
+    np.testing.assert_allclose(index.upserted["7"]["values"], [8, 1, 0, 0])
+
+    catalog = load_catalog(tmp_path)
+    assert catalog.ids == [str(i) for i in range(250)]
+    assert catalog.metadata[7] == {"title": "Movie 7"}
+    np.testing.assert_allclose(np.linalg.norm(catalog.vectors, axis=1), 1.0, rtol=1e-5)
+    assert not (tmp_path / CatalogWriter.STAGING_DIR).exists()
+
+
+async def test_queues_apply_back_pressure():
+    fetched = upserted = ahead = 0
+
+    async def counted(n):
+        nonlocal fetched, ahead
+        async for item in items(n):
+            fetched += 1
+            ahead = max(ahead, fetched - upserted)
+            yield item
+
+    async def slow_upsert(vectors):
+        nonlocal upserted
+        await asyncio.sleep(0.002)
+        upserted += len(vectors)
+
+    stats = await run_pipeline(
+        counted(400), embed=fake_embed, upsert=slow_upsert,
+        embed_batch_size=10, upsert_batch_size=10, upsert_workers=1, queue_depth=2,
+    )
+    assert stats.upsert.items == 400
+    assert stats.fetch.blocked > 0
+    # Two queues of two batches plus one batch per stage in hand
+    assert ahead <= 80
+
+
+async def test_failed_batches_are_counted_and_source_errors_abort():
+    async def broken_upsert(vectors):
+        raise RuntimeError("down")
+
+    stats = await run_pipeline(
+        items(30), embed=fake_embed, upsert=broken_upsert,
+        embed_batch_size=10, upsert_batch_size=10, max_retries=2, retry_delay=0.0,
+    )
+    assert stats.upsert.failed == 30 and stats.upsert.items == 0
+
+    async def failing_source():
+        yield IngestItem(id="1", text="movie 1", metadata={})
+        raise ValueError("TMDB down")
+
+    with pytest.raises(ValueError, match="TMDB down"):
+        await run_pipeline(failing_source(), embed=fake_embed, upsert=FakeIndex().aupsert)
+
+
+async def test_embedding_runs_off_the_event_loop():
+    loop_thread = threading.get_ident()
+    threads = set()
+
+    def embed(texts):
+        threads.add(threading.get_ident())
+        return fake_embed(texts)
+
+    await run_pipeline(items(5), embed=embed, upsert=FakeIndex().aupsert)
+    assert threads and loop_thread not in threads
@@ -0,0 +1,67 @@
+import numpy as np
+from httpx import ASGITransport, AsyncClient
+
+from backend.catalog import load_catalog, write_catalog
+from backend.graph import similarity_matrix
+from backend.knn_graph import load_knn_graph, write_knn_graph
+from backend.main import app
+from backend.vector_store import LocalVectorStore
+
+
+def test_neighbors_match_exact_search(tmp_path, tiny_catalog):
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    write_knn_graph(tmp_path, load_catalog(tmp_path), k=10, threshold=0.3)
+    graph = load_knn_graph(tmp_path)
+    store = LocalVectorStore(tiny_catalog)
+
+    matches, links = graph.neighborhood("1007")
+
+    expected = [m.id for m in store.query(id="1007", top_k=11).matches]
+    assert [m.id for m in matches] == expected
+    assert sum(link["isCentralLink"] for link in links) == 10
+
+    rows = [tiny_catalog.row_of(m.id) for m in matches]
+    sim = similarity_matrix(tiny_catalog.vectors[rows])
+    for link in links:
+        if not link["isCentralLink"]:
+            a = rows[[m.id for m in matches].index(link["source"])]
+            b = rows[[m.id for m in matches].index(link["target"])]
+            assert link["similarity"] >= 0.3
+            assert np.isclose(link["similarity"], tiny_catalog.vectors[a] @ tiny_catalog.vectors[b], atol=1e-5)
+    assert sum(not link["isCentralLink"] for link in links) == int((np.triu(sim[1:, 1:], 1) >= 0.3).sum())
+
+
+def test_stale_graph_is_ignored(tmp_path, tiny_catalog):
+    write_knn_graph(tmp_path, tiny_catalog, k=5)
+    half = len(tiny_catalog) // 2
+    write_catalog(tmp_path, tiny_catalog.ids[:half], tiny_catalog.vectors[:half], tiny_catalog.metadata[:half])
+    assert load_knn_graph(tmp_path) is None
+
+
+def test_graph_for_reordered_catalog_is_ignored(tmp_path, tiny_catalog):
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    write_knn_graph(tmp_path, load_catalog(tmp_path), k=5)
+    assert load_knn_graph(tmp_path) is not None
+
+    # Same row count, different rows: neighbour row numbers no longer apply
+    order = np.roll(np.arange(len(tiny_catalog)), 1)
+    write_catalog(tmp_path, [tiny_catalog.ids[i] for i in order], tiny_catalog.vectors[order],
+                  [tiny_catalog.metadata[i] for i in order])
+    assert load_knn_graph(tmp_path) is None
+
+
+async def test_engine_similar_served_from_knn_graph(tmp_path, tiny_catalog):
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    write_knn_graph(tmp_path, load_catalog(tmp_path), k=8)
+    app.state.knn_graph = load_knn_graph(tmp_path)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.get("/engine/similar/1003")
+    finally:
+        app.state.knn_graph = None
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["centralNodeId"] == "1003"
+    assert len(body["nodes"]) == 9
+    assert body["nodes"][0]["isCentralNode"] is True
@@ -0,0 +1,64 @@
+import numpy as np
+from httpx import ASGITransport, AsyncClient
+
+from backend.metadata_store import MetadataStore
+
+
+def test_browse_filters_and_sorts(tiny_catalog):
+    store = MetadataStore(tiny_catalog)
+
+    rows, total = store.browse(sort="rating", genre="Drama", min_rating=5, limit=10)
+    assert total == 20  # Drama is every 5th movie, ratings 5..9 are half of them
+    ratings = store.rating[rows]
+    assert list(ratings) == sorted(ratings, reverse=True)
+    assert all("Drama" in store.genre_text[row] for row in rows)
+
+    rows, total = store.browse(sort="year", descending=False, year_range=(1990, 1999))
+    assert total == 50
+    assert np.all(np.diff(store.year[rows]) >= 0)
+
+    rows, _ = store.browse(require_poster=True, limit=5)
+    assert [tiny_catalog.ids[row] for row in rows] == ["1001", "1002", "1003", "1004", "1005"]
+
+    assert store.browse(genre="Western")[1] == 0
+
+
+async def test_api_search_browse_uses_store(local_app, tiny_catalog):
+    local_app.state.metadata_store = MetadataStore(tiny_catalog)
+    local_app.state.index.query = lambda **kwargs: (_ for _ in ()).throw(AssertionError("no query"))
+
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        first = (await ac.get("/api/search", params={"genre": "Comedy", "limit": 15})).json()
+        assert first["total"] == 40 and first["hasMore"]
+        second = (await ac.get("/api/search", params={"cursor": first["nextCursor"], "limit": 15})).json()
+        bad_sort = await ac.get("/api/search", params={"sort": "title"})
+        movies = (await ac.get("/movies")).json()
+
+    ids = [m["id"] for m in first["movies"] + second["movies"]]
+    assert len(set(ids)) == 30
+    popularity = [m["popularity"] for m in first["movies"] + second["movies"]]
+    assert popularity == sorted(popularity, reverse=True)
+    assert bad_sort.status_code == 400
+    assert movies["total"] == 180  # every movie with a poster
+    assert all(node["poster"] for node in movies["nodes"])
+
+
+def test_genre_filter_matches_search_filter(tiny_catalog):
+    from backend.catalog import Catalog
+    from backend.main import build_metadata_filter
+    from backend.metadata_store import split_genres
+    from backend.vector_store import MetadataColumns
+
+    metadata = [dict(meta) for meta in tiny_catalog.metadata]
+    for i, meta in enumerate(metadata):
+        if i % 3 == 0:
+            meta["genres"] = f"Action, {meta['genres']}"
+        meta["genre_list"] = split_genres(meta["genres"])
+    catalog = Catalog(ids=tiny_catalog.ids, vectors=tiny_catalog.vectors, metadata=metadata)
+
+    columns = MetadataColumns(metadata)
+    for genre in ("Drama", "Action", "Western"):
+        browse = MetadataStore(catalog).mask(genre=genre)
+        search = columns.mask(build_metadata_filter(genre, None, None))
+        assert np.array_equal(browse, search)
+    assert MetadataStore(catalog).mask(genre="Drama").sum() == 40
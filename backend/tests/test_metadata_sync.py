@@ -0,0 +1,64 @@
+from contextlib import asynccontextmanager
+
+from backend.metadata_sync import (
+    COLUMNS, CREATE_STAGING, MERGE_STAGING, STAGING_TABLE, TITLE_MAX_LENGTH,
+    asyncpg_dsn, movie_rows, sync_movie_metadata,
+)
+
+
+class FakeConnection:
+    """Records the statements an asyncpg connection would run."""
+
+    def __init__(self, changed_per_batch=None):
+        self.calls = []
+        self.transactions = 0
+        self.changed_per_batch = changed_per_batch
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    async def execute(self, query):
+        self.calls.append(("execute", query))
+        if query is MERGE_STAGING:
+            rows = self.calls[-2][1]
+            changed = len(rows) if self.changed_per_batch is None else self.changed_per_batch
+            return f"INSERT 0 {changed}"
+        return "CREATE TABLE"
+
+    async def copy_records_to_table(self, table, records, columns):
+        assert table == STAGING_TABLE and tuple(columns) == COLUMNS
+        self.calls.append(("copy", list(records)))
+
+
+def test_movie_rows_normalises_catalog_metadata():
+    rows = list(movie_rows(
+        ["603", 27205],
+        [{"title": "The Matrix", "year": 1999, "rating": 8.2},
+         {"title": "x" * 600, "year": 0}],
+    ))
+    assert rows[0] == ("603", "The Matrix", 1999, 8.2)
+    assert rows[1] == ("27205", "x" * TITLE_MAX_LENGTH, None, None)
+
+
+def test_asyncpg_dsn_strips_the_sqlalchemy_driver():
+    assert asyncpg_dsn("postgresql+asyncpg://u:p@db:5432/nebula") == "postgresql://u:p@db:5432/nebula"
+
+
+async def test_sync_copies_and_merges_one_transaction_per_batch():
+    conn = FakeConnection()
+    rows = [(str(i), f"Movie {i}", 2000 + i, 7.0) for i in range(5)]
+    written = await sync_movie_metadata(conn, iter(rows), batch_size=2)
+
+    assert written == 5
+    assert conn.calls[0] == ("execute", CREATE_STAGING)
+    copies = [records for kind, records in conn.calls if kind == "copy"]
+    assert copies == [rows[0:2], rows[2:4], rows[4:5]]
+    assert conn.transactions == 3
+    assert [query for kind, query in conn.calls[1:] if kind == "execute"] == [MERGE_STAGING] * 3
+
+
+async def test_sync_counts_only_changed_rows():
+    conn = FakeConnection(changed_per_batch=0)
+    assert await sync_movie_metadata(conn, movie_rows(["1"], [{"title": "A"}])) == 0
@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from backend.pinecone_client import AsyncPineconeIndex, VectorStoreError, VectorStoreTimeout
+from backend.vector_store import LocalVectorStore
+
+
+def stand_in_server(store: LocalVectorStore, delay: float = 0.0):
+    """Minimal Pinecone data-plane stand-in backed by a LocalVectorStore."""
+    server = FastAPI()
+    server.state.active = server.state.peak = 0
+    server.state.upserted = {}
+
+    @server.post("/query")
+    async def query(request: Request):
+        assert request.headers["api-key"] == "secret"
+        body = await request.json()
+        server.state.active += 1
+        server.state.peak = max(server.state.peak, server.state.active)
+        await asyncio.sleep(delay)
+        server.state.active -= 1
+        result = store.query(
+            vector=body.get("vector"), id=body.get("id"), top_k=body["topK"],
+            filter=body.get("filter"), include_values=body["includeValues"],
+            include_metadata=body["includeMetadata"],
+        )
+        return {"matches": [m.__dict__ for m in result.matches], "namespace": ""}
+
+    @server.get("/vectors/fetch")
+    async def fetch(request: Request):
+        result = store.fetch(request.query_params.getlist("ids"))
+        return {"vectors": {mid: {"values": m.values, "metadata": m.metadata} for mid, m in result.vectors.items()}}
+
+    @server.post("/vectors/upsert")
+    async def upsert(request: Request):
+        body = await request.json()
+        server.state.upserted.update({v["id"]: v for v in body["vectors"]})
+        return {"upsertedCount": len(body["vectors"])}
+
+    @server.post("/vectors/update")
+    async def update(request: Request):
+        body = await request.json()
+        server.state.upserted[body["id"]]["metadata"].update(body["setMetadata"])
+        return {}
+
+    return server
+
+
+def client_for(server, **kwargs) -> AsyncPineconeIndex:
+    return AsyncPineconeIndex(
+        "http://pinecone.test", "secret", transport=httpx.ASGITransport(app=server), **kwargs
+    )
+
+
+async def test_query_and_fetch_match_the_local_store(tiny_catalog):
+    store = LocalVectorStore(tiny_catalog)
+    index = client_for(stand_in_server(store))
+
+    remote = await index.aquery(id="1005", top_k=5, include_metadata=True, filter={"year": {"$gte": 2000}})
+    local = store.query(id="1005", top_k=5, include_metadata=True, filter={"year": {"$gte": 2000}})
+    assert [m.id for m in remote.matches] == [m.id for m in local.matches]
+    assert remote.matches[0].metadata["title"] == local.matches[0].metadata["title"]
+
+    fetched = await index.afetch(["1001", "1002", "missing"])
+    assert sorted(fetched.vectors) == ["1001", "1002"]
+    assert len(fetched.vectors["1001"].values) == 16
+    await index.aclose()
+
+
+async def test_concurrency_is_bounded(tiny_catalog):
+    server = stand_in_server(LocalVectorStore(tiny_catalog), delay=0.02)
+    index = client_for(server, max_concurrency=2)
+
+    vector = tiny_catalog.vectors[0].tolist()
+    results = await asyncio.gather(*(index.aquery(vector=vector, top_k=3) for _ in range(8)))
+    assert all(len(r.matches) == 3 for r in results)
+    assert server.state.peak == 2
+    assert index.stats()["calls"] == 8 and index.stats()["in_flight"] == 0
+    await index.aclose()
+
+
+async def test_timeouts_and_errors_are_surfaced(tiny_catalog):
+    slow = client_for(stand_in_server(LocalVectorStore(tiny_catalog), delay=1.0), timeout=0.05)
+    with pytest.raises(VectorStoreTimeout):
+        await slow.aquery(id="1001", top_k=1)
+    assert slow.stats()["timeouts"] == 1
+    await slow.aclose()
+
+    broken = client_for(FastAPI())  # no routes → 404
+    with pytest.raises(VectorStoreError):
+        await broken.aquery(id="1001", top_k=1)
+    await broken.aclose()
+
+
+async def test_upsert_and_metadata_update(tiny_catalog):
+    server = stand_in_server(LocalVectorStore(tiny_catalog))
+    index = client_for(server)
+    count = await index.aupsert([
+        {"id": "9001", "values": tiny_catalog.vectors[0], "metadata": {"title": "New"}},
+        {"id": "9002", "values": [0.0] * 16, "metadata": {}},
+    ])
+    assert count == 2
+    assert server.state.upserted["9001"]["metadata"] == {"title": "New"}
+    assert server.state.upserted["9001"]["values"] == pytest.approx(tiny_catalog.vectors[0].tolist())
+
+    await index.aupdate("9001", set_metadata={"rating": 7.5})
+    assert server.state.upserted["9001"]["metadata"] == {"title": "New", "rating": 7.5}
+    await index.aclose()
@@ -0,0 +1,73 @@
+import base64
+
+import orjson
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from backend.result_pool import PREFETCH_PAGES, InvalidCursor, decode_cursor, encode_cursor, fetch_depth
+
+
+def test_fetch_depth_adapts_to_requested_page():
+    assert fetch_depth(0, 20) == 20 * PREFETCH_PAGES
+    assert fetch_depth(400, 20) == 440
+    assert fetch_depth(100, 20, previous_depth=100) == 200
+
+
+def test_cursor_roundtrip():
+    params = {"q": "heist", "genre": None, "decade": "1990s", "rating": 7.0, "min_year": None}
+    assert decode_cursor(encode_cursor("abc", 40, params)) == ("abc", 40, params)
+
+
+@pytest.mark.parametrize("params", [
+    {"q": "heist"},                                                              # keys missing
+    {"q": "heist", "genre": None, "decade": None, "rating": "7", "min_year": None},  # wrong type
+    {"q": 1, "genre": None, "decade": None, "rating": None, "min_year": None},
+    {"q": "heist", "genre": None, "decade": None, "rating": None, "min_year": None, "sort": 3},
+    ["heist"],
+])
+def test_tampered_cursor_params_are_rejected(params):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor("abc", 40, params))
+
+
+async def test_tampered_cursor_is_a_400(local_app):
+    raw = orjson.dumps({"p": "abc", "o": 0, "q": {"q": "heist"}})
+    cursor = base64.urlsafe_b64encode(raw).decode("ascii")
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        response = await ac.get("/api/search", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+async def test_cursor_pages_are_served_from_the_pool(local_app):
+    store = local_app.state.index
+    queries = []
+    original_query = store.query
+    store.query = lambda **kwargs: queries.append(kwargs["top_k"]) or original_query(**kwargs)
+
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        first = (await ac.get("/api/search", params={"q": "space heist", "limit": 30})).json()
+        assert first["hasMore"] and first["nextCursor"]
+        assert queries == [30 * PREFETCH_PAGES]
+
+        second = (await ac.get("/api/search", params={"cursor": first["nextCursor"], "limit": 30})).json()
+        assert queries == [30 * PREFETCH_PAGES]  # page 2 served from the pool
+
+        # Scrolling past the prefetched pool refills it with a deeper query
+        seen = first["movies"] + second["movies"]
+        cursor = second["nextCursor"]
+        while cursor:
+            page = (await ac.get("/api/search", params={"cursor": cursor, "limit": 30})).json()
+            seen += page["movies"]
+            cursor = page["nextCursor"]
+
+    assert queries == [150, 300]  # one deeper refill, then exhausted
+    ids = [m["id"] for m in seen]
+    assert len(ids) == len(set(ids)) == 200
+    scores = [m["score"] for m in seen]
+    assert scores == sorted(scores, reverse=True)
+
+
+async def test_invalid_cursor_is_rejected(local_app):
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        response = await ac.get("/api/search", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
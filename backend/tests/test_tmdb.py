@@ -0,0 +1,139 @@
+import asyncio
+import time
+from contextlib import aclosing
+from datetime import date
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from backend.tmdb import TMDBClient, TokenBucket, changed_movie_ids, iter_movie_details, iter_movie_lists
+
+
+def mock_tmdb(pages: int = 3, per_page: int = 4, throttle_first: float = 0.0, status: int = 200):
+    """Tiny TMDB stand-in: /movie/{list} pages whose ids overlap across lists."""
+    server = FastAPI()
+    server.state.hits = []
+    server.state.throttled = False
+
+    @server.get("/3/movie/{endpoint}")
+    async def movie_list(endpoint: str, request: Request):
+        page = int(request.query_params["page"])
+        server.state.hits.append((time.monotonic(), endpoint, page))
+        if status != 200:
+            return JSONResponse({"status_message": "nope"}, status_code=status, headers={"Retry-After": "0.01"})
+        if throttle_first and not server.state.throttled:
+            server.state.throttled = True
+            return JSONResponse({}, status_code=429, headers={"Retry-After": str(throttle_first)})
+        if page > pages:
+            return JSONResponse({"errors": ["page out of range"]}, status_code=422)
+        start = (page - 1) * per_page
+        return {
+            "page": page,
+            "total_pages": pages,
+            "results": [{"id": start + i, "title": f"{endpoint}-{start + i}"} for i in range(per_page)],
+        }
+
+    return server
+
+
+def client_for(server, **kwargs) -> TMDBClient:
+    kwargs.setdefault("rate", 1000)
+    kwargs.setdefault("burst", 100)
+    return TMDBClient("key", base_url="http://tmdb.test/3", transport=httpx.ASGITransport(app=server), **kwargs)
+
+
+async def test_lists_are_fetched_once_per_page_and_deduplicated():
+    server = mock_tmdb(pages=3, per_page=4)
+    async with client_for(server, concurrency=4) as client:
+        movies = [m async for m in iter_movie_lists(client, endpoints=(("popular", 10), ("top_rated", 10)))]
+
+    # Both lists serve ids 0..11; each movie is yielded once
+    assert sorted(m["id"] for m in movies) == list(range(12))
+    # total_pages stops each list after page 3 (workers may probe one page past it)
+    fetched = {(endpoint, page) for _, endpoint, page in server.state.hits}
+    assert {("popular", p) for p in (1, 2, 3)} <= fetched
+    assert max(page for _, _, page in server.state.hits) <= 3 + 4
+
+
+async def test_429_pauses_every_worker():
+    server = mock_tmdb(pages=4, throttle_first=0.2)
+    async with client_for(server, concurrency=4) as client:
+        movies = [m async for m in iter_movie_lists(client, endpoints=(("popular", 4),))]
+        assert client.stats["throttled"] == 1
+
+    assert len(movies) == 16
+    first = server.state.hits[0][0]
+    # Only requests already in flight may land inside the Retry-After window
+    late = [t for t, _, _ in server.state.hits[1:] if t - first < 0.15]
+    assert len(late) <= 3
+
+
+async def test_persistent_429_gives_up():
+    server = mock_tmdb(status=429)
+    async with client_for(server, concurrency=2, max_throttled=3) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            async for _ in iter_movie_lists(client, endpoints=(("popular", 1),)):
+                pass
+        assert client.stats["throttled"] == 4 and client.stats["failed"] == 1
+
+
+async def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    for _ in range(6):
+        await bucket.acquire()
+    # First token is free, the other five wait 1/50 s each
+    assert time.monotonic() - started >= 0.09
+
+
+async def test_breaking_early_cancels_workers():
+    server = mock_tmdb(pages=500, per_page=20)
+    async with client_for(server, concurrency=4, rate=200, burst=10) as client:
+        async with aclosing(iter_movie_lists(client, endpoints=(("popular", 500),))) as movies:
+            async for _ in movies:
+                break
+        await asyncio.sleep(0.05)
+        requests = client.stats["requests"]
+        await asyncio.sleep(0.05)
+        assert client.stats["requests"] == requests
+    assert len(server.state.hits) < 500
+
+
+async def test_auth_errors_reach_the_consumer():
+    server = mock_tmdb(status=401)
+    async with client_for(server, concurrency=2) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            async for _ in iter_movie_lists(client, endpoints=(("popular", 3),)):
+                pass
+
+
+async def test_change_feed_is_read_in_windows_and_details_reshaped():
+    server = FastAPI()
+    server.state.windows = []
+
+    @server.get("/3/movie/changes")
+    async def changes(request: Request):
+        params = request.query_params
+        window = (params["start_date"], params["end_date"])
+        if window not in server.state.windows:
+            server.state.windows.append(window)
+        page = int(params["page"])
+        base = 100 * int(window[0][-2:]) + 10 * page
+        return {"page": page, "total_pages": 2, "results": [{"id": base}, {"id": base + 1}]}
+
+    @server.get("/3/movie/{movie_id}")
+    async def detail(movie_id: int):
+        if movie_id == 404:
+            return JSONResponse({}, status_code=404)
+        return {"id": movie_id, "title": "T", "genres": [{"id": 28, "name": "Action"}]}
+
+    async with client_for(server) as client:
+        ids = await changed_movie_ids(client, date(2024, 1, 1), date(2024, 1, 20))
+        details = [m async for m in iter_movie_details(client, [7, 404, 8])]
+
+    assert sorted(server.state.windows) == [("2024-01-01", "2024-01-14"), ("2024-01-15", "2024-01-20")]
+    assert len(ids) == 8 and all(isinstance(mid, str) for mid in ids)
+    assert sorted(m["id"] for m in details) == [7, 8]
+    assert details[0]["genre_ids"] == [28]
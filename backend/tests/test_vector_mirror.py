@@ -0,0 +1,52 @@
+import numpy as np
+from httpx import ASGITransport, AsyncClient
+
+from backend.catalog import write_catalog
+from backend.graph import graph_links
+from backend.main import SEARCH_LINK_THRESHOLD
+from backend.vector_mirror import VectorMirror, resolve_vectors
+from backend.vector_store import LocalVectorStore
+
+
+async def test_mirror_lookup_refresh_and_fallback(tmp_path, tiny_catalog):
+    half = 100
+    write_catalog(tmp_path, tiny_catalog.ids[:half], tiny_catalog.vectors[:half], tiny_catalog.metadata[:half])
+    mirror = VectorMirror(tmp_path, refresh_interval=0)
+    assert VectorMirror.open(tmp_path / "missing") is None
+
+    matrix, missing = mirror.lookup(["1003", "1150"])
+    np.testing.assert_allclose(matrix[0], tiny_catalog.vectors[3], rtol=1e-6)
+    assert missing == [1]
+
+    # Ids the mirror lacks are fetched from the index
+    store = LocalVectorStore(tiny_catalog)
+    resolved = await resolve_vectors(["1003", "1150"], mirror, store)
+    np.testing.assert_allclose(resolved, tiny_catalog.vectors[[3, 150]], rtol=1e-6)
+
+    # A re-ingested snapshot is picked up; the old map stays readable
+    old_map = mirror.vectors
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    assert mirror.lookup(["1150"])[1] == []
+    assert len(mirror) == 200 and old_map.shape[0] == half
+
+
+async def test_search_skips_include_values_with_mirror(tmp_path, local_app, tiny_catalog):
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    store = local_app.state.index
+    calls = []
+    original = store.query
+    store.query = lambda **kwargs: calls.append(kwargs["include_values"]) or original(**kwargs)
+
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        await ac.post("/search", json={"query": "robots"})
+        local_app.state.vector_mirror = VectorMirror(tmp_path)
+        similar = (await ac.get("/engine/similar/1007")).json()
+        searched = (await ac.post("/search", json={"query": "space westerns"})).json()
+
+    assert calls == [True, False, False]
+    assert len(similar["nodes"]) == 31 and similar["nodes"][0]["id"] == "1007"
+
+    ids = [node["id"] for node in searched["nodes"]]
+    rows = [tiny_catalog.row_of(mid) for mid in ids]
+    expected = graph_links(tiny_catalog.vectors[rows], ids, threshold=SEARCH_LINK_THRESHOLD)
+    assert searched["links"] == expected
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from backend.catalog import load_catalog, write_catalog
+from backend.vector_store import LocalVectorStore
+
+
+def test_exact_query_matches_brute_force(tiny_catalog):
+    store = LocalVectorStore(tiny_catalog)
+    query = tiny_catalog.vectors[3] + 0.1 * tiny_catalog.vectors[7]
+
+    res = store.query(vector=query.tolist(), top_k=5, include_metadata=True)
+
+    expected = np.argsort(-(tiny_catalog.vectors @ (query / np.linalg.norm(query))))[:5]
+    assert [m.id for m in res.matches] == [tiny_catalog.ids[i] for i in expected]
+    assert res.matches[0].metadata["title"] == tiny_catalog.metadata[expected[0]]["title"]
+    assert res.matches[0].values == []
+
+
+def test_query_by_id_returns_self_first(tiny_catalog):
+    store = LocalVectorStore(tiny_catalog)
+    res = store.query(id="1010", top_k=3, include_values=True)
+    assert res.matches[0].id == "1010"
+    assert res.matches[0].score == pytest.approx(1.0, abs=1e-5)
+    assert len(res.matches[0].values) == 16
+    assert store.query(id="missing", top_k=3).matches == []
+
+
+def test_filters_from_build_metadata_filter(tiny_catalog):
+    from backend.main import build_metadata_filter
+
+    store = LocalVectorStore(tiny_catalog)
+    flt = build_metadata_filter("Drama", "2000s", 5.0)
+    res = store.query(vector=[0.1] * 16, top_k=200, filter=flt, include_metadata=True)
+
+    assert res.matches
+    for m in res.matches:
+        assert m.metadata["genres"] == "Drama"
+        assert 2000 <= m.metadata["year"] <= 2009
+        assert m.metadata["rating"] >= 5.0
+
+
+def test_in_and_or_operators(tiny_catalog):
+    store = LocalVectorStore(tiny_catalog)
+    flt = {"$or": [{"genres": {"$in": ["Horror", "Comedy"]}}, {"rating": {"$gt": 8}}]}
+    res = store.query(vector=[0.1] * 16, top_k=200, filter=flt, include_metadata=True)
+    for m in res.matches:
+        assert m.metadata["genres"] in ("Horror", "Comedy") or m.metadata["rating"] > 8
+
+
+def test_ivf_recall(tiny_catalog):
+    exact = LocalVectorStore(tiny_catalog)
+    ivf = LocalVectorStore(tiny_catalog, ann="ivf", nlist=8, nprobe=4)
+    hits = 0
+    for row in range(0, 200, 20):
+        truth = {m.id for m in exact.query(id=tiny_catalog.ids[row], top_k=10).matches}
+        approx = {m.id for m in ivf.query(id=tiny_catalog.ids[row], top_k=10).matches}
+        hits += len(truth & approx)
+    assert hits / 100 >= 0.7
+
+
+def test_catalog_roundtrip(tmp_path, tiny_catalog):
+    write_catalog(tmp_path, tiny_catalog.ids, tiny_catalog.vectors, tiny_catalog.metadata)
+    loaded = load_catalog(tmp_path)
+    assert loaded.ids == tiny_catalog.ids
+    assert loaded.row_of("1005") == 5
+    np.testing.assert_allclose(loaded.vectors, tiny_catalog.vectors, atol=1e-6)
@@ -0,0 +1,158 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects import postgresql
+
+from backend.result_pool import InvalidCursor
+from backend.watchlist import (
+    add_statement, decode_cursor, encode_cursor, page_payload, page_query, remove_statement,
+)
+
+USER_ID = str(uuid.uuid4())
+
+
+def sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect())).replace("\n", " ")
+
+
+def entries(count: int) -> list[tuple]:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        (
+            SimpleNamespace(id=uuid.uuid4(), added_at=start - timedelta(minutes=i)),
+            SimpleNamespace(id=uuid.uuid4(), pinecone_id=str(i), title=f"Movie {i}", rating=7.0),
+        )
+        for i in range(count)
+    ]
+
+
+def test_cursor_round_trip():
+    added_at, entry_id = datetime(2026, 3, 1, 12, tzinfo=timezone.utc), uuid.uuid4()
+    assert decode_cursor(encode_cursor(added_at, entry_id)) == (added_at, entry_id)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_page_query_seeks_past_the_cursor():
+    first = sql(page_query(USER_ID, 20))
+    assert "ORDER BY watchlists.added_at DESC, watchlists.id DESC" in first
+    assert "(watchlists.added_at, watchlists.id) <" not in first
+
+    after = (datetime(2026, 1, 1, tzinfo=timezone.utc), uuid.uuid4())
+    assert "(watchlists.added_at, watchlists.id) < (" in sql(page_query(USER_ID, 20, after))
+
+
+def test_page_payload_sets_next_cursor_only_with_more_rows():
+    rows = entries(3)
+    page = page_payload(rows, 2)
+    assert [item["pinecone_id"] for item in page["items"]] == ["0", "1"]
+    assert decode_cursor(page["nextCursor"]) == (rows[1][0].added_at, rows[1][0].id)
+    assert page_payload(rows[:2], 2)["nextCursor"] is None
+
+
+def test_add_and_remove_are_single_statements():
+    movie_uuid = str(uuid.uuid4())
+    add = sql(add_statement(USER_ID, ["603", movie_uuid, "603"]))
+    assert add.startswith("WITH movies AS")
+    assert "INSERT INTO watchlists (id, user_id, movie_id) SELECT gen_random_uuid()" in add
+    assert "ON CONFLICT (user_id, movie_id) DO NOTHING RETURNING watchlists.id" in add
+    assert "FROM movies) AS found" in add and "FROM added) AS added" in add
+    assert "movie_metadata.pinecone_id IN" in add and "movie_metadata.id IN" in add
+
+    remove = sql(remove_statement(USER_ID, ["603"]))
+    assert remove.startswith("DELETE FROM watchlists WHERE")
+    assert "watchlists.movie_id IN (SELECT movie_metadata.id" in remove
+
+
+class FakeResult:
+    def __init__(self, rows=(), rowcount=0):
+        self.rows = list(rows)
+        self.rowcount = rowcount
+
+    def all(self):
+        return self.rows
+
+    def one(self):
+        return self.rows[0]
+
+
+class FakeSession:
+    def __init__(self):
+        self.result = FakeResult([(0, 0)])
+        self.statements = []
+        self.committed = False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return self.result
+
+    async def commit(self):
+        self.committed = True
+
+
+@pytest.fixture
+async def watchlist_client():
+    from backend.database import get_db
+    from backend.dependencies import get_current_user
+    from backend.main import app
+
+    session = FakeSession()
+    app.dependency_overrides[get_db] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: {"sub": USER_ID}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client, session
+    app.dependency_overrides.clear()
+
+
+async def test_get_watchlist_pages_with_cursor(watchlist_client):
+    client, session = watchlist_client
+    rows = entries(3)
+    session.result = FakeResult(rows)
+
+    page = (await client.get("/api/watchlist", params={"limit": 2})).json()
+    assert len(page["items"]) == 2 and page["nextCursor"]
+
+    session.result = FakeResult(rows[2:])
+    response = await client.get("/api/watchlist", params={"limit": 2, "cursor": page["nextCursor"]})
+    assert response.json()["nextCursor"] is None
+    assert "(watchlists.added_at, watchlists.id) <" in sql(session.statements[-1])
+
+    assert (await client.get("/api/watchlist", params={"cursor": "junk"})).status_code == 400
+
+
+async def test_add_to_watchlist_is_idempotent(watchlist_client):
+    client, session = watchlist_client
+    session.result = FakeResult([(1, 1)])
+    assert (await client.post("/api/watchlist", params={"movie_id": "603"})).json()["added"] is True
+
+    session.result = FakeResult([(1, 0)])   # found, already on the list
+    response = await client.post("/api/watchlist", params={"movie_id": "603"})
+    assert response.status_code == 200 and response.json()["added"] is False
+
+
+async def test_add_to_watchlist_rejects_unknown_movies(watchlist_client):
+    client, session = watchlist_client
+    response = await client.post("/api/watchlist", params={"movie_id": "does-not-exist"})
+    assert response.status_code == 404
+    assert not session.committed
+
+
+async def test_batch_add_and_remove(watchlist_client):
+    client, session = watchlist_client
+    # "603" and its row UUID name one movie already listed; "604" is new, "605" unknown
+    session.result = FakeResult([(2, 1)])
+    response = await client.post(
+        "/api/watchlist/batch", json={"movie_ids": ["603", str(uuid.uuid4()), "604", "605"]},
+    )
+    assert response.json() == {"added": 1, "skipped": 1}
+    assert len(session.statements) == 1 and session.committed
+
+    session.result = FakeResult(rowcount=2)
+    response = await client.post("/api/watchlist/batch/remove", json={"movie_ids": ["603", "604"]})
+    assert response.json() == {"removed": 2}
+    assert sql(session.statements[-1]).startswith("DELETE FROM watchlists")
+
+    assert (await client.post("/api/watchlist/batch", json={"movie_ids": []})).status_code == 422
@@ -0,0 +1,91 @@
+import orjson
+from httpx import ASGITransport, AsyncClient
+
+from backend.metadata_store import MetadataStore
+from backend.wire import graph_payload, parse_fields
+
+PAYLOAD = {
+    "movies": None,
+    "nodes": [
+        {"id": "a", "title": "A", "overview": "long text"},
+        {"id": "b", "title": "B", "overview": "long text"},
+        {"id": "c", "title": "C", "overview": "long text"},
+    ],
+    "links": [
+        {"source": "a", "target": "c", "value": 0.812345, "similarity": 0.812345},
+        {"source": "b", "target": "c", "value": 0.7, "similarity": 0.7},
+    ],
+    "total": 3,
+}
+PAYLOAD["movies"] = PAYLOAD["nodes"]
+
+
+def test_parse_fields_always_keeps_id():
+    assert parse_fields(None) is None
+    assert parse_fields(" title, poster,title ") == ("id", "title", "poster")
+
+
+def test_compact_format_uses_index_triples():
+    compact = graph_payload(PAYLOAD, "compact", "title")
+    assert compact["format"] == "compact"
+    assert "movies" not in compact
+    assert compact["nodes"] == [{"id": "a", "title": "A"}, {"id": "b", "title": "B"}, {"id": "c", "title": "C"}]
+    assert compact["links"] == [[0, 2, 0.8123], [1, 2, 0.7]]
+    assert compact["total"] == 3
+    assert PAYLOAD["nodes"][0]["overview"] == "long text"  # input untouched
+
+
+def test_full_format_projection_keeps_shape():
+    assert graph_payload(PAYLOAD) is PAYLOAD
+    full = graph_payload(PAYLOAD, "full", "title")
+    assert full["movies"] == full["nodes"] and "overview" not in full["nodes"][0]
+    assert full["links"] == PAYLOAD["links"]
+
+
+async def test_graph_endpoints_accept_wire_options(local_app, tiny_catalog):
+    local_app.state.metadata_store = MetadataStore(tiny_catalog)
+
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        full = await ac.get("/movies")
+        compact = await ac.get("/movies", params={"format": "compact", "fields": "title,poster"})
+        search = (await ac.post("/search", params={"format": "compact"}, json={"query": "robots"})).json()
+        bad = await ac.get("/movies", params={"format": "xml"})
+
+    assert len(compact.content) < len(full.content) / 2
+    assert compact.headers["etag"] != full.headers["etag"]
+    body = compact.json()
+    assert set(body["nodes"][0]) == {"id", "title", "poster"}
+    assert len(body["links"]) == len(full.json()["links"])
+    assert all(0 <= i < len(body["nodes"]) and 0 <= j < len(body["nodes"]) for i, j, _ in body["links"])
+    assert search["format"] == "compact" and len(search["nodes"]) == 20
+    assert bad.status_code == 422
+
+
+async def test_search_stream_matches_buffered_response(local_app):
+    async with AsyncClient(transport=ASGITransport(app=local_app), base_url="http://test") as ac:
+        streamed = await ac.post("/search", params={"stream": "true"}, json={"query": "heist", "top_k": 120})
+        buffered = (await ac.post("/search", json={"query": "heist", "top_k": 120})).json()
+        compact = await ac.post(
+            "/search", params={"stream": "true", "format": "compact"}, json={"query": "heist", "top_k": 120}
+        )
+
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    records = [orjson.loads(line) for line in streamed.content.splitlines()]
+    assert [r["type"] for r in records[:1] + records[-1:]] == ["nodes", "summary"]
+    assert len(records) > 3  # several link batches
+    links = [link for r in records if r["type"] == "links" for link in r["links"]]
+    assert records[-1]["totalLinks"] == len(links) and records[-1]["cached"] is False
+
+    # The stream wrote the cache; the buffered call is a hit with the same graph
+    assert buffered["cached"] is True
+    assert buffered["nodes"] == records[0]["nodes"]
+    assert [(link["source"], link["target"]) for link in buffered["links"]] == [
+        (link["source"], link["target"]) for link in links
+    ]
+
+    compact_records = [orjson.loads(line) for line in compact.content.splitlines()]
+    assert compact_records[0]["format"] == "compact"
+    assert compact_records[1]["links"][0][:2] == [
+        next(i for i, n in enumerate(buffered["nodes"]) if n["id"] == buffered["links"][0]["source"]),
+        next(i for i, n in enumerate(buffered["nodes"]) if n["id"] == buffered["links"][0]["target"]),
+    ]
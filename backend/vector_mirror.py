@@ -0,0 +1,136 @@
+"""
+backend/vector_mirror.py
+------------------------
+Memory-mapped local copy of every catalog vector, keyed by movie id.
+
+The graph endpoints need match vectors only to compute cross-similarity
+links. Asking Pinecone for them (``include_values=True``) adds 384
+JSON floats per match — ~200k floats for ``/movies``. With a mirror the
+queries return ids, scores and metadata only, and vectors are looked up
+locally from the catalog snapshot's ``vectors.npy`` (mapped read-only,
+so worker processes share the pages).
+
+The mirror follows the ingest artifact: at most every
+``VECTOR_MIRROR_REFRESH`` seconds it stats ``vectors.npy`` and remaps it
+when the file was replaced (``write_catalog`` writes-then-renames, so an
+old map stays valid while in use). Ids the mirror does not know yet —
+movies upserted after the last snapshot — are fetched from the index
+with :func:`resolve_vectors`.
+
+Usage:
+    mirror = VectorMirror.open(CATALOG_DIR)
+    vectors = await resolve_vectors([m.id for m in matches], mirror, index)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from backend.catalog import CATALOG_DIR, IDS_FILE, VECTORS_FILE
+
+logger = logging.getLogger(__name__)
+
+VECTOR_MIRROR_REFRESH: float = float(os.getenv("VECTOR_MIRROR_REFRESH", "30"))
+FETCH_BATCH_SIZE: int = 200        # ids per index.afetch call for mirror misses
+
+
+class VectorMirror:
+    """Read-only ``id → float32 vector`` lookup over a mapped ``vectors.npy``."""
+
+    def __init__(self, path=CATALOG_DIR, refresh_interval: float = VECTOR_MIRROR_REFRESH):
+        self.path = Path(path)
+        self.refresh_interval = refresh_interval
+        self.vectors: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self.id_to_row: dict[str, int] = {}
+        self._stamp: Optional[tuple[int, int]] = None
+        self._checked_at = 0.0
+        self.reload()
+
+    @classmethod
+    def open(cls, path=CATALOG_DIR, **kwargs) -> Optional["VectorMirror"]:
+        """Return a mirror of the snapshot at *path*, or ``None`` if there is none."""
+        if not (Path(path) / VECTORS_FILE).exists():
+            return None
+        return cls(path, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.id_to_row)
+
+    def _current_stamp(self) -> tuple[int, int]:
+        stat = (self.path / VECTORS_FILE).stat()
+        return stat.st_ino, stat.st_mtime_ns
+
+    def reload(self) -> bool:
+        """(Re)map the snapshot if it changed; returns True when remapped."""
+        stamp = self._current_stamp()
+        if stamp == self._stamp:
+            return False
+        vectors = np.load(self.path / VECTORS_FILE, mmap_mode="r")
+        ids = json.loads((self.path / IDS_FILE).read_text(encoding="utf-8"))
+        if len(ids) != vectors.shape[0]:
+            # Caught between the ids and vectors renames of a re-ingest
+            logger.warning("Vector mirror: ids/vectors length mismatch, keeping previous map")
+            return False
+        self.vectors = vectors
+        self.id_to_row = {str(mid): row for row, mid in enumerate(ids)}
+        self._stamp = stamp
+        logger.info("Vector mirror mapped %d vectors from %s", len(ids), self.path)
+        return True
+
+    def maybe_refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval:
+            return
+        self._checked_at = now
+        try:
+            self.reload()
+        except Exception as exc:
+            logger.warning("Vector mirror refresh failed (serving previous map): %s", exc)
+
+    def lookup(self, ids: Sequence[str]) -> tuple[np.ndarray, list[int]]:
+        """
+        Return ``(matrix, missing)``: one row per id (zeros where unknown)
+        and the positions of the ids the mirror does not hold.
+        """
+        self.maybe_refresh()
+        rows = np.array([self.id_to_row.get(mid, -1) for mid in ids], dtype=np.int64)
+        dimension = self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+        matrix = np.zeros((len(ids), dimension), dtype=np.float32)
+        found = rows >= 0
+        matrix[found] = self.vectors[rows[found]]
+        return matrix, np.flatnonzero(~found).tolist()
+
+
+async def resolve_vectors(ids: Sequence[str], mirror: Optional[VectorMirror], index) -> np.ndarray:
+    """
+    Vectors for *ids*, from the mirror where possible and from
+    ``index.afetch`` for the rest (or for all of them without a mirror),
+    in concurrent batches of ``FETCH_BATCH_SIZE``. Unknown ids get zero rows.
+    """
+    if mirror is not None:
+        matrix, missing = mirror.lookup(ids)
+    else:
+        matrix, missing = None, list(range(len(ids)))
+    if not missing:
+        return matrix if matrix is not None else np.zeros((0, 0), dtype=np.float32)
+
+    wanted = [ids[pos] for pos in missing]
+    responses = await asyncio.gather(*(
+        index.afetch(wanted[start:start + FETCH_BATCH_SIZE])
+        for start in range(0, len(wanted), FETCH_BATCH_SIZE)
+    ))
+    fetched = {mid: match for response in responses for mid, match in response.vectors.items()}
+    if matrix is None:
+        dimension = next((len(m.values) for m in fetched.values()), 0)
+        matrix = np.zeros((len(ids), dimension), dtype=np.float32)
+    for pos in missing:
+        match = fetched.get(ids[pos])
+        if match is not None and len(match.values) == matrix.shape[1]:
+            matrix[pos] = match.values
+    return matrix
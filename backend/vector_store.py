@@ -0,0 +1,429 @@
+"""
+backend/vector_store.py
+-----------------------
+Vector-store abstraction used by every search endpoint.
+
+Two implementations satisfy :class:`VectorStore`:
+
+    - AsyncPineconeIndex   : the remote production index, queried over
+                             pooled async HTTP (see ``backend/pinecone_client.py``)
+    - LocalVectorStore     : an in-process index over a catalog snapshot
+                             (see ``backend/catalog.py``)
+
+Both expose the subset of the Pinecone query API the endpoints rely on —
+``await aquery(vector=... | id=..., top_k, filter, include_values,
+include_metadata)`` returning an object with ``.matches`` — so endpoint
+code does not care which backend is active.
+
+Search is an exact NumPy matmul over L2-normalised rows by default
+(~10k × 384 float32 is a sub-millisecond GEMV). Two optional
+approximate indexes can sit in front of it:
+
+    - "ivf"  : inverted-file index built with spherical k-means (NumPy only)
+    - "hnsw" : graph index via the optional ``hnswlib`` package
+
+ANN candidates are always re-scored exactly. Filtered queries skip the
+ANN index and scan the filtered rows directly, which keeps results
+correct for selective filters.
+
+Metadata filters accept what ``build_metadata_filter`` produces, plus
+the rest of Pinecone's operator set: ``$eq $ne $gt $gte $lt $lte $in
+$nin $and $or`` and the ``{"field": value}`` shorthand for ``$eq``.
+As in Pinecone, ``$eq`` on a string field is an exact match while
+``$eq``/``$in`` on a list field match on membership.
+
+Configuration (environment):
+    VECTOR_BACKEND   "pinecone" (default) or "local"
+    LOCAL_ANN        "exact" (default), "ivf" or "hnsw"
+"""
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional, Protocol
+
+import numpy as np
+
+from backend.catalog import CATALOG_DIR, Catalog, load_catalog, normalise_rows
+
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "pinecone")
+LOCAL_ANN: str = os.getenv("LOCAL_ANN", "exact")
+PINECONE_INDEX_NAME: str = "nebula-index"
+
+# Number of compiled filter masks kept per store
+FILTER_CACHE_SIZE: int = 256
+
+
+# ---------------------------------------------------------------------------
+# Response types (shape-compatible with the Pinecone client)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Match:
+    id: str
+    score: float = 0.0
+    values: list[float] = field(default_factory=list)
+    metadata: Optional[dict] = None
+
+
+@dataclass
+class QueryResponse:
+    matches: list[Match]
+    namespace: str = ""
+
+
+@dataclass
+class FetchResponse:
+    vectors: dict[str, Match]
+    namespace: str = ""
+
+
+class VectorStore(Protocol):
+    """The part of the Pinecone ``Index`` interface the backend uses, async."""
+
+    async def aquery(self, *args, **kwargs) -> Any:
+        ...
+
+    async def afetch(self, ids: list[str], *args, **kwargs) -> Any:
+        ...
+
+
+# ---------------------------------------------------------------------------
+# Metadata filtering
+# ---------------------------------------------------------------------------
+
+_NUMERIC_OPS = {
+    "$eq": np.equal,
+    "$ne": np.not_equal,
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class MetadataColumns:
+    """
+    Column-oriented copy of the catalog metadata used to evaluate
+    Pinecone-style filters as vectorised boolean masks.
+    """
+
+    def __init__(self, metadata: list[dict]):
+        self.size = len(metadata)
+        self.numeric: dict[str, np.ndarray] = {}
+        self.objects: dict[str, np.ndarray] = {}
+        self.list_fields: set[str] = set()
+
+        fields = set()
+        for meta in metadata:
+            fields.update(meta.keys())
+
+        for name in fields:
+            values = [meta.get(name) for meta in metadata]
+            if all(v is None or _is_number(v) for v in values):
+                self.numeric[name] = np.array(
+                    [np.nan if v is None else v for v in values], dtype=np.float64
+                )
+                continue
+            column = np.empty(self.size, dtype=object)
+            for row, value in enumerate(values):
+                column[row] = value
+            if any(isinstance(v, list) for v in values):
+                self.list_fields.add(name)
+            self.objects[name] = column
+
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def mask(self, flt: dict) -> np.ndarray:
+        """Return a boolean row mask for *flt* (memoised per filter)."""
+        key = json.dumps(flt, sort_keys=True)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        result = self._evaluate(flt)
+        result.setflags(write=False)
+        self._cache[key] = result
+        if len(self._cache) > FILTER_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return result
+
+    def _evaluate(self, flt: dict) -> np.ndarray:
+        result = np.ones(self.size, dtype=bool)
+        for key, condition in flt.items():
+            if key == "$and":
+                for sub in condition:
+                    result &= self._evaluate(sub)
+            elif key == "$or":
+                any_match = np.zeros(self.size, dtype=bool)
+                for sub in condition:
+                    any_match |= self._evaluate(sub)
+                result &= any_match
+            else:
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for op, operand in condition.items():
+                    result &= self._compare(key, op, operand)
+        return result
+
+    def _compare(self, name: str, op: str, operand) -> np.ndarray:
+        negated = op in ("$ne", "$nin")
+
+        if name in self.numeric:
+            column = self.numeric[name]
+            if op in ("$in", "$nin"):
+                numbers = [v for v in operand if _is_number(v)]
+                hit = np.isin(column, numbers)
+                return ~hit if negated else hit
+            if op not in _NUMERIC_OPS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if not _is_number(operand):
+                return np.full(self.size, negated)
+            # Missing values are NaN: false for every operator except $ne
+            with np.errstate(invalid="ignore"):
+                return _NUMERIC_OPS[op](column, operand)
+
+        if name not in self.objects:
+            return np.full(self.size, negated)
+
+        column = self.objects[name]
+        if op in ("$eq", "$ne"):
+            if name in self.list_fields:
+                hit = np.fromiter(
+                    (v == operand or (isinstance(v, list) and operand in v) for v in column),
+                    dtype=bool,
+                    count=self.size,
+                )
+            else:
+                hit = np.asarray(column == operand, dtype=bool)
+        elif op in ("$in", "$nin"):
+            wanted = set(operand)
+            hit = np.fromiter(
+                (
+                    bool(wanted.intersection(v)) if isinstance(v, list) else v in wanted
+                    for v in column
+                ),
+                dtype=bool,
+                count=self.size,
+            )
+        else:
+            raise ValueError(f"Operator {op} is only supported on numeric fields")
+        return ~hit if negated else hit
+
+
+# ---------------------------------------------------------------------------
+# Approximate indexes
+# ---------------------------------------------------------------------------
+
+class IVFIndex:
+    """
+    Inverted-file index: rows are bucketed by their nearest k-means
+    centroid and a query only scans the ``nprobe`` closest buckets.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        iterations: int = 10,
+        seed: int = 0,
+    ):
+        n = vectors.shape[0]
+        self.nlist = max(1, min(nlist or int(np.sqrt(n)), n))
+        self.nprobe = max(1, min(nprobe, self.nlist))
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            counts = np.bincount(assignment, minlength=self.nlist)
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = vectors[rng.choice(n, int(empty.sum()), replace=False)]
+            centroids = normalise_rows(sums)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+
+        self.centroids = centroids
+        order = np.argsort(assignment, kind="stable")
+        self._rows = order.astype(np.int64)
+        self._offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(assignment, minlength=self.nlist)))
+        )
+
+    def search(self, query: np.ndarray, k: int) -> np.ndarray:
+        probe = np.argsort(-(self.centroids @ query))[: self.nprobe]
+        return np.concatenate(
+            [self._rows[self._offsets[c]: self._offsets[c + 1]] for c in probe]
+        )
+
+
+class HNSWIndex:
+    """Hierarchical navigable small-world graph (requires ``hnswlib``)."""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef: int = 64,
+    ):
+        try:
+            import hnswlib
+        except ImportError as exc:
+            raise ImportError(
+                "LOCAL_ANN=hnsw requires the optional 'hnswlib' package"
+            ) from exc
+
+        n, dim = vectors.shape
+        self.ef = ef
+        self._size = n
+        self._index = hnswlib.Index(space="ip", dim=dim)
+        self._index.init_index(max_elements=n, ef_construction=ef_construction, M=m)
+        self._index.add_items(vectors, np.arange(n))
+        self._index.set_ef(ef)
+
+    def search(self, query: np.ndarray, k: int) -> np.ndarray:
+        labels, _ = self._index.knn_query(query, k=min(max(k, self.ef), self._size))
+        return labels[0].astype(np.int64)
+
+
+ANN_INDEXES = {"ivf": IVFIndex, "hnsw": HNSWIndex}
+
+
+# ---------------------------------------------------------------------------
+# Local store
+# ---------------------------------------------------------------------------
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the *k* largest scores, highest first."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= scores.size:
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class LocalVectorStore:
+    """In-process replacement for the Pinecone index over a :class:`Catalog`."""
+
+    def __init__(self, catalog: Catalog, ann: str = "exact", **ann_options):
+        self.catalog = catalog
+        self.vectors = np.ascontiguousarray(catalog.vectors, dtype=np.float32)
+        self.columns = MetadataColumns(catalog.metadata)
+
+        ann = (ann or "exact").lower()
+        if ann == "exact" or len(catalog) == 0:
+            self.ann = None
+        elif ann in ANN_INDEXES:
+            self.ann = ANN_INDEXES[ann](self.vectors, **ann_options)
+        else:
+            raise ValueError(f"Unknown LOCAL_ANN mode: {ann}")
+
+    @classmethod
+    def load(cls, path=CATALOG_DIR, ann: str = LOCAL_ANN, **ann_options) -> "LocalVectorStore":
+        return cls(load_catalog(path, mmap=True), ann=ann, **ann_options)
+
+    def _match(self, row: int, score: float, include_values: bool, include_metadata: bool) -> Match:
+        return Match(
+            id=self.catalog.ids[row],
+            score=float(score),
+            values=self.vectors[row].tolist() if include_values else [],
+            metadata=self.catalog.metadata[row] if include_metadata else None,
+        )
+
+    def query(
+        self,
+        vector=None,
+        id: Optional[str] = None,
+        top_k: int = 10,
+        filter: Optional[dict] = None,
+        include_values: bool = False,
+        include_metadata: bool = False,
+        **_ignored,
+    ) -> QueryResponse:
+        if id is not None:
+            row = self.catalog.row_of(id)
+            if row is None:
+                return QueryResponse(matches=[])
+            query_vec = self.vectors[row]
+        elif vector is not None:
+            query_vec = normalise_rows(vector)[0]
+        else:
+            raise ValueError("query() needs either 'vector' or 'id'")
+
+        if filter:
+            rows = np.flatnonzero(self.columns.mask(filter))
+        elif self.ann is not None:
+            rows = np.unique(self.ann.search(query_vec, top_k))
+        else:
+            rows = None
+
+        if rows is None:
+            scores = self.vectors @ query_vec
+            picked = top_k_indices(scores, top_k)
+            hits = zip(picked, scores[picked])
+        else:
+            scores = self.vectors[rows] @ query_vec
+            picked = top_k_indices(scores, top_k)
+            hits = zip(rows[picked], scores[picked])
+
+        return QueryResponse(matches=[
+            self._match(int(row), score, include_values, include_metadata)
+            for row, score in hits
+        ])
+
+    def fetch(self, ids: list[str], **_ignored) -> FetchResponse:
+        vectors = {}
+        for mid in ids:
+            row = self.catalog.row_of(mid)
+            if row is not None:
+                vectors[mid] = self._match(row, 0.0, True, True)
+        return FetchResponse(vectors=vectors)
+
+    def describe_index_stats(self, **_ignored) -> dict:
+        return {
+            "dimension": self.catalog.dimension,
+            "total_vector_count": len(self.catalog),
+        }
+
+    # In-process search is a sub-millisecond matmul: run it on the loop
+    async def aquery(self, **kwargs) -> QueryResponse:
+        return self.query(**kwargs)
+
+    async def afetch(self, ids: list[str], **kwargs) -> FetchResponse:
+        return self.fetch(ids, **kwargs)
+
+    async def adescribe_index_stats(self) -> dict:
+        return self.describe_index_stats()
+
+
+# ---------------------------------------------------------------------------
+# Factory
+# ---------------------------------------------------------------------------
+
+def open_vector_store(backend: str = VECTOR_BACKEND, api_key: Optional[str] = None) -> VectorStore:
+    """Create the vector store selected by *backend* ("pinecone" or "local")."""
+    backend = (backend or "pinecone").lower()
+    if backend == "local":
+        store = LocalVectorStore.load(CATALOG_DIR, ann=LOCAL_ANN)
+        logger.info(
+            "Loaded local vector store: %d vectors (ann=%s)", len(store.catalog), LOCAL_ANN
+        )
+        return store
+    if backend == "pinecone":
+        from backend.pinecone_client import AsyncPineconeIndex, resolve_index_host
+
+        return AsyncPineconeIndex(resolve_index_host(PINECONE_INDEX_NAME, api_key), api_key)
+    raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
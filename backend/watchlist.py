@@ -0,0 +1,140 @@
+"""
+backend/watchlist.py
+--------------------
+Statements behind the ``/api/watchlist`` endpoints.
+
+The watchlist used to be read in one unbounded join and written one
+unguarded ``INSERT`` per request, so double-clicks stored duplicates and
+a bulk import meant one HTTP call per movie. Here:
+
+    - pages are keyset-paginated on ``(added_at, id)``, newest first,
+      served by the composite ``(user_id, added_at, id)`` index — page N
+      costs the same as page 1, and entries added meanwhile do not shift
+      later pages
+    - adds are a single ``INSERT … SELECT … ON CONFLICT (user_id,
+      movie_id) DO NOTHING`` for any number of movies, so repeating a
+      request is harmless; the same statement reports how many movies
+      the ids resolved to and how many entries were new
+    - removes are a single ``DELETE`` for any number of movies
+
+Movies are addressed by catalog (Pinecone) id or ``movie_metadata`` UUID
+and resolved inside the same statement.
+
+Cursors are URL-safe base64 of ``[added_at, id]`` of the last entry of
+the previous page (see ``backend/result_pool.py`` for the search
+cursors).
+
+Databases created before the unique constraint need duplicates removed
+and the constraint and index added once:
+
+    DELETE FROM watchlists a USING watchlists b
+     WHERE a.user_id = b.user_id AND a.movie_id = b.movie_id AND a.id > b.id;
+    ALTER TABLE watchlists ADD CONSTRAINT uq_watchlists_user_movie UNIQUE (user_id, movie_id);
+    CREATE INDEX ix_watchlists_user_added ON watchlists (user_id, added_at, id);
+"""
+
+import base64
+import uuid
+from datetime import datetime
+from typing import Iterable, Optional
+
+import orjson
+from sqlalchemy import Select, delete, func, literal, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.models import MovieMetadata, Watchlist
+from backend.result_pool import InvalidCursor
+
+WATCHLIST_PAGE_SIZE: int = 50
+MAX_WATCHLIST_PAGE_SIZE: int = 200
+MAX_WATCHLIST_BATCH: int = 500      # movie ids per batch add/remove
+
+
+def encode_cursor(added_at: datetime, entry_id: uuid.UUID) -> str:
+    raw = orjson.dumps([added_at.isoformat(), str(entry_id)])
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        added_at, entry_id = orjson.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(added_at), uuid.UUID(entry_id)
+    except Exception as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+
+
+def movie_condition(movie_ids: Iterable[str]):
+    """``movie_metadata`` rows matching catalog ids or row UUIDs."""
+    uuids, catalog_ids = [], []
+    for movie_id in dict.fromkeys(movie_ids):
+        try:
+            uuids.append(uuid.UUID(movie_id))
+        except ValueError:
+            catalog_ids.append(movie_id)
+    conditions = []
+    if catalog_ids:
+        conditions.append(MovieMetadata.pinecone_id.in_(catalog_ids))
+    if uuids:
+        conditions.append(MovieMetadata.id.in_(uuids))
+    return or_(*conditions) if conditions else literal(False)
+
+
+def page_query(user_id, limit: int, after: Optional[tuple[datetime, uuid.UUID]] = None) -> Select:
+    """One page (plus one look-ahead row) of *user_id*'s entries, newest first."""
+    query = (
+        select(Watchlist, MovieMetadata)
+        .join(MovieMetadata, Watchlist.movie_id == MovieMetadata.id)
+        .where(Watchlist.user_id == user_id)
+    )
+    if after is not None:
+        query = query.where(tuple_(Watchlist.added_at, Watchlist.id) < tuple_(*after))
+    return query.order_by(Watchlist.added_at.desc(), Watchlist.id.desc()).limit(limit + 1)
+
+
+def page_payload(rows: list, limit: int) -> dict:
+    """``{"items": [...], "nextCursor": ...}`` from :func:`page_query` rows."""
+    items = [
+        {
+            "id": str(entry.id),
+            "movie_id": str(movie.id),
+            "pinecone_id": movie.pinecone_id,
+            "title": movie.title,
+            "rating": movie.rating,
+            "added_at": entry.added_at,
+        }
+        for entry, movie in rows[:limit]
+    ]
+    last = rows[limit - 1][0] if len(rows) > limit else None
+    return {
+        "items": items,
+        "nextCursor": encode_cursor(last.added_at, last.id) if last is not None else None,
+    }
+
+
+def add_statement(user_id, movie_ids: Iterable[str]) -> Select:
+    """
+    Insert every known movie of *movie_ids*; existing entries are left
+    alone. Selects ``(found, added)``: movies the ids resolved to (an id
+    and a UUID naming the same movie count once) and entries inserted.
+    """
+    movies = select(MovieMetadata.id).where(movie_condition(movie_ids)).cte("movies")
+    added = (
+        insert(Watchlist)
+        .from_select(
+            ["id", "user_id", "movie_id"],
+            select(func.gen_random_uuid(), literal(user_id, Watchlist.user_id.type), movies.c.id),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "movie_id"])
+        .returning(Watchlist.id)
+        .cte("added")
+    )
+    return select(
+        select(func.count()).select_from(movies).scalar_subquery().label("found"),
+        select(func.count()).select_from(added).scalar_subquery().label("added"),
+    )
+
+
+def remove_statement(user_id, movie_ids: Iterable[str]):
+    movies = select(MovieMetadata.id).where(movie_condition(movie_ids))
+    return delete(Watchlist).where(Watchlist.user_id == user_id, Watchlist.movie_id.in_(movies))
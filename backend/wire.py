@@ -0,0 +1,118 @@
+"""
+backend/wire.py
+---------------
+Wire formats for the graph endpoints (``/movies``, ``/search``,
+``/engine/similar``).
+
+``format=full`` (default) is the historical shape: node dicts plus link
+dicts with string ``source``/``target`` and identical ``value`` and
+``similarity`` weights. ``format=compact`` sends each node once and
+every link as an index triple into the node list:
+
+    {"format": "compact",
+     "nodes": [{"id": "603", "title": ...}, ...],
+     "links": [[0, 7, 0.8123], ...]}        # [source, target, weight]
+
+Hub links (``isCentralLink``) need no flag in compact form — they are
+the links touching ``centralNodeId``.
+
+``fields=id,title,poster`` projects nodes onto the listed keys in either
+format (``id`` is always kept), so graph views can skip overviews.
+
+Payloads are serialised with orjson straight into a ``Response``,
+bypassing FastAPI's ``jsonable_encoder`` pass.
+
+Streaming (``/search?stream=true``) sends newline-delimited JSON records
+in either format:
+
+    {"type": "nodes", "nodes": [...], ...}      # as soon as the query answers
+    {"type": "links", "links": [...]}           # one record per link batch
+    {"type": "summary", "totalLinks": 123, ...}  # always last
+
+Compact link triples index into the node list of the ``nodes`` record.
+"""
+
+from typing import Optional
+
+import orjson
+from fastapi import HTTPException, Response
+
+GRAPH_FORMATS = ("full", "compact")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+WEIGHT_DECIMALS: int = 4
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    """Parse a ``fields=`` query value; ``None`` means every field."""
+    if fields is None or not fields.strip():
+        return None
+    names = ["id"] + [name.strip() for name in fields.split(",") if name.strip()]
+    return tuple(dict.fromkeys(names))
+
+
+def project_nodes(nodes: list[dict], fields: Optional[tuple[str, ...]]) -> list[dict]:
+    if fields is None:
+        return nodes
+    return [{name: node[name] for name in fields if name in node} for node in nodes]
+
+
+def compact_links(links: list[dict], nodes: list[dict]) -> list[list]:
+    """Turn link dicts into ``[source_index, target_index, weight]`` triples."""
+    position = {node["id"]: i for i, node in enumerate(nodes)}
+    return [
+        [position[link["source"]], position[link["target"]], round(link["value"], WEIGHT_DECIMALS)]
+        for link in links
+    ]
+
+
+def graph_payload(payload: dict, format: str = "full", fields: Optional[str] = None) -> dict:
+    """
+    Return *payload* (a dict with ``nodes`` and ``links``) in the requested
+    wire format. The input is not modified.
+    """
+    if format not in GRAPH_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(GRAPH_FORMATS)}")
+    projection = parse_fields(fields)
+    nodes = project_nodes(payload["nodes"], projection)
+
+    if format == "full":
+        if projection is None:
+            return payload
+        shaped = {**payload, "nodes": nodes}
+        if "movies" in payload:
+            shaped["movies"] = nodes
+        return shaped
+
+    shaped = {key: value for key, value in payload.items() if key != "movies"}
+    shaped["format"] = "compact"
+    shaped["nodes"] = nodes
+    shaped["links"] = compact_links(payload["links"], payload["nodes"])
+    return shaped
+
+
+def dumps(payload: dict) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def graph_response(payload: dict, format: str = "full", fields: Optional[str] = None) -> Response:
+    """Shape *payload* with :func:`graph_payload` and serialise it with orjson."""
+    return Response(content=dumps(graph_payload(payload, format, fields)), media_type="application/json")
+
+
+def ndjson(record: dict) -> bytes:
+    return dumps(record) + b"\n"
+
+
+def nodes_record(nodes: list[dict], format: str = "full", fields: Optional[str] = None, **extra) -> dict:
+    """First record of a streamed graph."""
+    record = {"type": "nodes", **extra, "nodes": project_nodes(nodes, parse_fields(fields))}
+    if format == "compact":
+        record["format"] = "compact"
+    return record
+
+
+def links_record(links: list[dict], nodes: list[dict], format: str = "full") -> dict:
+    """One streamed batch of links; compact triples index into *nodes*."""
+    if format == "compact":
+        links = compact_links(links, nodes)
+    return {"type": "links", "links": links}
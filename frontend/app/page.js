@@ -119,7 +119,8 @@ export default function Home() {
       setError(null);
 
       try {
-        const res = await axios.post('http://127.0.0.1:8000/engine/search', {
+        // One round trip: search results plus the top hit's neighbourhood graph
+        const res = await axios.post('http://127.0.0.1:8000/engine/launch', {
           query: query
         });
 
@@ -131,17 +132,15 @@ export default function Home() {
           const topResult = results[0];
           setSelectedEngineMovie(topResult);
 
-          // Immediately start building the graph for the top result
-          try {
-            const similarRes = await axios.get(`http://127.0.0.1:8000/engine/similar/${topResult.id}`);
+          if (res.data.graph) {
             setGraphData({
-              nodes: similarRes.data.nodes,
-              links: similarRes.data.links
+              nodes: res.data.graph.nodes,
+              links: res.data.graph.links
             });
-            setCentralNodeId(similarRes.data.centralNodeId);
+            setCentralNodeId(res.data.graph.centralNodeId);
             setEngineStage('graph');
-          } catch (err) {
-            console.error("Failed to load auto-similar graph:", err);
+          } else {
+            console.error("No graph returned for top result:", topResult.id);
             setError("Failed to build galaxy for: " + topResult.title);
             setEngineStage('search'); // fallback
           }
@@ -168,8 +168,10 @@ const BrowseMovies = ({ onBack, onLaunchEngine, onMovieClick }) => {
         isFetchingNextPage,
     } = useInfiniteQuery({
         queryKey: ['browse-filtered', filterKey],
-        queryFn: async ({ pageParam = 1 }) => {
-            const params = { page: pageParam, limit: PAGE_LIMIT };
+        queryFn: async ({ pageParam }) => {
+            // Later pages are served from the backend's result pool via the cursor
+            if (pageParam) return fetchMovies({ cursor: pageParam, limit: PAGE_LIMIT });
+            const params = { page: 1, limit: PAGE_LIMIT };
             if (browseSearchQuery) params.q = browseSearchQuery;
             if (activeGenre) params.genre = activeGenre;
             if (activeDecade) params.decade = activeDecade;
@@ -177,9 +179,9 @@ const BrowseMovies = ({ onBack, onLaunchEngine, onMovieClick }) => {
             if (activeMinYear) params.minYear = parseInt(activeMinYear);
             return fetchMovies(params);
         },
-        initialPageParam: 1,
+        initialPageParam: null,
         getNextPageParam: (lastPage) =>
-            lastPage.hasMore ? lastPage.page + 1 : undefined,
+            lastPage.hasMore ? lastPage.nextCursor : undefined,
         enabled: !!hasActiveFilters, // Only fetch when filters are active
     });
 
@@ -15,11 +15,13 @@ const API_BASE = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000';
  * @param {number} [params.rating]  - Minimum rating filter
  * @param {number} [params.page]    - Page number (1-indexed)
  * @param {number} [params.limit]   - Results per page (default 20)
- * @returns {Promise<{movies: Array, total: number, page: number, hasMore: boolean}>}
+ * @param {string} [params.cursor]  - nextCursor from a previous page (search params are carried in it)
+ * @returns {Promise<{movies: Array, total: number, page: number, hasMore: boolean, nextCursor: ?string}>}
  */
-export async function fetchMovies({ q = '', genre, decade, rating, minYear, page = 1, limit = 20 } = {}) {
+export async function fetchMovies({ q = '', genre, decade, rating, minYear, page = 1, limit = 20, cursor } = {}) {
     const url = new URL(`${API_BASE}/api/search`);
 
+    if (cursor) url.searchParams.set('cursor', cursor);
     if (q) url.searchParams.set('q', q);
     if (genre) url.searchParams.set('genre', genre);
     if (decade) url.searchParams.set('decade', decade);
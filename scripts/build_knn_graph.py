@@ -0,0 +1,27 @@
+"""
+Precompute the catalog-wide kNN graph used by /engine/similar.
+
+Run after bulk_ingest.py (which calls this automatically) or
+export_catalog.py. Reads the local catalog snapshot and writes the
+adjacency arrays to <catalog>/knn/ (see backend/knn_graph.py).
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.catalog import CATALOG_DIR, load_catalog  # noqa: E402
+from backend.knn_graph import DEFAULT_K, DEFAULT_THRESHOLD, write_knn_graph  # noqa: E402
+
+
+def build(catalog_dir=CATALOG_DIR, k=DEFAULT_K, threshold=DEFAULT_THRESHOLD):
+    catalog = load_catalog(catalog_dir)
+    print(f"  Building kNN graph for {len(catalog)} movies (k={k}, cross-edges >= {threshold})...")
+    start = time.perf_counter()
+    target = write_knn_graph(catalog_dir, catalog, k=k, threshold=threshold)
+    print(f"  Wrote kNN graph to {target} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    build()
@@ -1,17 +1,48 @@
 """
 Bulk Ingestion Script for Nebula
 Pulls ~10,000 movies from the TMDB API, generates embeddings,
-and upserts them into Pinecone in batches of 100.
+and upserts them into Pinecone in batches of 100 — as one streaming
+pipeline (backend/ingest_pipeline.py), so fetching, embedding and
+upserting overlap and memory stays flat. Progress is staged in
+INGEST_CHECKPOINT_DIR (backend/ingest_checkpoint.py): rerunning after a
+crash or outage resumes where it stopped; --fresh starts over.
+--incremental refreshes only movies TMDB reports as changed, re-embedding
+those whose text changed (backend/ingest_manifest.py).
+Also writes a local catalog snapshot (see backend/catalog.py) so the API
+can run with VECTOR_BACKEND=local, and mirrors it into the Postgres
+movie_metadata table (backend/metadata_sync.py).
 """
 
+import argparse
+import asyncio
 import os
+import sys
 import time
-import requests
+from collections import Counter
+from contextlib import aclosing
+from datetime import date, timedelta
+from pathlib import Path
+
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
 from pinecone import Pinecone, ServerlessSpec
 from tqdm import tqdm
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.catalog import CATALOG_DIR, catalog_exists, load_catalog, update_catalog  # noqa: E402
+from backend.encoder import ENCODER_BACKEND, ShardedEmbedder, load_model  # noqa: E402
+from backend.ingest_checkpoint import INGEST_CHECKPOINT_DIR, IngestCheckpoint  # noqa: E402
+from backend.ingest_manifest import (  # noqa: E402
+    METADATA, NEW, TEXT, UNCHANGED, IngestManifest, embedding_text,
+)
+from backend.ingest_pipeline import (  # noqa: E402
+    EMBED_BATCH_SIZE, INGEST_EMBED_WORKERS, INGEST_SHARD_SIZE, IngestItem, run_pipeline,
+)
+from backend.metadata_store import split_genres  # noqa: E402
+from backend.metadata_sync import connect as connect_postgres, movie_rows, sync_movie_metadata  # noqa: E402
+from backend.pinecone_client import AsyncPineconeIndex, resolve_index_host  # noqa: E402
+from backend.tmdb import TMDBClient, changed_movie_ids, iter_movie_details, iter_movie_lists  # noqa: E402
+from scripts.build_knn_graph import build as build_knn_graph  # noqa: E402
+
 # ─── Config ───
 load_dotenv()
 PC_KEY = os.getenv("PINECONE_API_KEY")
@@ -19,9 +50,6 @@ TMDB_KEY = os.getenv("TMDB_API_KEY")
 INDEX_NAME = "nebula-index"
 MODEL_NAME = "all-MiniLM-L6-v2"
 TARGET_COUNT = 10000
-EMBED_BATCH_SIZE = 256
-UPSERT_BATCH_SIZE = 100
-MAX_RETRIES = 3
 
 # Genre ID → Name mapping (TMDB standard)
 GENRE_MAP = {
@@ -33,27 +61,6 @@ GENRE_MAP = {
 }
 
 
-def _fetch_tmdb_page(url, params, max_retries):
-    """Fetch a single page from TMDB with retries."""
-    for attempt in range(1, max_retries + 1):
-        try:
-            resp = requests.get(url, params=params, timeout=10)
-            if resp.status_code == 429:
-                wait = int(resp.headers.get("Retry-After", 3))
-                time.sleep(wait)
-                continue
-            if resp.status_code == 422:
-                return None  # Page too high
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            if attempt == max_retries:
-                tqdm.write(f"    Failed page: {e}")
-            else:
-                time.sleep(1)
-    return {"results": []}
-
-
 def _parse_movie(movie, seen_ids):
     """Parse TMDB movie data into Nebula format."""
     mid = str(movie["id"])
@@ -93,149 +100,254 @@ def _parse_movie(movie, seen_ids):
     }
 
 
-def fetch_from_tmdb(target_count):
-    """Fetch movies from multiple TMDB API endpoints to maximize variety."""
-    if not TMDB_KEY:
-        print("  ERROR: No TMDB_API_KEY found in .env")
-        return []
-
-    seen_ids = set()
-    movies = []
-
-    # Multiple endpoints × many pages for variety and volume
-    endpoints = [
-        ("popular", 500),
-        ("top_rated", 500),
-        ("now_playing", 100),
-        ("upcoming", 100),
-    ]
-
-    print(f"  Target: {target_count} unique movies from TMDB API\n")
-
-    for endpoint, max_pages in endpoints:
-        if len(movies) >= target_count:
-            break
-
-        pages_needed = min(max_pages, (target_count - len(movies)) // 20 + 5)
-        desc = f"  /{endpoint}"
-
-        for page in tqdm(range(1, pages_needed + 1), desc=desc, unit="pg"):
-            if len(movies) >= target_count:
-                break
-
-            url = f"https://api.themoviedb.org/3/movie/{endpoint}"
-            params = {"api_key": TMDB_KEY, "language": "en-US", "page": page}
-            data = _fetch_tmdb_page(url, params, MAX_RETRIES)
-
-            if data is None:
-                break
-
-            for movie in data.get("results", []):
-                m_data = _parse_movie(movie, seen_ids)
-                if m_data:
-                    movies.append(m_data)
-
-            # Respect TMDB rate limit (~40 req/10s)
-            time.sleep(0.25)
-
-    print(f"\n  Collected {len(movies)} unique movies")
-    return movies
-
-
-def batch_embed(model, movies, batch_size=EMBED_BATCH_SIZE):
-    """Generate embeddings in batches with retry logic."""
-    all_embeddings = [None] * len(movies)
-
-    for start in tqdm(range(0, len(movies), batch_size), desc="Embedding", unit="batch"):
-        end = min(start + batch_size, len(movies))
-        batch_movies = movies[start:end]
-        texts = [f"{m['title']} ({m['genres']}): {m['overview']}" for m in batch_movies]
-
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                embeddings = model.encode(texts, show_progress_bar=False)
-                for i, emb in enumerate(embeddings):
-                    all_embeddings[start + i] = emb.tolist()
-                break
-            except Exception as e:
-                tqdm.write(f"  Embed error batch {start//batch_size+1}, attempt {attempt}: {e}")
-                if attempt == MAX_RETRIES:
-                    for i in range(len(batch_movies)):
-                        all_embeddings[start + i] = None
-                else:
-                    time.sleep(2 ** attempt)
-
-    return all_embeddings
-
-
-def upsert_to_pinecone(index, movies, embeddings, batch_size=UPSERT_BATCH_SIZE):
-    """Upsert vectors to Pinecone in batches with retry logic."""
-    vectors = []
-    skipped = 0
-
-    for movie, embedding in zip(movies, embeddings):
-        if embedding is None:
-            skipped += 1
-            continue
-        vectors.append({
-            "id": movie["id"],
-            "values": embedding,
-            "metadata": {
-                "title": movie["title"],
-                "poster_path": movie["poster_path"],
-                "overview": movie["overview"][:1000],
-                "rating": movie["rating"],
-                "genres": movie["genres"],
-                "release_date": movie["release_date"],
-                "year": movie["year"],
-                "original_language": movie["original_language"],
-                "popularity": movie["popularity"],
-            }
-        })
-
-    if skipped:
-        print(f"  Skipped {skipped} movies with failed embeddings")
-
-    print(f"Upserting {len(vectors)} vectors to Pinecone...")
-    success = 0
-
-    for start in tqdm(range(0, len(vectors), batch_size), desc="Upserting", unit="batch"):
-        batch = vectors[start:start + batch_size]
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                index.upsert(vectors=batch)
-                success += len(batch)
-                break
-            except Exception as e:
-                tqdm.write(f"  Upsert error batch {start//batch_size+1}, attempt {attempt}: {e}")
-                if attempt < MAX_RETRIES:
-                    time.sleep(2 ** attempt)
-                else:
-                    tqdm.write(f"  DROPPED {len(batch)} vectors")
-
-    print(f"  Successfully upserted {success}/{len(vectors)} vectors")
-    return success
+def _movie_metadata(movie):
+    """Metadata stored alongside each vector (Pinecone and local catalog)."""
+    metadata = {
+        "title": movie["title"],
+        "poster_path": movie["poster_path"],
+        "overview": movie["overview"][:1000],
+        "rating": movie["rating"],
+        "genres": movie["genres"],
+        "release_date": movie["release_date"],
+        "year": movie["year"],
+        "original_language": movie["original_language"],
+        "popularity": movie["popularity"],
+    }
+    genre_list = split_genres(movie["genres"])
+    if genre_list:   # genre filters match on membership (build_metadata_filter)
+        metadata["genre_list"] = genre_list
+    return metadata
+
+
+def _movie_item(m_data):
+    """Pipeline item for a parsed movie: id, embedding text, metadata."""
+    return IngestItem(
+        id=m_data["id"],
+        text=embedding_text(m_data["title"], m_data["genres"], m_data["overview"]),
+        metadata=_movie_metadata(m_data),
+    )
+
+
+async def tmdb_items(client, target_count, staged=frozenset()):
+    """
+    Parsed, unique TMDB movies as pipeline items, skipping the *staged*
+    ids of an earlier run, until *target_count* movies exist in total.
+    """
+    seen_ids = set(staged)
+    count = len(seen_ids)
+    if count >= target_count:
+        return
+    async with aclosing(iter_movie_lists(client)) as stream:
+        async for movie in stream:
+            m_data = _parse_movie(movie, seen_ids)
+            if not m_data:
+                continue
+            yield _movie_item(m_data)
+            count += 1
+            if count >= target_count:
+                return
+
+
+class Embedder:
+    """
+    The pipeline's embed function: length-sorted shards across
+    INGEST_EMBED_WORKERS processes, or the model in-process with one worker.
+    """
+
+    def __init__(self, workers=INGEST_EMBED_WORKERS, shard_size=INGEST_SHARD_SIZE):
+        if workers > 1:
+            self.sharded = ShardedEmbedder(MODEL_NAME, ENCODER_BACKEND, workers=workers, shard_size=shard_size)
+            self.encode = self.sharded.encode
+            self.batch_size = self.sharded.batch_size
+        else:
+            self.sharded = None
+            model = load_model(MODEL_NAME, ENCODER_BACKEND)
+            self.encode = lambda texts: model.encode(texts, show_progress_bar=False)
+            self.batch_size = EMBED_BATCH_SIZE
+
+    def close(self):
+        if self.sharded is not None:
+            self.sharded.close()
+
+
+def _embedding_rate(stats):
+    """Sentences per second while the embed stage was working."""
+    if not stats.embed.busy:
+        return ""
+    return f"\n  Embedding throughput: {stats.embed.items / stats.embed.busy:,.0f} sentences/s"
+
+
+async def ingest(embedder, index, target_count, checkpoint, catalog_dir=CATALOG_DIR):
+    """
+    Stream TMDB → embeddings → Pinecone (see backend/ingest_pipeline.py),
+    staging every step in *checkpoint* so an interrupted run resumes.
+    """
+    progress = tqdm(total=target_count, initial=len(checkpoint.embedded_ids), desc="  Ingesting", unit="movie")
+
+    try:
+        async with TMDBClient(TMDB_KEY) as client:
+            stats = await run_pipeline(
+                tmdb_items(client, target_count, staged=checkpoint.known_ids),
+                embed=embedder.encode,
+                embed_batch_size=embedder.batch_size,
+                upsert=index.aupsert,
+                sink=lambda ids, vectors, metadata: progress.update(len(ids)),
+                checkpoint=checkpoint,
+            )
+            tmdb = client.stats
+    except BaseException:
+        checkpoint.close()
+        print(f"\n  Interrupted — progress is staged in {checkpoint.path}; rerun to resume.")
+        raise
+    finally:
+        progress.close()
+        await index.aclose()
+
+    rows = checkpoint.write_catalog(catalog_dir)
+    if rows:
+        print(f"  Wrote local catalog snapshot ({rows} vectors) to {catalog_dir}")
+        manifest = IngestManifest()
+        for record in checkpoint.iter_records():
+            if record["id"] in checkpoint.embedded_ids:
+                manifest.record(record["id"], record["text"], record["metadata"])
+        manifest.save(catalog_dir)
+    print(
+        f"  TMDB: {tmdb['requests']} requests, {tmdb['throttled']} throttled (429), "
+        f"{tmdb['retries']} retries, {tmdb['failed']} failed pages"
+    )
+    print("\n" + stats.report() + _embedding_rate(stats))
+
+    pending = checkpoint.pending_rows()
+    if pending:
+        checkpoint.close()
+        print(f"\n  {pending} vectors were not upserted; rerun to retry them ({checkpoint.path}).")
+    else:
+        checkpoint.clear()
+    return stats, rows
+
+
+async def incremental_ingest(embedder, index, since=None, catalog_dir=CATALOG_DIR):
+    """
+    Refresh only what changed on TMDB since *since* (default: the last
+    run): re-embed movies whose embedding text changed, send
+    metadata-only updates for the rest (see backend/ingest_manifest.py).
+    Returns the number of re-embedded movies, or None without a catalog.
+    """
+    manifest = IngestManifest.load(catalog_dir)
+    if manifest is None:
+        if not catalog_exists(catalog_dir):
+            print("  ERROR: No local catalog to refresh; run a full ingest first.")
+            return None
+        print("  No manifest yet; hashing the current catalog...")
+        manifest = IngestManifest.from_catalog(load_catalog(catalog_dir, mmap=True))
+    since = since or manifest.updated_on or date.today() - timedelta(days=1)
+
+    counts = Counter()
+    reembed, relabel = [], []
+    try:
+        async with TMDBClient(TMDB_KEY) as client:
+            changed = await changed_movie_ids(client, since)
+            candidates = sorted(changed & manifest.movies.keys())
+            print(f"  {len(changed)} movies changed on TMDB since {since}, {len(candidates)} in the catalog")
+            async with aclosing(iter_movie_details(client, candidates)) as details:
+                async for movie in details:
+                    m_data = _parse_movie(movie, set())
+                    if not m_data:
+                        counts["unusable"] += 1
+                        continue
+                    item = _movie_item(m_data)
+                    kind = manifest.classify(item.id, item.text, item.metadata)
+                    counts[kind] += 1
+                    if kind in (NEW, TEXT):
+                        reembed.append(item)
+                    elif kind == METADATA:
+                        relabel.append(item)
+
+        # Metadata-only drift: no embedding, just setMetadata
+        results = await asyncio.gather(
+            *(index.aupdate(item.id, set_metadata=item.metadata) for item in relabel),
+            return_exceptions=True,
+        )
+        sent = [item for item, result in zip(relabel, results) if not isinstance(result, Exception)]
+
+        # Changed embedding text: through the regular pipeline
+        vectors, upserted = {}, set()
+
+        async def upsert(chunk):
+            await index.aupsert(chunk)
+            upserted.update(v["id"] for v in chunk)
+
+        async def source():
+            for item in reembed:
+                yield item
+
+        stats = await run_pipeline(
+            source(), embed=embedder.encode, embed_batch_size=embedder.batch_size, upsert=upsert,
+            sink=lambda ids, rows, metadata: vectors.update(zip(ids, rows)),
+        )
+    finally:
+        await index.aclose()
+
+    print(
+        f"  {counts[TEXT] + counts[NEW]} re-embedded, {counts[METADATA]} metadata-only, "
+        f"{counts[UNCHANGED]} unchanged, {counts['unusable']} skipped"
+    )
+    if reembed:
+        print(stats.report() + _embedding_rate(stats))
+
+    if vectors or relabel:
+        changed_metadata = {item.id: item.metadata for item in relabel}
+        changed_metadata.update((item.id, item.metadata) for item in reembed if item.id in vectors)
+        rows = update_catalog(catalog_dir, vectors, changed_metadata)
+        print(f"  Updated local catalog snapshot ({rows} vectors)")
+
+    for item in sent + [item for item in reembed if item.id in upserted]:
+        manifest.record(item.id, item.text, item.metadata)
+    failed = len(relabel) - len(sent) + len(reembed) - len(upserted)
+    if failed:
+        # Keep the window open so the next run retries these movies
+        print(f"  {failed} updates failed; the next run re-checks changes since {since}")
+    manifest.save(catalog_dir, updated=since if failed else date.today())
+    return len(vectors)
+
+
+async def sync_postgres(catalog_dir=CATALOG_DIR):
+    """Mirror the catalog into movie_metadata (skipped when Postgres is unreachable)."""
+    catalog = load_catalog(catalog_dir, mmap=True)
+    try:
+        async with connect_postgres() as conn:
+            written = await sync_movie_metadata(conn, movie_rows(catalog.ids, catalog.metadata))
+    except Exception as exc:
+        print(f"  Skipping Postgres movie_metadata sync: {exc}")
+        return
+    print(f"  Postgres movie_metadata: {written} of {len(catalog)} rows inserted or updated")
 
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fresh", action="store_true",
+                        help="discard the staged progress of an interrupted run")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only refresh movies TMDB reports as changed")
+    parser.add_argument("--since", type=date.fromisoformat,
+                        help="with --incremental: start of the change window (YYYY-MM-DD; default: last run)")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("  Nebula Bulk Ingestion (TMDB API)")
     print("=" * 60)
 
-    # 1. Fetch movies
-    print("\n[1/4] Fetching movies from TMDB...")
-    movies = fetch_from_tmdb(TARGET_COUNT)
-    if not movies:
-        print("ERROR: No movies fetched. Check your TMDB_API_KEY.")
+    if not TMDB_KEY:
+        print("ERROR: No TMDB_API_KEY found in .env")
         return
-    print(f"  Using {len(movies)} movies for ingestion")
 
-    # 2. Load model
-    print(f"\n[2/4] Loading SentenceTransformer: {MODEL_NAME}...")
-    model = SentenceTransformer(MODEL_NAME)
+    # 1. Load model
+    print(f"\n[1/3] Loading SentenceTransformer: {MODEL_NAME} ({ENCODER_BACKEND}, "
+          f"{INGEST_EMBED_WORKERS} embedding worker(s))...")
+    embedder = Embedder()
 
-    # 3. Connect to Pinecone
-    print("\n[3/4] Connecting to Pinecone...")
+    # 2. Connect to Pinecone
+    print("\n[2/3] Connecting to Pinecone...")
     pc = Pinecone(api_key=PC_KEY)
     existing = [i.name for i in pc.list_indexes()]
     if INDEX_NAME not in existing:
@@ -247,16 +359,43 @@ def main():
             spec=ServerlessSpec(cloud="aws", region="us-east-1")
         )
         time.sleep(10)
-    index = pc.Index(INDEX_NAME)
+    index = AsyncPineconeIndex(resolve_index_host(INDEX_NAME, PC_KEY), PC_KEY)
 
-    # 4. Embed + Upsert
-    print(f"\n[4/4] Embedding & upserting {len(movies)} movies...")
-    embeddings = batch_embed(model, movies)
-    success = upsert_to_pinecone(index, movies, embeddings)
+    if args.incremental:
+        print("\n[3/3] Refreshing changed movies...")
+        try:
+            reembedded = asyncio.run(incremental_ingest(embedder, index, since=args.since))
+        finally:
+            embedder.close()
+        if reembedded:
+            build_knn_graph()
+        if reembedded is not None:
+            asyncio.run(sync_postgres())
+        return
+
+    # 3. Fetch → embed → upsert, streamed and checkpointed
+    checkpoint = IngestCheckpoint(INGEST_CHECKPOINT_DIR)
+    if args.fresh:
+        checkpoint.clear()
+        checkpoint = IngestCheckpoint(INGEST_CHECKPOINT_DIR)
+    elif checkpoint.known_ids:
+        print(f"\n  Resuming: {len(checkpoint.known_ids)} movies staged, "
+              f"{checkpoint.pending_rows()} vectors awaiting upsert")
+    print(f"\n[3/3] Fetching, embedding & upserting up to {TARGET_COUNT} movies...")
+    try:
+        stats, rows = asyncio.run(ingest(embedder, index, TARGET_COUNT, checkpoint))
+    finally:
+        embedder.close()
+    if not rows:
+        print("ERROR: No movies ingested. Check your TMDB_API_KEY.")
+        return
+    build_knn_graph()
+    asyncio.run(sync_postgres())
+    success = stats.upsert.items
 
     # Summary
     time.sleep(5)
-    stats = index.describe_index_stats()
+    stats = pc.Index(INDEX_NAME).describe_index_stats()
     print("\n" + "=" * 60)
     print("  Ingestion Complete!")
     print(f"  Vectors upserted this run: {success}")
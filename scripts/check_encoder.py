@@ -0,0 +1,43 @@
+"""
+Compare the configured encoder backend (ENCODER_BACKEND) with the fp32
+PyTorch model: worst-case cosine similarity and single-query latency.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.encoder import (  # noqa: E402
+    CONSISTENCY_TEXTS,
+    ENCODER_BACKEND,
+    ENCODER_COSINE_TOLERANCE,
+    check_consistency,
+    load_model,
+)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+LATENCY_RUNS = 50
+
+
+def _latency_ms(model):
+    model.encode(CONSISTENCY_TEXTS[0])  # warm up
+    start = time.perf_counter()
+    for i in range(LATENCY_RUNS):
+        model.encode(CONSISTENCY_TEXTS[i % len(CONSISTENCY_TEXTS)])
+    return 1000 * (time.perf_counter() - start) / LATENCY_RUNS
+
+
+def main():
+    reference = load_model(MODEL_NAME, "torch")
+    candidate = load_model(MODEL_NAME, ENCODER_BACKEND)
+
+    worst = check_consistency(candidate, reference)
+    print(f"Backend:            {ENCODER_BACKEND}")
+    print(f"Worst cosine:       {worst:.4f} (tolerance {ENCODER_COSINE_TOLERANCE})")
+    print(f"fp32 latency:       {_latency_ms(reference):.2f} ms/query")
+    print(f"{ENCODER_BACKEND} latency: {_latency_ms(candidate):.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Export the Pinecone index into a local catalog snapshot.
+
+Use this to run the API with VECTOR_BACKEND=local against an index that
+was ingested before bulk_ingest.py started writing snapshots.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pinecone import Pinecone
+from tqdm import tqdm
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.catalog import CATALOG_DIR, write_catalog  # noqa: E402
+
+load_dotenv()
+INDEX_NAME = "nebula-index"
+FETCH_BATCH_SIZE = 100
+
+
+def main():
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    index = pc.Index(INDEX_NAME)
+
+    ids, vectors, metadata = [], [], []
+    for id_batch in tqdm(index.list(), desc="Exporting", unit="batch"):
+        for start in range(0, len(id_batch), FETCH_BATCH_SIZE):
+            fetched = index.fetch(ids=id_batch[start:start + FETCH_BATCH_SIZE])
+            for mid, vec in fetched.vectors.items():
+                ids.append(mid)
+                vectors.append(vec.values)
+                metadata.append(dict(vec.metadata or {}))
+
+    if not ids:
+        print("Index is empty, nothing to export.")
+        return
+
+    write_catalog(CATALOG_DIR, ids, vectors, metadata)
+    print(f"Wrote {len(ids)} vectors to {CATALOG_DIR}")
+
+
+if __name__ == "__main__":
+    main()
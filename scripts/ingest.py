@@ -111,6 +111,8 @@ def process_and_upload():
             "popularity": popularity,
             "adult": adult
         }
+        if genres:
+            metadata["genre_list"] = genres
 
         vectors.append({
             "id": movie_id,
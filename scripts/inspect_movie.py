@@ -1,12 +1,34 @@
+"""
+Inspect what is stored for the top matches of a query.
+
+Reads the local catalog artifact (memory-mapped vectors + metadata, see
+backend/catalog.py) when one exists, so nothing is pulled back over the
+network; falls back to querying Pinecone otherwise.
+"""
+
 import os
 import json
+import sys
+from pathlib import Path
+
 from dotenv import load_dotenv
-from pinecone import Pinecone
 from sentence_transformers import SentenceTransformer
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.catalog import CATALOG_DIR, catalog_exists, load_catalog  # noqa: E402
+from backend.vector_store import LocalVectorStore  # noqa: E402
+
 load_dotenv()
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-index = pc.Index("nebula-index")
+if catalog_exists(CATALOG_DIR):
+    catalog = load_catalog(CATALOG_DIR, mmap=True)
+    index = LocalVectorStore(catalog)
+    print(f"Using local catalog artifact {catalog.version or '(unversioned)'}: "
+          f"{len(catalog)} × {catalog.dimension} {catalog.vectors.dtype}")
+else:
+    from pinecone import Pinecone
+
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    index = pc.Index("nebula-index")
 model = SentenceTransformer('all-MiniLM-L6-v2')
 
 # Search for "Good Boy"